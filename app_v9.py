@@ -1,177 +1,78 @@
 import os
-import re
-import time
+import itertools
 from datetime import datetime
-from gtts import gTTS
-from pydub import AudioSegment
-from docx import Document
-from tkinter import Tk, Text, Button, filedialog, END, INSERT, DISABLED, NORMAL, PhotoImage, Toplevel, Label, Scrollbar, RIGHT, Y
-import pygame
-import PyPDF2
-
-# Configurações do projeto
-PROJECT_DIR = "project_files"
-BAGS_DIR = os.path.join(PROJECT_DIR, "bags")
+from tkinter import (Tk, Text, Button, Checkbutton, BooleanVar, filedialog, DISABLED, NORMAL, PhotoImage, Toplevel,
+                     Label, Scrollbar, RIGHT, Y)
+from converter import (PROJECT_DIR, ASSEMBLY_MODE, get_chunk_cache, get_default_engine, read_document, prepare_text,
+                       text_to_speech_with_highlight, text_to_docx)
+from highlight_index import HighlightIndex, index_path
+from highlight_player import HighlightPlayer, StreamingHighlightPlayer
+from text_view import VirtualTextView
+from incremental import manifest_path, load_manifest, save_manifest
+from synthesis import SynthesisCancelled, engine_signature
+from background_job import BackgroundJob
+
+# Configurações da interface
 ICON_PATH = os.path.join(PROJECT_DIR, "play_icon.png")
+POLL_MS = 100  # Intervalo de leitura do andamento da geração
 
-# Criação dos diretórios do projeto
-if not os.path.exists(PROJECT_DIR):
-    os.makedirs(PROJECT_DIR)
-if not os.path.exists(BAGS_DIR):
-    os.makedirs(BAGS_DIR)
+# Reprodutor com destaque em andamento
+player = None
+# Geração de áudio em andamento
+job = None
+# Numeração das gerações, que entra no nome do áudio
+generation_ids = itertools.count(1)
 
-def replace_abbreviations(text):
-    """Substitui abreviações específicas no texto"""
-    text = re.sub(r'\bArt\.?\s*(\d+)', r'Artigo \1', text)
-    return text
-
-def load_bags():
-    """Carrega as bags de palavras do diretório 'bags'"""
-    bags = {}
-    for filename in os.listdir(BAGS_DIR):
-        filepath = os.path.join(BAGS_DIR, filename)
-        with open(filepath, 'r', encoding='utf-8') as file:
-            for line in file:
-                if '=' in line:
-                    key, value = line.strip().split('=', 1)
-                    bags[key.strip()] = value.strip()
-    return bags
-
-def apply_bags(text, bags):
-    """Aplica as substituições das bags de palavras no texto"""
-    for key, value in bags.items():
-        text = re.sub(r'\b' + re.escape(key) + r'\b', value, text)
-    return text
-
-def split_text(text, max_length=500):
-    """Divide o texto em partes menores para evitar erros com o gTTS"""
-    parts = []
-    while len(text) > max_length:
-        split_index = text.rfind(' ', 0, max_length)
-        if split_index == -1:
-            split_index = max_length
-        parts.append(text[:split_index].strip())
-        text = text[split_index:].strip()
-    parts.append(text)
-    return parts
-
-def text_to_speech_with_highlight(text, output_filename):
-    """Converte o texto em áudio, salva em um arquivo e gera um log de destaque"""
-    text_parts = split_text(text)
-    temp_files = []
-    log_filename = os.path.join(PROJECT_DIR, f"{os.path.splitext(output_filename)[0]}_highlight.log")
-    
-    start_time = time.time()
-    with open(log_filename, "w") as log_file:
-        for i, part in enumerate(text_parts):
-            tts = gTTS(part, lang='pt')
-            temp_filename = os.path.join(PROJECT_DIR, f"temp_{i}.mp3")
-            tts.save(temp_filename)
-            temp_files.append(temp_filename)
-            part_preview = part[:50].replace('\n', ' ')
-            log_file.write(f"{time.time() - start_time:.2f} - {part_preview}\n")
-    
-    combined = AudioSegment.empty()
-    for temp_file in temp_files:
-        combined += AudioSegment.from_mp3(temp_file)
-        os.remove(temp_file)
-    
-    output_filepath = os.path.join(PROJECT_DIR, output_filename)
-    combined.export(output_filepath, format="mp3")
-    return log_filename
-
-def docx_to_text(docx_filename):
-    """Lê um arquivo .docx e retorna seu conteúdo como uma string"""
-    doc = Document(docx_filename)
-    full_text = []
-    for para in doc.paragraphs:
-        full_text.append(para.text)
-    return '\n'.join(full_text)
-
-def text_to_docx(docx_filename, text):
-    """Salva um texto em um arquivo .docx"""
-    doc = Document()
-    for line in text.split('\n'):
-        doc.add_paragraph(line)
-    doc.save(docx_filename)
-
-def pdf_to_text(pdf_filename):
-    """Lê um arquivo PDF e retorna seu conteúdo como uma string"""
-    pdf_text = []
-    with open(pdf_filename, 'rb') as file:
-        reader = PyPDF2.PdfReader(file)
-        for page_num in range(len(reader.pages)):
-            page = reader.pages[page_num]
-            pdf_text.append(page.extract_text())
-    return '\n'.join(pdf_text)
+def show_pdf_progress(done, total):
+    """Mostra no rótulo de status o andamento da leitura de um PDF"""
+    status_label.config(text=f"Lendo PDF: {done}/{total} páginas")
+    root.update_idletasks()
 
 def load_file():
     """Carrega um arquivo e insere o texto na caixa de texto"""
     filepath = filedialog.askopenfilename(filetypes=[("Document files", "*.docx *.txt *.pdf")])
     if filepath:
-        ext = os.path.splitext(filepath)[1].lower()
-        if ext == ".docx":
-            text = docx_to_text(filepath)
-        elif ext == ".pdf":
-            text = pdf_to_text(filepath)
-        elif ext == ".txt":
-            with open(filepath, 'r', encoding='utf-8') as file:
-                text = file.read()
-        else:
+        try:
+            text = read_document(filepath, progress=show_pdf_progress)
+        except ValueError:
             status_label.config(text="Formato de arquivo não suportado!")
             return
 
-        text = replace_abbreviations(text)
-        bags = load_bags()
-        text = apply_bags(text, bags)
-        text_box.delete(1.0, END)
-        text_box.insert(INSERT, text)
+        text = prepare_text(text)
+        text_box.set_text(text)
         generate_button.config(state=NORMAL)
         play_button.config(state=DISABLED)
         save_button.config(state=NORMAL)
         status_label.config(text=f"Carregado: {os.path.basename(filepath)}")
         root.filepath = filepath  # Salva o caminho do arquivo carregado
 
-def play_audio_with_highlight(log_filename, audio_filename):
-    """Reproduz o áudio e destaca o texto conforme o log"""
-    with open(log_filename, "r") as log_file:
-        lines = log_file.readlines()
-    
-    highlight_intervals = []
-    highlight_texts = []
-    for line in lines:
-        if " - " in line:
-            timestamp, text_preview = line.split(" - ", 1)
-            try:
-                highlight_intervals.append(float(timestamp))
-                highlight_texts.append(text_preview.strip())
-            except ValueError:
-                continue
-    
-    pygame.mixer.init()
-    pygame.mixer.music.load(audio_filename)
-    pygame.mixer.music.play()
-    
-    start_time = time.time()
-    for interval, text_preview in zip(highlight_intervals, highlight_texts):
-        while time.time() - start_time < interval:
-            time.sleep(0.1)
-        start_idx = text_box.search(text_preview, 1.0, stopindex=END)
-        if start_idx:
-            end_idx = f"{start_idx}+{len(text_preview)}c"
-            text_box.tag_remove("highlight", 1.0, END)
-            text_box.tag_add("highlight", start_idx, end_idx)
-            text_box.tag_config("highlight", background="yellow")
-            text_box.see(start_idx)
+def play_audio_with_highlight(index_filename, audio_filename):
+    """Reproduz o áudio e destaca o texto conforme o índice de destaque, sem bloquear a interface"""
+    global player
+    if player is not None:
+        player.stop()
+    player = HighlightPlayer(text_box, HighlightIndex.load(index_filename))
+    player.play(audio_filename)
 
 def stop_audio():
     """Para a reprodução do áudio"""
-    pygame.mixer.music.stop()
-    text_box.tag_remove("highlight", 1.0, END)
+    if player is not None:
+        player.stop()
+
+def pause_audio():
+    """Pausa ou retoma a reprodução do áudio"""
+    if player is not None:
+        player.toggle_pause()
+
+def seek_to_click(event):
+    """Pula a reprodução para o trecho clicado (Ctrl+clique)"""
+    if player is not None:
+        player.seek_to_tk(f"@{event.x},{event.y}")
+    return "break"
 
 def save_file():
     """Salva o texto editado de volta no arquivo original"""
-    text = text_box.get(1.0, END)
+    text = text_box.get_text()
     if hasattr(root, 'filepath'):
         ext = os.path.splitext(root.filepath)[1].lower()
         if ext == ".docx":
@@ -180,81 +81,179 @@ def save_file():
             with open(root.filepath, 'w', encoding='utf-8') as file:
                 file.write(text)
         status_label.config(text=f"Salvo: {os.path.basename(root.filepath)}")
+        if hasattr(root, 'output_filename'):
+            generate_audio(stream=False)  # Atualiza o áudio já gerado só com os trechos editados, sem tocá-lo
+
+def format_duration(seconds):
+    """Formata segundos como 1h02m, 3m05s ou 42s"""
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+def format_progress(meter):
+    """Texto de status com os trechos feitos, a vazão e o tempo restante estimado"""
+    total = f"/{meter.total}" if meter.total is not None else ""
+    text = f"Gerando áudio: {meter.done}{total} trechos · {meter.rate:.1f} trechos/s"
+    if meter.remaining is not None:
+        text += f" · restam ~{format_duration(meter.remaining)}"
+    return text
 
-def generate_audio():
-    """Gera o áudio e o log de destaque"""
-    text = text_box.get(1.0, END)
-    if hasattr(root, 'filepath'):
-        base_filename = os.path.splitext(os.path.basename(root.filepath))[0]
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        output_filename = f"{base_filename}_{timestamp}.mp3"
-    else:
-        output_filename = "output.mp3"
-    log_filename = os.path.join(PROJECT_DIR, f"{os.path.splitext(output_filename)[0]}_highlight.log")
-    
+def generate_audio(stream=None):
+    """Gera o áudio e o índice de destaque numa thread, acompanhando o andamento pelo rótulo de status
+
+    stream=None segue a opção "Play while generating"; False gera sem tocar.
+    """
+    global job
+    if job is not None:
+        job.cancel()  # Ex.: salvar durante uma geração recomeça com o texto novo
+    text = text_box.get_text()
+    base_filename = os.path.splitext(os.path.basename(root.filepath))[0] if hasattr(root, 'filepath') else "output"
+    # Nome único por geração: uma geração cancelada no mesmo segundo descarta só os próprios arquivos
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    output_filename = f"{base_filename}_{timestamp}_{next(generation_ids)}.mp3"
+
+    manifest_filename = manifest_path(PROJECT_DIR, base_filename)
+    previous_manifest = load_manifest(manifest_filename)
+    if stream is None:
+        stream = stream_var.get()
+    on_chunk = start_streaming_playback().feed if stream else None
+
+    def generate(progress, cancel):
+        _, chunks = text_to_speech_with_highlight(text, output_filename, previous_manifest=previous_manifest,
+                                                  progress=progress, cancel=cancel, on_chunk=on_chunk)
+        save_manifest(manifest_filename, output_filename, chunks, ASSEMBLY_MODE, engine_signature(get_default_engine()))
+        return output_filename
+
+    job = BackgroundJob(generate, cancelled_errors=(SynthesisCancelled,)).start()
+    generate_button.config(state=DISABLED)
+    cancel_button.config(state=NORMAL)
     status_label.config(text="Audio está sendo gerado, aguarde...")
-    root.update_idletasks()  # Atualiza a interface para mostrar a mensagem
-
-    if not (os.path.exists(os.path.join(PROJECT_DIR, output_filename)) and os.path.exists(log_filename)):
-        log_filename = text_to_speech_with_highlight(text, output_filename)
-    
-    status_label.config(text="Audio gerado com sucesso!")
+    root.after(POLL_MS, poll_generation, job)
+
+def poll_generation(current):
+    """Lê os eventos da geração em andamento e reagenda a si mesmo até ela terminar"""
+    global job
+    if current is not job:
+        return  # Geração substituída por outra mais nova
+    for event in current.poll():
+        kind = event[0]
+        if kind == 'progress':
+            status_label.config(text=format_progress(current.meter))
+        elif kind == 'done':
+            job = None
+            if isinstance(player, StreamingHighlightPlayer):
+                player.finish()
+            finish_generation(event[1])
+            return
+        else:
+            job = None
+            if isinstance(player, StreamingHighlightPlayer):
+                player.stop()
+            generate_button.config(state=NORMAL)
+            cancel_button.config(state=DISABLED)
+            if kind == 'cancelled':
+                status_label.config(text="Geração cancelada")
+            else:
+                status_label.config(text=f"Erro ao gerar o áudio: {event[1]}")
+            return
+    root.after(POLL_MS, poll_generation, current)
+
+def start_streaming_playback():
+    """Troca o reprodutor por um que toca os trechos à medida que a geração os entrega"""
+    global player
+    if player is not None:
+        player.stop()
+    player = StreamingHighlightPlayer(text_box)
+    player.play()
+    return player
+
+def finish_generation(output_filename):
+    """Habilita a reprodução do áudio recém-gerado"""
+    stats = get_chunk_cache().stats()
+    status_label.config(text=f"Audio gerado com sucesso! Cache: {stats['hits']} acertos, {stats['misses']} faltas")
+    generate_button.config(state=NORMAL)
+    cancel_button.config(state=DISABLED)
     play_button.config(state=NORMAL)
     root.output_filename = output_filename  # Salva o nome do arquivo de saída
 
+def cancel_generation():
+    """Cancela a geração em andamento; os trechos ainda não sintetizados são descartados"""
+    if job is not None:
+        job.cancel()
+        status_label.config(text="Cancelando a geração...")
+
 def play_audio():
     """Inicia a reprodução do áudio com destaque"""
     if hasattr(root, 'output_filename'):
         output_filename = os.path.join(PROJECT_DIR, root.output_filename)
-        log_filename = os.path.join(PROJECT_DIR, f"{os.path.splitext(root.output_filename)[0]}_highlight.log")
-        play_audio_with_highlight(log_filename, output_filename)
+        index_filename = index_path(PROJECT_DIR, root.output_filename)
+        play_audio_with_highlight(index_filename, output_filename)
 
-# Interface Gráfica com Tkinter
-root = Tk()
-root.title("Text to Speech with Highlight")
+# Função para criar um tooltip
+def create_tooltip(widget, text):
+    tooltip = Toplevel(widget)
+    tooltip.wm_overrideredirect(True)
+    tooltip.wm_geometry("+0+0")
+    label = Label(tooltip, text=text, background="yellow", relief="solid", borderwidth=1)
+    label.pack()
 
-scrollbar = Scrollbar(root)
-scrollbar.pack(side=RIGHT, fill=Y)
+def main():
+    """Monta a interface gráfica com Tkinter e inicia o loop de eventos"""
+    global root, text_box, generate_button, cancel_button, play_button, save_button, status_label, stream_var
+    root = Tk()
+    root.title("Text to Speech with Highlight")
 
-text_box = Text(root, wrap='word', width=100, height=30, yscrollcommand=scrollbar.set)
-text_box.pack(pady=20)
+    scrollbar = Scrollbar(root)
+    scrollbar.pack(side=RIGHT, fill=Y)
 
-scrollbar.config(command=text_box.yview)
+    # Só a região visível do documento fica no widget; o texto completo fica na view
+    text_widget = Text(root, wrap='word', width=100, height=30)
+    text_widget.pack(pady=20)
+    text_box = VirtualTextView(text_widget, scrollbar)
+    text_widget.bind("<Control-Button-1>", seek_to_click)
 
-button_frame = Button(root)
-button_frame.pack(pady=10)
+    button_frame = Button(root)
+    button_frame.pack(pady=10)
 
-load_button = Button(button_frame, text="Load File", command=load_file)
-load_button.pack(side='left', padx=10)
+    load_button = Button(button_frame, text="Load File", command=load_file)
+    load_button.pack(side='left', padx=10)
 
-generate_button = Button(button_frame, text="Generate Audio", command=generate_audio, state=DISABLED)
-generate_button.pack(side='left', padx=10)
+    generate_button = Button(button_frame, text="Generate Audio", command=generate_audio, state=DISABLED)
+    generate_button.pack(side='left', padx=10)
 
-play_button = Button(button_frame, text="Play", command=play_audio, state=DISABLED)
-play_button.pack(side='left', padx=10)
+    cancel_button = Button(button_frame, text="Cancel", command=cancel_generation, state=DISABLED)
+    cancel_button.pack(side='left', padx=10)
 
-stop_button = Button(button_frame, text="Stop", command=stop_audio)
-stop_button.pack(side='left', padx=10)
+    play_button = Button(button_frame, text="Play", command=play_audio, state=DISABLED)
+    play_button.pack(side='left', padx=10)
 
-save_button = Button(button_frame, text="Save", command=save_file, state=DISABLED)
-save_button.pack(side='left', padx=10)
+    stream_var = BooleanVar(root, value=False)
+    stream_check = Checkbutton(button_frame, text="Play while generating", variable=stream_var)
+    stream_check.pack(side='left', padx=10)
 
-# Adiciona o rótulo de status
-status_label = Label(root, text="")
-status_label.pack(pady=10)
+    pause_button = Button(button_frame, text="Pause", command=pause_audio)
+    pause_button.pack(side='left', padx=10)
 
-# Função para criar um tooltip
-def create_tooltip(widget, text):
-    tooltip = Toplevel(widget)
-    tooltip.wm_overrideredirect(True)
-    tooltip.wm_geometry("+0+0")
-    label = Label(tooltip, text=text, background="yellow", relief="solid", borderwidth=1)
-    label.pack()
+    stop_button = Button(button_frame, text="Stop", command=stop_audio)
+    stop_button.pack(side='left', padx=10)
+
+    save_button = Button(button_frame, text="Save", command=save_file, state=DISABLED)
+    save_button.pack(side='left', padx=10)
+
+    # Adiciona o rótulo de status
+    status_label = Label(root, text="")
+    status_label.pack(pady=10)
+
+    play_icon = None
+    try:
+        play_icon = PhotoImage(file=ICON_PATH)
+    except Exception as e:
+        print(f"Erro ao carregar ícone: {e}")
 
-play_icon = None
-try:
-    play_icon = PhotoImage(file=ICON_PATH)
-except Exception as e:
-    print(f"Erro ao carregar ícone: {e}")
+    root.mainloop()
 
-root.mainloop()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import os
+import wave
+import subprocess
+from io import BytesIO
+from mp3_frames import Mp3FrameWriter, read_range
+from metrics import METRICS
+
+# Parâmetros do modo de recodificação
+REENCODE_BITRATE = "64k"
+REENCODE_TARGET_DBFS = -20.0  # Volume médio de cada trecho; None mantém o volume original
+
+
+class FrameAssembler:
+    """Monta o MP3 final juntando os quadros dos trechos, sem decodificar"""
+
+    name = 'frames'
+    supports_reuse = True
+
+    def __init__(self, output_filepath, previous_filepath=None):
+        self.previous_filepath = previous_filepath
+        self.writer = Mp3FrameWriter(output_filepath)
+
+    def add(self, data):
+        """Acrescenta um trecho sintetizado e retorna sua posição no arquivo final"""
+        return self.writer.write(data)
+
+    def reuse(self, old_chunk):
+        """Copia um trecho inalterado do arquivo da geração anterior"""
+        return self.writer.write(read_range(self.previous_filepath, old_chunk['offset'], old_chunk['size']))
+
+    def playable(self, data):
+        """Áudio do último trecho como ficou no arquivo final: os próprios quadros MP3"""
+        return data
+
+    def close(self):
+        self.writer.close()
+
+    def abort(self):
+        self.writer.abort()
+
+
+class StreamingEncoderAssembler:
+    """Recodifica os trechos num único processo ffmpeg, gravando o MP3 final à medida que chegam
+
+    Cada trecho é decodificado, ajustado (formato e volume) e enviado como PCM
+    para a entrada do ffmpeg, que grava o arquivo de saída continuamente. Só o
+    PCM do trecho atual fica na memória, e não há arquivos temporários por trecho.
+    """
+
+    name = 'reencode'
+    supports_reuse = False  # Não tem reuse(): o áudio recodificado não guarda as posições dos trechos antigos
+
+    def __init__(self, output_filepath, previous_filepath=None, bitrate=REENCODE_BITRATE,
+                 target_dbfs=REENCODE_TARGET_DBFS):
+        self.output_filepath = output_filepath
+        self._tmp_path = f"{output_filepath}.part"
+        self.bitrate = bitrate
+        self.target_dbfs = target_dbfs
+        self.frame_rate = None
+        self.channels = None
+        self.frames = 0
+        self._process = None
+        self._last_pcm = b''
+
+    def _start(self, segment):
+        """Abre o processo ffmpeg no formato do primeiro trecho"""
+        from pydub import AudioSegment
+        self.frame_rate = segment.frame_rate
+        self.channels = segment.channels
+        self._process = subprocess.Popen(
+            [AudioSegment.converter, '-y', '-loglevel', 'error',
+             '-f', 's16le', '-ar', str(self.frame_rate), '-ac', str(self.channels), '-i', 'pipe:0',
+             '-f', 'mp3', '-b:a', self.bitrate, self._tmp_path],
+            stdin=subprocess.PIPE)
+
+    def add(self, data):
+        """Decodifica um trecho e envia seu PCM para o codificador"""
+        from pydub import AudioSegment
+        segment = AudioSegment.from_file(BytesIO(data), format="mp3")
+        if self._process is None:
+            self._start(segment)
+        segment = segment.set_frame_rate(self.frame_rate).set_channels(self.channels).set_sample_width(2)
+        pcm = self._process_segment(segment)
+        start_ms = self.frames * 1000 / self.frame_rate
+        self._process.stdin.write(pcm)
+        self._last_pcm = pcm
+        self.frames += len(pcm) // (2 * self.channels)
+        return {'start_ms': start_ms, 'end_ms': self.frames * 1000 / self.frame_rate}
+
+    def playable(self, data):
+        """Áudio do último trecho como ficou no arquivo final, em WAV
+
+        O MP3 sintetizado tem outro volume e, no modo normalize, o silêncio
+        das pontas; quem toca os trechos durante a geração precisa do PCM
+        processado para acompanhar as posições do índice.
+        """
+        buffer = BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(self.channels)
+            wav.setsampwidth(2)
+            wav.setframerate(self.frame_rate)
+            wav.writeframes(self._last_pcm)
+        return buffer.getvalue()
+
+    def _process_segment(self, segment):
+        """Ajusta o volume do trecho e retorna seu PCM s16le"""
+        if self.target_dbfs is not None and segment.dBFS != float('-inf'):
+            segment = segment.apply_gain(self.target_dbfs - segment.dBFS)
+        return segment.raw_data
+
+    def close(self):
+        """Finaliza o codificador e move o arquivo para o destino final"""
+        if self._process is None:
+            open(self.output_filepath, 'wb').close()
+            return
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass  # O ffmpeg já saiu; o código de saída diz se houve erro
+        if self._process.wait() != 0:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+            raise RuntimeError(f"ffmpeg terminou com código {self._process.returncode}")
+        os.replace(self._tmp_path, self.output_filepath)
+
+    def abort(self):
+        """Interrompe o codificador e descarta o arquivo parcial"""
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class NormalizingAssembler(StreamingEncoderAssembler):
+    """Modo reencode que também corta o silêncio das pontas de cada trecho e iguala o volume entre eles
+
+    O processamento (audio_processing, com NumPy) é feito trecho a trecho
+    antes do envio ao ffmpeg, então a memória continua limitada a um trecho.
+    As posições retornadas já são as do áudio cortado, e por isso o índice de
+    destaque acompanha as durações novas.
+    """
+
+    name = 'normalize'
+
+    def __init__(self, output_filepath, previous_filepath=None, bitrate=REENCODE_BITRATE,
+                 target_dbfs=REENCODE_TARGET_DBFS):
+        try:
+            import audio_processing
+        except ImportError:
+            raise RuntimeError("O modo 'normalize' requer o NumPy (pip install numpy)") from None
+        super().__init__(output_filepath, previous_filepath, bitrate, target_dbfs)
+        self._processing = audio_processing
+
+    def _process_segment(self, segment):
+        pcm, trimmed = self._processing.process_pcm(segment.raw_data, self.channels, self.frame_rate,
+                                                     self.target_dbfs)
+        METRICS.count('silence_trimmed_seconds_total', trimmed / self.frame_rate)
+        return pcm
+
+
+ASSEMBLERS = {assembler.name: assembler
+              for assembler in (FrameAssembler, StreamingEncoderAssembler, NormalizingAssembler)}
@@ -0,0 +1,347 @@
+import re
+import ssl
+import time
+import queue
+import base64
+import asyncio
+import threading
+import contextvars
+from urllib.parse import urlsplit
+from synthesis import (DEFAULT_WORKERS, DEFAULT_RETRIES, DEFAULT_BACKOFF, CANCEL_POLL_SECONDS, SynthesisCancelled,
+                       engine_name, engine_settings)
+from chunk_cache import chunk_key
+from metrics import METRICS
+
+GTTS_PATH = "/_/TranslateWebserverUi/data/batchexecute"
+DEFAULT_RATE = 5.0  # Requisições por segundo enviadas ao serviço de TTS
+HTTP_TIMEOUT = 30  # Segundos para cada requisição HTTP
+
+# Áudio em base64 na resposta do RPC jQ1olc, como lido pelo gTTS
+AUDIO_PATTERN = re.compile(rb'jQ1olc","\[\\"(.*)\\"]')
+
+
+class TTSHTTPError(Exception):
+    """Resposta inesperada do serviço de TTS"""
+
+    def __init__(self, status, body=b''):
+        super().__init__(f"HTTP {status}: {body[:200]!r}")
+        self.status = status
+
+
+class RateLimiter:
+    """Espaça as requisições para no máximo `rate` por segundo, somando as pausas pedidas pelo servidor"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0.0
+        self._next = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def pause(self, seconds):
+        """Adia todas as requisições seguintes (ex.: após um 429 com Retry-After)"""
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+class ConnectionPool:
+    """Conexões HTTP/1.1 persistentes (keep-alive) com um mesmo servidor, limitadas a `size`"""
+
+    def __init__(self, base_url, size=DEFAULT_WORKERS, timeout=HTTP_TIMEOUT):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.ssl = ssl.create_default_context() if url.scheme == 'https' else None
+        self.port = url.port or (443 if self.ssl else 80)
+        self.host_header = url.netloc
+        self.timeout = timeout
+        self._idle = []
+        self._slots = asyncio.Semaphore(max(1, size))
+        self.connections_opened = 0
+        self.requests = 0
+
+    async def _connect(self):
+        connection = await asyncio.wait_for(asyncio.open_connection(self.host, self.port, ssl=self.ssl),
+                                            self.timeout)
+        self.connections_opened += 1
+        return connection
+
+    async def _exchange(self, connection, method, path, body, headers):
+        reader, writer = connection
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host_header}", f"Content-Length: {len(body)}",
+                 "Connection: keep-alive"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+        status_line = await reader.readuntil(b'\r\n')
+        version, status = status_line.split()[:2]
+        response_headers = {}
+        while (line := await reader.readuntil(b'\r\n')) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            parts = []
+            while size := int((await reader.readuntil(b'\r\n')).split(b';')[0], 16):
+                parts.append(await reader.readexactly(size + 2))
+            while await reader.readuntil(b'\r\n') != b'\r\n':
+                pass  # Trailers
+            data = b''.join(part[:-2] for part in parts)
+        elif 'content-length' in response_headers:
+            data = await reader.readexactly(int(response_headers['content-length']))
+        else:
+            data = await reader.read()
+            response_headers['connection'] = 'close'
+
+        keep_alive = (response_headers.get('connection', '').lower() != 'close'
+                      and version != b'HTTP/1.0')
+        return int(status), response_headers, data, keep_alive
+
+    async def request(self, method, path, body=b'', headers=None):
+        """Envia uma requisição e retorna (status, cabeçalhos, corpo)
+
+        Uma conexão ociosa é reaproveitada; se o servidor a tiver fechado
+        enquanto estava parada, a requisição é refeita numa conexão nova.
+        """
+        async with self._slots:
+            while True:
+                reused = bool(self._idle)
+                connection = self._idle.pop() if reused else await self._connect()
+                try:
+                    status, response_headers, data, keep_alive = await asyncio.wait_for(
+                        self._exchange(connection, method, path, body, headers or {}), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    connection[1].close()
+                    if reused:
+                        continue
+                    raise ConnectionError(f"Falha na conexão com {self.host_header}: {e}") from e
+                except BaseException:
+                    connection[1].close()
+                    raise
+                self.requests += 1
+                if keep_alive:
+                    self._idle.append(connection)
+                else:
+                    connection[1].close()
+                return status, response_headers, data
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+
+class GTTSClient:
+    """Cliente assíncrono do endpoint usado pelo gTTS, sobre um pool de conexões e um limitador de taxa
+
+    O texto é dividido e empacotado pelo próprio gTTS (get_bodies), e cada
+    parte vira uma requisição. Respostas 429 e 5xx são repetidas com espera
+    exponencial, ou pelo tempo do Retry-After, que também pausa as demais
+    requisições do pool.
+    """
+
+    def __init__(self, engine, connections=DEFAULT_WORKERS, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.engine = engine
+        self.pool = ConnectionPool(engine.base_url, connections)
+        self.limiter = RateLimiter(engine.rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.throttled = 0
+        self.retried = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.pool.close()
+
+    async def synthesize(self, text, lang='pt'):
+        from gtts import gTTS
+        tts = gTTS(text, lang=lang, tld=self.engine.tld, slow=self.engine.slow)
+        audio = []
+        for body in tts.get_bodies():
+            audio.append(await self._post(body.encode('utf-8'), tts.GOOGLE_TTS_HEADERS))
+        return b''.join(audio)
+
+    async def _post(self, body, headers):
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            delay = self.backoff * (2 ** attempt)
+            await self.limiter.wait()
+            try:
+                status, response_headers, data = await self.pool.request('POST', self.engine.path, body, headers)
+            except (OSError, asyncio.TimeoutError):
+                if last_attempt:
+                    raise
+                self.retried += 1
+                METRICS.count('synthesis_retries_total', engine=self.engine.name)
+                await asyncio.sleep(delay)
+                continue
+            if status == 200:
+                return parse_audio(data)
+            if status != 429 and status < 500 or last_attempt:
+                raise TTSHTTPError(status, data)
+            if status == 429:
+                self.throttled += 1
+                retry_after = response_headers.get('retry-after', '')
+                delay = float(retry_after) if retry_after.replace('.', '', 1).isdigit() else delay
+            self.retried += 1
+            METRICS.count('synthesis_retries_total', engine=self.engine.name)
+            self.limiter.pause(delay)
+
+    def stats(self):
+        return {
+            'requests': self.pool.requests,
+            'connections_opened': self.pool.connections_opened,
+            'throttled': self.throttled,
+            'retried': self.retried,
+        }
+
+
+def parse_audio(data):
+    """Extrai e decodifica o áudio de uma resposta do RPC do gTTS"""
+    audio = [base64.b64decode(match.group(1)) for match in map(AUDIO_PATTERN.search, data.splitlines()) if match]
+    if not audio:
+        raise TTSHTTPError(200, data)
+    return b''.join(audio)
+
+
+async def _run_pipeline(parts, engine, lang, workers, retries, backoff, cache, settings, results, state):
+    """Encadeia leitura dos trechos -> síntese -> entrega em ordem, com filas limitadas entre as etapas"""
+    loop = asyncio.get_running_loop()
+    state.update(loop=loop, task=asyncio.current_task())
+    if state.get('closed'):
+        return  # O consumidor desistiu antes de o loop começar
+    window = max(1, workers) * 2
+    inbox = asyncio.Queue(maxsize=window)  # Trechos aguardando um worker
+    ordered = asyncio.Queue(maxsize=window)  # Resultados futuros, na ordem do texto
+    if settings is None:
+        settings = engine_settings(engine)
+
+    async with engine.client(workers, retries, backoff) as client:
+        async def produce():
+            # A leitura e o preparo do texto rodam fora do loop de eventos
+            iterator = iter(parts)
+            index = 0
+            while (part := await asyncio.to_thread(next, iterator, None)) is not None:
+                future = loop.create_future()
+                await ordered.put((index, future))
+                await inbox.put((part, future))
+                index += 1
+            await ordered.put(None)
+            for _ in range(workers):
+                await inbox.put(None)
+
+        async def synthesize(part):
+            key = chunk_key(part, lang, engine_name(engine), settings) if cache is not None else None
+            data = cache.get(key) if key else None
+            if key:
+                METRICS.count('cache_lookups_total', result='miss' if data is None else 'hit')
+            if data is None:
+                started = time.perf_counter()
+                try:
+                    data = await client.synthesize(part, lang)
+                except Exception:
+                    engine.record_error()
+                    METRICS.count('synthesis_failures_total', engine=engine_name(engine))
+                    raise
+                elapsed = time.perf_counter() - started
+                engine.record_latency(elapsed)
+                METRICS.observe('chunk_synthesis_seconds', elapsed, engine=engine_name(engine))
+                METRICS.add_event('synthesize_chunk', started, elapsed, characters=len(part))
+                if key:
+                    await asyncio.to_thread(cache.put, key, data)
+            return data
+
+        async def work():
+            while (item := await inbox.get()) is not None:
+                part, future = item
+                try:
+                    future.set_result(await synthesize(part))
+                except Exception as e:
+                    future.set_exception(e)
+
+        async def emit():
+            # A fila de saída é limitada: se a montagem atrasar, a síntese espera
+            while (item := await ordered.get()) is not None:
+                index, future = item
+                data = await future
+                await asyncio.to_thread(results.put, (index, data))
+
+        tasks = [asyncio.create_task(produce()), asyncio.create_task(emit())]
+        tasks += [asyncio.create_task(work()) for _ in range(workers)]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        state['stats'] = client.stats()
+
+
+def synthesize_chunks_async(parts, engine, lang='pt', workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES,
+                            backoff=DEFAULT_BACKOFF, cache=None, settings=None, cancel=None):
+    """Versão assíncrona de synthesize_chunks para motores com client() (ex.: 'gtts-async')
+
+    O pipeline roda num loop de eventos em outra thread, com `workers`
+    requisições simultâneas sobre conexões persistentes; os resultados chegam
+    por uma fila limitada e são gerados como (índice, bytes) na ordem original.
+    Se o consumidor parar no meio ou o evento cancel for sinalizado, as
+    requisições pendentes são canceladas.
+    """
+    workers = max(1, workers)
+    results = queue.Queue(maxsize=workers * 2)
+    state = {}
+
+    def run():
+        try:
+            asyncio.run(_run_pipeline(parts, engine, lang, workers, retries, backoff, cache, settings, results,
+                                      state))
+        except BaseException as e:
+            results.put((None, e))
+        else:
+            results.put((None, None))
+
+    # O contexto acompanha a leitura dos trechos (asyncio.to_thread), para que o tempo dela
+    # conte nas etapas da conversão (METRICS.collect_stages)
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(run,), name='tts-async', daemon=True)
+    thread.start()
+    finished = False
+    try:
+        while True:
+            try:
+                index, data = results.get(timeout=CANCEL_POLL_SECONDS)
+            except queue.Empty:
+                if cancel is not None and cancel.is_set():
+                    raise SynthesisCancelled("Síntese cancelada") from None
+                continue
+            if index is None:
+                finished = True
+                if data is not None:
+                    raise data
+                break
+            yield index, data
+    finally:
+        if not finished:
+            # 'closed' antes de ler o loop: ou o pipeline vê o pedido ao começar, ou o loop já está aqui
+            state['closed'] = True
+            loop, task = state.get('loop'), state.get('task')
+            if loop is not None and not task.done():
+                try:
+                    loop.call_soon_threadsafe(task.cancel)
+                except RuntimeError:
+                    pass  # O loop terminou entre a verificação e a chamada; não há o que cancelar
+            while results.get()[0] is not None:
+                pass  # Libera a thread do pipeline, que pode estar bloqueada na fila cheia
+        thread.join()
+        if 'stats' in state:
+            engine.record_client_stats(state['stats'])
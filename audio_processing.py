@@ -0,0 +1,89 @@
+import numpy as np
+
+# Parâmetros do corte de silêncio e da normalização de volume de cada trecho
+WINDOW_MS = 10  # Resolução da detecção de silêncio
+SILENCE_THRESHOLD_DBFS = -50.0  # Janelas abaixo disso contam como silêncio
+KEEP_SILENCE_MS = 100  # Silêncio mantido no início e no fim de cada trecho (a pausa entre trechos é o dobro)
+TARGET_LOUDNESS_DBFS = -20.0
+PEAK_CEILING_DBFS = -1.0  # O ganho nunca leva o pico acima disso
+MAX_GAIN_DB = 20.0  # Evita amplificar demais trechos quase mudos
+# Medida do volume com blocos de 400 ms sobrepostos e os limiares do ITU-R BS.1770 (sem o filtro K)
+GATE_BLOCK_MS = 400
+GATE_STEP_MS = 100
+ABSOLUTE_GATE_DBFS = -70.0
+RELATIVE_GATE_DB = -10.0
+
+FULL_SCALE = 32768.0
+POWER_FLOOR = 1e-12  # Evita log de zero no silêncio digital
+
+
+def to_dbfs(power):
+    return 10 * np.log10(np.maximum(power, POWER_FLOOR))
+
+
+def window_power(samples, window):
+    """Potência média (quadrado da amplitude) de cada janela de `window` quadros; a última pode ser parcial"""
+    power = np.square(samples).mean(axis=1) if samples.ndim == 2 else np.square(samples)
+    full = len(power) // window * window
+    windows = power[:full].reshape(-1, window).mean(axis=1)
+    if full < len(power):
+        windows = np.append(windows, power[full:].mean())
+    return windows
+
+
+def silence_bounds(samples, frame_rate, threshold_dbfs=SILENCE_THRESHOLD_DBFS, keep_ms=KEEP_SILENCE_MS):
+    """Retorna (início, fim) em quadros do trecho sem o silêncio das pontas, mantendo keep_ms de cada lado
+
+    Um trecho todo em silêncio fica reduzido a 2 * keep_ms.
+    """
+    window = max(1, frame_rate * WINDOW_MS // 1000)
+    keep = frame_rate * keep_ms // 1000
+    loud = np.flatnonzero(to_dbfs(window_power(samples, window)) > threshold_dbfs)
+    if not len(loud):
+        return 0, min(len(samples), 2 * keep)
+    return max(0, int(loud[0]) * window - keep), min(len(samples), (int(loud[-1]) + 1) * window + keep)
+
+
+def gated_loudness(samples, frame_rate):
+    """Volume do trecho em dBFS, ignorando os blocos de silêncio, ou None se for todo silêncio"""
+    step = max(1, frame_rate * GATE_STEP_MS // 1000)
+    powers = window_power(samples, step)
+    per_block = GATE_BLOCK_MS // GATE_STEP_MS
+    if len(powers) >= per_block:
+        # Blocos de 400 ms com 75% de sobreposição, a partir das janelas de 100 ms
+        blocks = np.convolve(powers, np.full(per_block, 1 / per_block), mode='valid')
+    else:
+        blocks = np.array([powers.mean()]) if len(powers) else powers
+    blocks = blocks[to_dbfs(blocks) > ABSOLUTE_GATE_DBFS]
+    if not len(blocks):
+        return None
+    blocks = blocks[to_dbfs(blocks) > to_dbfs(blocks.mean()) + RELATIVE_GATE_DB]
+    return float(to_dbfs(blocks.mean()))
+
+
+def normalization_gain_db(samples, frame_rate, target_dbfs=TARGET_LOUDNESS_DBFS):
+    """Ganho que leva o trecho ao volume alvo, limitado pelo pico e por MAX_GAIN_DB"""
+    loudness = gated_loudness(samples, frame_rate)
+    if loudness is None:
+        return 0.0
+    peak = float(np.abs(samples).max())
+    headroom = PEAK_CEILING_DBFS - 20 * np.log10(max(peak, 1e-6))
+    return float(min(target_dbfs - loudness, MAX_GAIN_DB, headroom))
+
+
+def process_pcm(pcm, channels, frame_rate, target_dbfs=TARGET_LOUDNESS_DBFS,
+                threshold_dbfs=SILENCE_THRESHOLD_DBFS, keep_ms=KEEP_SILENCE_MS):
+    """Corta o silêncio das pontas e normaliza o volume de um trecho PCM s16le
+
+    Tudo é feito com operações vetorizadas sobre o trecho, numa só passada
+    e com memória proporcional ao trecho (não ao documento). Retorna o PCM
+    processado e o número de quadros removidos. target_dbfs=None só corta.
+    """
+    samples = np.frombuffer(pcm, dtype='<i2').reshape(-1, channels)
+    scaled = samples.astype(np.float32) / FULL_SCALE
+    start, end = silence_bounds(scaled, frame_rate, threshold_dbfs, keep_ms)
+    scaled = scaled[start:end]
+    if target_dbfs is not None and len(scaled):
+        scaled *= np.float32(10 ** (normalization_gain_db(scaled, frame_rate, target_dbfs) / 20))
+    out = np.clip(np.rint(scaled * FULL_SCALE), -FULL_SCALE, FULL_SCALE - 1).astype('<i2')
+    return out.tobytes(), len(samples) - len(out)
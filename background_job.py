@@ -0,0 +1,90 @@
+import time
+import queue
+import threading
+
+
+class ProgressMeter:
+    """Calcula a vazão e o tempo restante a partir dos trechos concluídos"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.done = 0
+        self.total = None
+
+    def update(self, done, total=None):
+        self.done = done
+        self.total = total
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        """Trechos por segundo desde o início"""
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def remaining(self):
+        """Segundos estimados até o fim, ou None enquanto não houver como estimar"""
+        rate = self.rate
+        if self.total is None or not rate:
+            return None
+        return max(0, self.total - self.done) / rate
+
+
+class BackgroundJob:
+    """Executa uma tarefa numa thread e entrega o andamento por uma fila segura entre threads
+
+    A tarefa recebe os argumentos progress (callback de andamento) e cancel
+    (threading.Event). A interface lê os eventos com poll(), ex.: num
+    callback root.after, e nunca é tocada pela thread da tarefa. Os eventos
+    são ('progress', feitos, total), ('done', resultado), ('cancelled', None)
+    e ('error', exceção).
+    """
+
+    def __init__(self, target, *args, cancelled_errors=(), **kwargs):
+        self.cancel_event = threading.Event()
+        self.events = queue.Queue()
+        self.meter = ProgressMeter()
+        self._cancelled_errors = cancelled_errors
+        self._thread = threading.Thread(target=self._run, args=(target, args, kwargs), daemon=True)
+
+    def _run(self, target, args, kwargs):
+        try:
+            result = target(*args, progress=self._progress, cancel=self.cancel_event, **kwargs)
+        except self._cancelled_errors:
+            self.events.put(('cancelled', None))
+        except Exception as e:
+            self.events.put(('error', e))
+        else:
+            self.events.put(('done', result))
+
+    def _progress(self, done, total=None):
+        self.events.put(('progress', done, total))
+
+    def start(self):
+        self.meter = ProgressMeter()
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Pede o cancelamento; a tarefa para na próxima verificação"""
+        self.cancel_event.set()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def poll(self):
+        """Retorna os eventos pendentes, atualizando o medidor de progresso"""
+        events = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return events
+            if event[0] == 'progress':
+                self.meter.update(event[1], event[2])
+            events.append(event)
@@ -0,0 +1,147 @@
+import os
+import re
+import json
+import threading
+from functools import lru_cache
+
+
+# Matchers já compilados neste processo, por diretório e assinatura dos arquivos de bags
+_process_matchers = {}
+_process_lock = threading.Lock()
+
+
+@lru_cache(maxsize=16)
+def _compile(pattern):
+    """Compila a expressão uma vez por processo (o cache do módulo re é limitado e compartilhado)"""
+    return re.compile(pattern)
+
+
+def _trie_pattern(node):
+    """Monta a expressão regular de um nó da trie, preferindo sempre a chave mais longa"""
+    alternatives = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not alternatives:
+        return ''
+    if len(alternatives) == 1 and '' not in node:
+        return alternatives[0]
+    group = '(?:' + '|'.join(alternatives) + ')'
+    return group + '?' if '' in node else group
+
+
+def compile_bag_pattern(keys):
+    """Compila todas as chaves numa única expressão regular em forma de trie
+
+    A trie faz com que, em cada posição do texto, só os prefixos possíveis
+    sejam testados, e o quantificador guloso garante que "II" seja preferido
+    a "I" e "XX" a "X", independentemente da ordem das bags.
+    """
+    trie = {}
+    for key in keys:
+        if not key:
+            continue
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[''] = True
+    if not trie:
+        return None
+    return _compile(r'\b' + _trie_pattern(trie) + r'\b')
+
+
+def load_bag_files(bags_dir):
+    """Lê os arquivos de bags do diretório e retorna o dicionário de substituições"""
+    bags = {}
+    for filename in sorted(os.listdir(bags_dir)):
+        filepath = os.path.join(bags_dir, filename)
+        with open(filepath, 'r', encoding='utf-8') as file:
+            for line in file:
+                if '=' in line:
+                    key, value = line.strip().split('=', 1)
+                    bags[key.strip()] = value.strip()
+    return bags
+
+
+def bag_signature(bags_dir):
+    """Retorna nome, tamanho e data de modificação de cada arquivo de bags"""
+    signature = []
+    for entry in sorted(os.scandir(bags_dir), key=lambda entry: entry.name):
+        stat = entry.stat()
+        signature.append([entry.name, stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+class BagMatcher:
+    """Substituidor de passada única para um conjunto de bags de palavras"""
+
+    def __init__(self, bags, pattern=None):
+        self.bags = dict(bags)
+        if pattern is None:
+            self.pattern = compile_bag_pattern(self.bags)
+        else:
+            self.pattern = _compile(pattern) if pattern else None
+
+    def apply(self, text):
+        """Aplica todas as substituições numa única varredura do texto"""
+        if self.pattern is None:
+            return text
+        bags = self.bags
+        return self.pattern.sub(lambda match: bags[match.group(0)], text)
+
+
+class BagCache:
+    """Cache das bags compiladas, em memória e em disco, invalidado pela assinatura dos arquivos
+
+    Enquanto nenhum arquivo do diretório de bags for criado, removido ou
+    alterado (tamanho ou data de modificação), o BagMatcher é reaproveitado
+    da memória do processo, compartilhada entre instâncias do cache. Uma
+    expressão compilada não pode ser gravada em disco, então o arquivo de
+    cache evita reler as bags e remontar a trie em um processo novo, mas a
+    compilação com re acontece uma vez por processo.
+    """
+
+    def __init__(self, bags_dir, cache_path):
+        self.bags_dir = bags_dir
+        self.cache_path = cache_path
+        self._signature = None
+        self._matcher = None
+        self._lock = threading.Lock()
+
+    def matcher(self):
+        """Retorna o BagMatcher das bags atuais, recompilando só se os arquivos mudaram"""
+        signature = bag_signature(self.bags_dir)
+        with self._lock:
+            if signature == self._signature:
+                return self._matcher
+            key = (os.path.abspath(self.bags_dir), json.dumps(signature))
+            with _process_lock:
+                matcher = _process_matchers.get(key)
+            if matcher is None:
+                matcher = self._load(signature)
+                if matcher is None:
+                    matcher = BagMatcher(load_bag_files(self.bags_dir))
+                    self._save(signature, matcher)
+                with _process_lock:
+                    matcher = _process_matchers.setdefault(key, matcher)
+            self._signature = signature
+            self._matcher = matcher
+            return matcher
+
+    def _load(self, signature):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        if data.get('signature') != signature:
+            return None
+        return BagMatcher(data['bags'], data['pattern'])
+
+    def _save(self, signature, matcher):
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({
+                'signature': signature,
+                'bags': matcher.bags,
+                'pattern': matcher.pattern.pattern if matcher.pattern else '',
+            }, file, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
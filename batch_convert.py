@@ -0,0 +1,176 @@
+"""Converte em lote documentos .docx, .pdf e .txt em MP3, sem interface gráfica
+
+Uso: python batch_convert.py ENTRADA [ENTRADA ...] -o SAIDA [-j 2] [--tts-workers 4] [--force]
+     [--trace trace.json] [--metrics metricas.prom] [--profile perfil.prof]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from converter import (BAGS_DIR, TTS_ENGINE, TTS_WORKERS, ASSEMBLY_MODE, SUPPORTED_EXTENSIONS, get_bag_matcher,
+                       get_chunk_cache, convert_document)
+from highlight_index import index_path
+from incremental import manifest_path, load_manifest, manifest_matches
+from synthesis import engine_signature
+from tts_engines import ENGINES, create_engine
+from assembly import ASSEMBLERS
+from metrics import METRICS, profiled
+
+DEFAULT_JOBS = 2  # Documentos convertidos ao mesmo tempo
+
+
+def find_documents(inputs, recursive=False):
+    """Lista os documentos suportados nos arquivos e diretórios indicados, com o subdiretório relativo"""
+    documents = []
+    for path in inputs:
+        if os.path.isfile(path):
+            documents.append((path, ''))
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            if not recursive:
+                dirnames[:] = []
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() in SUPPORTED_EXTENSIONS:
+                    subdir = os.path.relpath(dirpath, path)
+                    documents.append((os.path.join(dirpath, filename), '' if subdir == '.' else subdir))
+    return documents
+
+
+def find_collisions(documents):
+    """Documentos cujos arquivos de saída (<nome>.mp3, índice e manifesto) coincidiriam com os de outro
+
+    Ex.: lei.docx e lei.txt no mesmo diretório. Retorna {documento: documentos em conflito}.
+    """
+    groups = {}
+    for source, subdir in documents:
+        stem = os.path.splitext(os.path.basename(source))[0]
+        groups.setdefault((os.path.normcase(subdir), os.path.normcase(stem)), []).append(source)
+    return {source: [other for other in group if other != source]
+            for group in groups.values() if len(group) > 1 for source in group}
+
+
+def is_up_to_date(source, output_dir, synthesize, assembly):
+    """Indica se o MP3 e o índice já existem e são mais novos que o documento e as bags
+
+    O manifesto também precisa registrar o mesmo motor, voz e modo de montagem;
+    senão o áudio é de outra configuração e o documento é convertido de novo.
+    """
+    base_filename = os.path.splitext(os.path.basename(source))[0]
+    outputs = [os.path.join(output_dir, f"{base_filename}.mp3"), index_path(output_dir, f"{base_filename}.mp3")]
+    if not all(os.path.exists(output) for output in outputs):
+        return False
+    if not manifest_matches(load_manifest(manifest_path(output_dir, base_filename)), assembly,
+                            engine_signature(synthesize)):
+        return False
+    inputs = [source] + [os.path.join(BAGS_DIR, name) for name in os.listdir(BAGS_DIR)]
+    return min(os.path.getmtime(output) for output in outputs) >= max(os.path.getmtime(path) for path in inputs)
+
+
+def convert_one(source, output_dir, args, synthesize, bags):
+    """Converte um documento e retorna o registro do resumo, sem propagar erros"""
+    os.makedirs(output_dir, exist_ok=True)
+    if not args.force and is_up_to_date(source, output_dir, synthesize, args.assembly):
+        return {'source': source, 'status': 'skipped'}
+    try:
+        result = convert_document(source, output_dir, synthesize, args.tts_workers, None, args.assembly,
+                                  bags)
+    except Exception as e:
+        return {'source': source, 'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+    return dict(result, status='converted')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help="arquivos ou diretórios de documentos")
+    parser.add_argument('-o', '--output-dir', required=True, help="diretório dos MP3 e índices gerados")
+    parser.add_argument('-r', '--recursive', action='store_true', help="percorre os subdiretórios")
+    parser.add_argument('-j', '--jobs', type=int, default=DEFAULT_JOBS, help="documentos convertidos em paralelo")
+    parser.add_argument('--tts-workers', type=int, default=TTS_WORKERS,
+                        help="trechos sintetizados em paralelo por documento")
+    parser.add_argument('--assembly', choices=sorted(ASSEMBLERS), default=ASSEMBLY_MODE,
+                        help="'normalize' corta o silêncio e iguala o volume de cada trecho (requer NumPy e ffmpeg)")
+    parser.add_argument('--engine', choices=sorted(ENGINES), default=TTS_ENGINE,
+                        help="motor de síntese ('stub' gera silêncio localmente, para testes)")
+    parser.add_argument('--tts-rate', type=float,
+                        help="limite de requisições por segundo do motor 'gtts-async'")
+    parser.add_argument('--tts-url', help="URL base do serviço do motor 'gtts-async' (ex.: servidor substituto local)")
+    parser.add_argument('--force', action='store_true', help="converte mesmo os documentos já atualizados")
+    parser.add_argument('--summary', help="grava o resumo em JSON neste arquivo em vez da saída padrão")
+    parser.add_argument('--trace', help="grava os intervalos de cada etapa neste arquivo (formato de trace do Chrome)")
+    parser.add_argument('--metrics', help="grava as métricas neste arquivo, no formato de texto do Prometheus")
+    parser.add_argument('--profile', help="executa sob o cProfile e grava as estatísticas neste arquivo "
+                                          "(os documentos são convertidos um por vez, na thread principal)")
+    args = parser.parse_args(argv)
+    if args.trace:
+        METRICS.start_tracing()
+    if args.profile:
+        with profiled(args.profile):
+            return convert_all(args)
+    return convert_all(args)
+
+
+def convert_all(args):
+    """Converte os documentos indicados nos argumentos e grava o resumo, o trace e as métricas pedidos"""
+    options = {'rate': args.tts_rate, 'base_url': args.tts_url} if args.engine == 'gtts-async' else {}
+    synthesize = create_engine(args.engine, **options)
+    bags = get_bag_matcher()
+    documents = find_documents(args.inputs, args.recursive)
+    collisions = find_collisions(documents)
+
+    def convert(source, subdir):
+        if source in collisions:
+            # Nenhum dos dois é convertido: um sobrescreveria o áudio e o índice do outro
+            return {'source': source, 'status': 'failed',
+                    'error': f"Mesmo nome de saída que {', '.join(collisions[source])}"}
+        return convert_one(source, os.path.join(args.output_dir, subdir), args, synthesize, bags)
+
+    start_time = time.perf_counter()
+    results = []
+    if args.profile:
+        # O cProfile só enxerga a thread em que foi ligado
+        for source, subdir in documents:
+            result = convert(source, subdir)
+            results.append(result)
+            print(f"[{result['status']}] {result['source']}", file=sys.stderr)
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+            futures = [executor.submit(convert, source, subdir) for source, subdir in documents]
+            for future in futures:
+                result = future.result()
+                results.append(result)
+                print(f"[{result['status']}] {result['source']}", file=sys.stderr)
+    elapsed = time.perf_counter() - start_time
+
+    converted = [result for result in results if result['status'] == 'converted']
+    audio_seconds = sum(result['audio_seconds'] for result in converted)
+    summary = {
+        'documents': results,
+        'converted': len(converted),
+        'skipped': sum(1 for result in results if result['status'] == 'skipped'),
+        'failed': sum(1 for result in results if result['status'] == 'failed'),
+        'elapsed_seconds': round(elapsed, 3),
+        'characters': sum(result['characters'] for result in converted),
+        'audio_seconds': round(audio_seconds, 3),
+        'audio_seconds_per_second': round(audio_seconds / elapsed, 2) if elapsed else None,
+        'engine': synthesize.latency_stats(),
+        'cache': get_chunk_cache().stats(),
+        'metrics': METRICS.snapshot(),
+    }
+    if args.trace:
+        METRICS.save_trace(args.trace)
+    if args.metrics:
+        METRICS.save_prometheus(args.metrics)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as file:
+            json.dump(summary, file, ensure_ascii=False, indent=2)
+    else:
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
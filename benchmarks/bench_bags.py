@@ -0,0 +1,78 @@
+"""Mede a substituição das bags de palavras em função do número de chaves e do tamanho do texto
+
+Uso: python benchmarks/bench_bags.py [--sizes-mb 0.1 1 4] [--entries 100 1000 10000]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bags import BagMatcher  # noqa: E402
+
+BASELINE_LIMIT = 2e8  # Só roda o método antigo quando chaves x caracteres ficam abaixo deste valor
+
+
+def apply_bags_baseline(text, bags):
+    """Método antigo: um re.sub por chave sobre o texto inteiro"""
+    for key, value in bags.items():
+        text = re.sub(r'\b' + re.escape(key) + r'\b', value, text)
+    return text
+
+
+def make_bags(entries, rng):
+    """Gera bags sintéticas com chaves de 2 a 12 letras"""
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    bags = {}
+    while len(bags) < entries:
+        key = ''.join(rng.choice(letters) for _ in range(rng.randint(2, 12)))
+        bags[key] = key.upper()
+    return bags
+
+
+def make_text(size, keys, rng):
+    """Gera um texto com cerca de 10% das palavras presentes nas bags"""
+    words = []
+    length = 0
+    vocabulary = ['lei', 'artigo', 'inciso', 'ensino', 'educação', 'parágrafo', 'federal', 'disposto']
+    while length < size:
+        word = rng.choice(keys) if rng.random() < 0.1 else rng.choice(vocabulary)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes-mb', type=float, nargs='+', default=[0.1, 1, 4])
+    parser.add_argument('--entries', type=int, nargs='+', default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'chaves':>7} {'texto MB':>9} {'compilar s':>11} {'aplicar s':>10} {'MB/s':>8} {'antigo s':>9}")
+    for entries in args.entries:
+        bags = make_bags(entries, rng)
+        keys = list(bags)
+        matcher, compile_time = timed(BagMatcher, bags)
+        for size_mb in args.sizes_mb:
+            text = make_text(int(size_mb * 1024 * 1024), keys, rng)
+            result, apply_time = timed(matcher.apply, text)
+            baseline = '-'
+            if entries * len(text) <= BASELINE_LIMIT:
+                expected, baseline_time = timed(apply_bags_baseline, text, bags)
+                assert expected == result
+                baseline = f"{baseline_time:.3f}"
+            print(f"{entries:>7} {size_mb:>9} {compile_time:>11.3f} {apply_time:>10.3f} "
+                  f"{len(text) / 1048576 / apply_time:>8.1f} {baseline:>9}")
+
+
+if __name__ == '__main__':
+    main()
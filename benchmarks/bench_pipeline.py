@@ -0,0 +1,377 @@
+"""Mede cada etapa do pipeline texto -> áudio em função do tamanho da entrada
+
+Uso: python benchmarks/bench_pipeline.py [--sizes-kb 1 10 100 1024 10240 51200] [--stages ...]
+                                         [--json resultado.json] [--compare anterior.json] [--quick]
+
+Cada medição roda num processo novo, para que o pico de memória (RSS) seja
+o da etapa e não o das anteriores. As entradas sintéticas (texto, .docx e
+.pdf gerados com o tamanho pedido) não entram no tempo; os documentos e MP3
+de project_files também são medidos como entradas reais. O resultado traz
+vazão, pico de RSS e o expoente de escala de cada etapa (1.0 = linear), e
+com --compare as etapas mais lentas que a execução anterior são apontadas.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import zipfile
+import argparse
+import platform
+import tempfile
+import subprocess
+from xml.sax.saxutils import escape
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_SIZES_KB = [1, 10, 100, 1024, 10 * 1024, 50 * 1024]
+QUICK_SIZES_KB = [1, 10, 100, 1024]
+# Maior entrada, em KB de texto, das etapas mais lentas por natureza
+STAGE_LIMITS_KB = {'pdf_to_text': 5 * 1024, 'synthesize': 2 * 1024, 'assembly': 2 * 1024}
+SCALING_MIN_BYTES = 100 * 1024  # Abaixo disso o tempo fixo domina e distorce o expoente
+REGRESSION_TOLERANCE = 1.2
+RESULTS_VERSION = 1
+
+VOCABULARY = ['lei', 'artigo', 'inciso', 'ensino', 'educação', 'parágrafo', 'federal', 'disposto', 'união',
+              'município', 'será', 'público', 'nacional', 'diretrizes', 'bases', 'I-', 'II-', 'III-']
+
+
+def make_text(size, seed=42):
+    """Texto sintético parecido com legislação: frases, parágrafos e referências a artigos"""
+    rng = random.Random(seed)
+    paragraphs = []
+    length = 0
+    while length < size:
+        sentences = []
+        for _ in range(rng.randint(1, 4)):
+            words = [rng.choice(VOCABULARY) for _ in range(rng.randint(6, 24))]
+            if rng.random() < 0.3:
+                words.insert(rng.randrange(len(words)), f"Art. {rng.randint(1, 99)}")
+            sentences.append(' '.join(words).capitalize() + '.')
+        paragraph = ' '.join(sentences)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 1
+    return '\n'.join(paragraphs)[:size]
+
+
+def write_docx(path, text):
+    """Grava um .docx mínimo, com um parágrafo por linha do texto"""
+    body = ''.join(f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>'
+                   for line in text.split('\n'))
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml',
+                         '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/'
+                         'package/2006/content-types"><Default Extension="rels" ContentType="application/'
+                         'vnd.openxmlformats-package.relationships+xml"/><Default Extension="xml" ContentType='
+                         '"application/xml"/><Override PartName="/word/document.xml" ContentType="application/'
+                         'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>')
+        archive.writestr('_rels/.rels',
+                         '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.'
+                         'openxmlformats.org/package/2006/relationships"><Relationship Id="rId1" Type="http://'
+                         'schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+                         'Target="word/document.xml"/></Relationships>')
+        archive.writestr('word/document.xml',
+                         '<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="http://schemas.'
+                         'openxmlformats.org/wordprocessingml/2006/main"><w:body>' + body + '</w:body></w:document>')
+
+
+def write_pdf(path, text, line_chars=90, page_lines=60):
+    """Grava um PDF simples com o texto em Helvetica (WinAnsi), page_lines linhas por página"""
+    lines = []
+    for paragraph in text.split('\n'):
+        lines.extend(paragraph[i:i + line_chars] for i in range(0, max(1, len(paragraph)), line_chars))
+    pages = [lines[i:i + page_lines] for i in range(0, len(lines), page_lines)] or [[]]
+
+    def pdf_string(line):
+        data = line.encode('cp1252', 'replace')
+        return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>']
+    kids = []
+    for page in pages:
+        stream = b'BT /F1 9 Tf 40 800 Td 12 TL\n' + b''.join(pdf_string(line) + b" Tj T*\n" for line in page) + b'ET'
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R '
+                       b'>> >> /Contents %d 0 R >>' % len(objects))
+        kids.append(b'%d 0 R' % len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [' + b' '.join(kids) + b'] /Count %d >>' % len(pages)
+
+    with open(path, 'wb') as file:
+        file.write(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(file.tell())
+            file.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+        xref = file.tell()
+        file.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+        file.write(b''.join(b'%010d 00000 n \n' % offset for offset in offsets))
+        file.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+
+
+# Etapas: prepare(tamanho, diretório) monta a entrada fora da medição; run(entrada) retorna o
+# volume processado em bytes (para a vazão)
+
+def _prepare_docx(size, workdir):
+    path = os.path.join(workdir, 'input.docx')
+    write_docx(path, make_text(size))
+    return path
+
+
+def _prepare_pdf(size, workdir):
+    path = os.path.join(workdir, 'input.pdf')
+    write_pdf(path, make_text(size))
+    return path
+
+
+def _prepare_text(size, workdir):
+    return make_text(size)
+
+
+def _prepare_chunks(size, workdir):
+    from chunker import split_text
+    return split_text(make_text(size))
+
+
+def _prepare_audio(size, workdir):
+    from tts_engines import StubEngine
+    engine = StubEngine(latency=0, frames_per_char=1)
+    return [engine(part) for part in _prepare_chunks(size, workdir)], workdir
+
+
+def _run_docx(path):
+    from readers import docx_to_text
+    return len(docx_to_text(path).encode('utf-8'))
+
+
+def _run_pdf(path):
+    from readers import pdf_to_text
+    return len(pdf_to_text(path).encode('utf-8'))
+
+
+def _run_abbreviations(text):
+    from converter import replace_abbreviations
+    replace_abbreviations(text)
+    return len(text.encode('utf-8'))
+
+
+def _run_bags(text):
+    from converter import load_bags, apply_bags
+    apply_bags(text, load_bags())
+    return len(text.encode('utf-8'))
+
+
+def _run_split(text):
+    from chunker import split_text
+    split_text(text)
+    return len(text.encode('utf-8'))
+
+
+def _run_synthesize(parts):
+    from synthesis import synthesize_chunks
+    from tts_engines import StubEngine
+    engine = StubEngine(latency=0, frames_per_char=1)
+    for _ in synthesize_chunks(parts, engine, workers=4):
+        pass
+    return sum(len(part.encode('utf-8')) for part in parts)
+
+
+def _run_assembly(prepared):
+    from assembly import FrameAssembler
+    chunks, workdir = prepared
+    assembler = FrameAssembler(os.path.join(workdir, 'output.mp3'))
+    for data in chunks:
+        assembler.add(data)
+    assembler.close()
+    return os.path.getsize(os.path.join(workdir, 'output.mp3'))
+
+
+STAGES = {
+    'docx_to_text': (_prepare_docx, _run_docx),
+    'pdf_to_text': (_prepare_pdf, _run_pdf),
+    'replace_abbreviations': (_prepare_text, _run_abbreviations),
+    'apply_bags': (_prepare_text, _run_bags),
+    'split_text': (_prepare_text, _run_split),
+    'synthesize': (_prepare_chunks, _run_synthesize),
+    'assembly': (_prepare_audio, _run_assembly),
+}
+REAL_STAGES = {'.docx': 'docx_to_text', '.pdf': 'pdf_to_text', '.txt': 'split_text'}
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo até agora, em MB"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(stage, size=None, path=None):
+    """Executado no processo filho: prepara a entrada, mede a etapa e retorna o registro"""
+    prepare, run = STAGES[stage]
+    # Importa o pipeline antes de medir, para que o tempo de import não conte na etapa
+    import readers, chunker, converter, synthesis, assembly  # noqa: F401,E401
+    with tempfile.TemporaryDirectory() as workdir:
+        if path is None:
+            prepared = prepare(size, workdir)
+        elif path.endswith('.mp3'):
+            with open(path, 'rb') as file:
+                prepared = [file.read()], workdir
+        else:
+            prepared = path
+            if path.endswith('.txt'):
+                with open(path, 'r', encoding='utf-8') as file:
+                    prepared = file.read()
+        before_mb = peak_rss_mb()
+        start = time.perf_counter()
+        processed = run(prepared)
+        seconds = time.perf_counter() - start
+        peak_mb = peak_rss_mb()
+    return {
+        'stage': stage,
+        'input': os.path.relpath(path, ROOT) if path else 'synthetic',
+        'size_bytes': size if path is None else os.path.getsize(path),
+        'processed_bytes': processed,
+        'seconds': round(seconds, 6),
+        'throughput_mb_s': round(processed / 1048576 / seconds, 3) if seconds else None,
+        'peak_rss_mb': round(peak_mb, 1),
+        'rss_growth_mb': round(peak_mb - before_mb, 1),
+    }
+
+
+def run_child(stage, size=None, path=None, repeat=1):
+    """Mede num processo novo, repetindo e ficando com a execução mais rápida"""
+    args = [sys.executable, os.path.abspath(__file__), '--child', stage]
+    args += ['--child-path', path] if path else ['--child-size', str(size)]
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(args, capture_output=True, text=True, cwd=ROOT)
+        if result.returncode != 0:
+            return {'stage': stage, 'size_bytes': size, 'input': path or 'synthetic',
+                    'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'falhou'}
+        runs.append(json.loads(result.stdout))
+    return min(runs, key=lambda run: run['seconds'])
+
+
+def scaling_exponent(points):
+    """Inclinação de log(tempo) x log(tamanho) por mínimos quadrados (1.0 = linear)"""
+    points = [(math.log(size), math.log(seconds)) for size, seconds in points
+              if size >= SCALING_MIN_BYTES and seconds > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if not variance:
+        return None
+    return round(sum((x - mean_x) * (y - mean_y) for x, y in points) / variance, 3)
+
+
+def real_inputs():
+    """Documentos e MP3 de project_files usados como entradas reais"""
+    project_dir = os.path.join(ROOT, 'project_files')
+    inputs = []
+    for name in sorted(os.listdir(project_dir)) if os.path.isdir(project_dir) else []:
+        path = os.path.join(project_dir, name)
+        ext = os.path.splitext(name)[1].lower()
+        if ext in REAL_STAGES:
+            inputs.append((REAL_STAGES[ext], path))
+        elif ext == '.mp3':
+            inputs.append(('assembly', path))
+    return inputs
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous, tolerance):
+    """Compara os tempos com uma execução anterior e retorna as regressões"""
+    old = {(r['stage'], r['input'], r['size_bytes']): r for r in previous['results'] if 'seconds' in r}
+    regressions = []
+    for result in results:
+        before = old.get((result['stage'], result['input'], result['size_bytes']))
+        if before is None or 'seconds' not in result or not before['seconds']:
+            continue
+        ratio = result['seconds'] / before['seconds']
+        result['vs_previous'] = round(ratio, 3)
+        if ratio > tolerance:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes-kb', type=int, nargs='+')
+    parser.add_argument('--quick', action='store_true', help=f"tamanhos até {QUICK_SIZES_KB[-1]} KB")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--no-real', action='store_true', help="não mede os arquivos de project_files")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--json', help="grava os resultados neste arquivo")
+    parser.add_argument('--compare', help="resultado anterior (JSON) para apontar regressões")
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE,
+                        help="razão de tempo acima da qual uma medição conta como regressão")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--child-size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--child-path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        json.dump(measure(args.child, args.child_size, args.child_path), sys.stdout)
+        return 0
+
+    sizes = [kb * 1024 for kb in (args.sizes_kb or (QUICK_SIZES_KB if args.quick else DEFAULT_SIZES_KB))]
+    results = []
+    print(f"{'etapa':<22} {'entrada':<28} {'KB':>9} {'s':>9} {'MB/s':>8} {'pico MB':>8}")
+    jobs = [(stage, size, None) for stage in args.stages for size in sizes
+            if size <= STAGE_LIMITS_KB.get(stage, math.inf) * 1024]
+    if not args.no_real:
+        jobs += [(stage, None, path) for stage, path in real_inputs() if stage in args.stages]
+    for stage, size, path in jobs:
+        result = run_child(stage, size, path, args.repeat)
+        results.append(result)
+        label = os.path.basename(path) if path else 'sintético'
+        if 'error' in result:
+            print(f"{stage:<22} {label[:28]:<28} {'':>9} erro: {result['error']}")
+            continue
+        print(f"{stage:<22} {label[:28]:<28} {result['size_bytes'] / 1024:>9.0f} {result['seconds']:>9.4f} "
+              f"{result['throughput_mb_s'] or 0:>8.1f} {result['peak_rss_mb']:>8.1f}")
+
+    scaling = {}
+    for stage in args.stages:
+        points = [(r['size_bytes'], r['seconds']) for r in results
+                  if r['stage'] == stage and r.get('input') == 'synthetic' and 'seconds' in r]
+        scaling[stage] = scaling_exponent(points)
+    print("\nExpoente de escala (1.0 = linear): " +
+          ', '.join(f"{stage} {exponent}" for stage, exponent in scaling.items() if exponent is not None))
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for result in regressions:
+            print(f"REGRESSÃO {result['stage']} {result['input']} {result['size_bytes']} bytes: "
+                  f"{result['vs_previous']}x mais lento", file=sys.stderr)
+        exit_code = 1 if regressions else 0
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({
+                'version': RESULTS_VERSION,
+                'revision': git_revision(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'results': results,
+                'scaling': scaling,
+            }, file, ensure_ascii=False, indent=2)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
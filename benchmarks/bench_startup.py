@@ -0,0 +1,69 @@
+"""Mede o tempo de importação dos módulos de entrada e confere o orçamento de inicialização
+
+Uso: python benchmarks/bench_startup.py [--repeat 5] [--json resultado.json]
+
+Cada módulo é importado num processo novo com "python -X importtime"; o
+tempo considerado é a mediana do tempo cumulativo do módulo. O script também
+confere que nenhum backend pesado é importado junto, e termina com código 1
+se algum orçamento for ultrapassado.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamento de importação em milissegundos, por módulo
+BUDGETS_MS = {
+    'converter': 40,
+    'batch_convert': 50,
+    'app_v9': 80,
+}
+# Backends que só devem ser importados quando realmente usados
+HEAVY_MODULES = ['gtts', 'pydub', 'pygame', 'docx', 'PyPDF2', 'numpy']
+
+
+def import_time_ms(module):
+    """Importa o módulo num processo novo e retorna o tempo cumulativo e os backends pesados carregados"""
+    code = (f"import sys, json, {module}; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    cumulative = None
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        if name.strip() == module:
+            cumulative = int(cumulative_us)
+    return cumulative / 1000, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    results = {}
+    over_budget = False
+    for module, budget in BUDGETS_MS.items():
+        runs = [import_time_ms(module) for _ in range(args.repeat)]
+        median = statistics.median(ms for ms, _ in runs)
+        heavy = runs[-1][1]
+        ok = median <= budget and not heavy
+        over_budget |= not ok
+        results[module] = {'median_ms': round(median, 1), 'budget_ms': budget, 'heavy_imports': heavy, 'ok': ok}
+        print(f"{module:<15} {median:8.1f} ms  (orçamento {budget} ms)  "
+              f"{'ok' if ok else 'ESTOUROU'}{'  pesados: ' + ', '.join(heavy) if heavy else ''}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
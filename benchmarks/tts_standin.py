@@ -0,0 +1,161 @@
+"""Servidor local que imita o endpoint de TTS usado pelo gTTS, com latência e respostas 429
+
+Uso:
+  python benchmarks/tts_standin.py [--port 8765] [--latency 0.3] [--max-rate 8]
+  python benchmarks/tts_standin.py --bench DOCUMENTO [--rate 6] [--workers 4]
+
+No primeiro modo o servidor fica no ar; aponte o motor 'gtts-async' para ele
+com "batch_convert.py --engine gtts-async --tts-url http://127.0.0.1:8765".
+Com --bench, o servidor sobe numa porta livre, o documento é convertido pelo
+pipeline assíncrono e o resultado (requisições, conexões abertas, 429s,
+vazão) é impresso em JSON.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from base64 import b64encode
+from urllib.parse import unquote_plus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tts_engines import SILENT_FRAME  # noqa: E402
+
+FRAMES_PER_CHAR = 3
+
+
+class StandinState:
+    """Configuração e contadores do servidor, compartilhados entre as threads"""
+
+    def __init__(self, latency=0.3, jitter=0.1, max_rate=8.0, error_rate=0.0, retry_after=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.max_rate = max_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.window = []  # Instantes das requisições aceitas no último segundo
+        self.counters = {'requests': 0, 'throttled': 0, 'connections': 0, 'characters': 0}
+
+    def admit(self):
+        """Decide se a requisição é atendida ou recebe 429, como um limite por segundo"""
+        now = time.monotonic()
+        with self.lock:
+            self.counters['requests'] += 1
+            self.window = [t for t in self.window if now - t < 1.0]
+            if (self.max_rate and len(self.window) >= self.max_rate) or random.random() < self.error_rate:
+                self.counters['throttled'] += 1
+                return False
+            self.window.append(now)
+            return True
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Mantém as conexões abertas entre requisições
+
+    def setup(self):
+        super().setup()
+        self.server.state.count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        with self.server.state.lock:
+            body = json.dumps(self.server.state.counters).encode('utf-8')
+        self._send(200, body, [('Content-Type', 'application/json')])
+
+    def do_POST(self):
+        state = self.server.state
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+        if not state.admit():
+            self._send(429, b'Too Many Requests', [('Retry-After', str(state.retry_after))])
+            return
+        # f.req=[[["jQ1olc","[\"texto\",\"pt\",null,\"null\"]",null,"generic"]]]
+        rpc = json.loads(unquote_plus(body.split('f.req=', 1)[1].rstrip('&')))
+        text = json.loads(rpc[0][0][1])[0]
+        state.count('characters', len(text))
+        time.sleep(max(0.0, random.gauss(state.latency, state.jitter)))
+        audio = b64encode(SILENT_FRAME * max(1, len(text) * FRAMES_PER_CHAR)).decode('ascii')
+        payload = json.dumps([["wrb.fr", "jQ1olc", json.dumps([audio]), None, None, None, "generic"]],
+                             separators=(',', ':'))
+        self._send(200, f")]}}'\n\n{len(payload)}\n{payload}\n".encode('utf-8'),
+                   [('Content-Type', 'application/json; charset=utf-8')])
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clientes que cancelam requisições em andamento fecham a conexão no meio da resposta
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_server(port=0, **options):
+    """Sobe o servidor numa thread e retorna (servidor, url base)"""
+    server = StandinServer(('127.0.0.1', port), StandinHandler)
+    server.state = StandinState(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def bench(document, args):
+    from converter import convert_document
+    from tts_engines import create_engine
+
+    server, url = start_server(latency=args.latency, max_rate=args.max_rate, error_rate=args.error_rate)
+    engine = create_engine('gtts-async', rate=args.rate, base_url=url)
+    with tempfile.TemporaryDirectory() as output_dir:
+        result = convert_document(document, output_dir, engine, args.workers, cache=False)
+    server.shutdown()
+    result['engine'] = engine.latency_stats()
+    result['server'] = server.state.counters
+    result['requests_per_second'] = round(server.state.counters['requests'] / result['elapsed_seconds'], 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.3, help="latência média por requisição, em segundos")
+    parser.add_argument('--max-rate', type=float, default=8.0, help="requisições por segundo antes do 429")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fração de requisições com 429 aleatório")
+    parser.add_argument('--bench', metavar='DOCUMENTO', help="converte o documento pelo servidor e sai")
+    parser.add_argument('--rate', type=float, default=6.0, help="limite do cliente em requisições por segundo")
+    parser.add_argument('--workers', type=int, default=4, help="requisições simultâneas do cliente")
+    args = parser.parse_args()
+
+    if args.bench:
+        json.dump(bench(args.bench, args), sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+    server, url = start_server(args.port, latency=args.latency, max_rate=args.max_rate, error_rate=args.error_rate)
+    print(f"Servidor substituto de TTS em {url} (Ctrl+C para sair)", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import os
+import json
+import hashlib
+import threading
+
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024  # 500 MB
+
+
+def chunk_key(text, lang='pt', engine='gtts', settings=None):
+    """Calcula a chave do cache a partir do texto, idioma, motor e configurações de voz"""
+    payload = json.dumps([text, lang, engine, settings or {}], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ChunkCache:
+    """Cache em disco dos trechos sintetizados, endereçado pelo conteúdo e com despejo LRU por tamanho"""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total_bytes = sum(entry.stat().st_size for entry in os.scandir(cache_dir)
+                               if entry.name.endswith('.mp3'))
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def get(self, key):
+        """Retorna os bytes do trecho ou None, marcando o acesso para o LRU"""
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, 'rb') as file:
+                    data = file.read()
+                os.utime(path)  # A data de modificação marca o último uso
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        """Grava um trecho no cache e despeja os mais antigos se passar do limite"""
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+        with self._lock:
+            if os.path.exists(path):
+                self.total_bytes -= os.path.getsize(path)
+            os.replace(tmp_path, path)
+            self.total_bytes += len(data)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove os trechos usados há mais tempo até voltar a 90% do limite"""
+        entries = sorted((entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.mp3')),
+                         key=lambda entry: entry.stat().st_mtime)
+        target = self.max_bytes * 0.9
+        for entry in entries:
+            if self.total_bytes <= target:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def stats(self):
+        """Retorna as estatísticas de acerto e ocupação do cache"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+        }
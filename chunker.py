@@ -0,0 +1,87 @@
+import re
+
+MAX_CHUNK_LENGTH = 500  # Limite de caracteres por trecho enviado ao motor de síntese
+
+_SENTENCE_END = re.compile(r'[.!?;:…]+["\'”’)\]]*\s')
+_NON_SPACE = re.compile(r'\S')
+
+
+def _boundary(text, start, limit):
+    """Escolhe onde cortar o trecho que começa em start sem passar de limit
+
+    A preferência é quebra de parágrafo, depois fim de frase e depois espaço,
+    sempre na segunda metade da janela para que cada trecho avance ao menos
+    meia janela e a divisão continue linear.
+    """
+    floor = start + (limit - start) // 2
+    newline = text.rfind('\n', floor, limit)
+    if newline != -1:
+        return newline + 1
+    sentence_end = -1
+    for match in _SENTENCE_END.finditer(text, floor, min(len(text), limit + 1)):
+        sentence_end = match.end()
+    if sentence_end != -1:
+        return sentence_end
+    space = text.rfind(' ', start, limit)
+    if space > start:
+        return space + 1
+    return limit
+
+
+def iter_chunk_offsets(text, max_length=MAX_CHUNK_LENGTH):
+    """Divide o texto em trechos de até max_length caracteres e gera (início, fim) de cada um
+
+    Os trechos não incluem os espaços das bordas e nenhuma cópia do restante
+    do texto é feita: cada posição é examinada um número constante de vezes.
+    """
+    length = len(text)
+    match = _NON_SPACE.search(text)
+    start = match.start() if match else length
+    while start < length:
+        limit = start + max_length
+        end = length if limit >= length else _boundary(text, start, limit)
+        chunk_end = end
+        while chunk_end > start and text[chunk_end - 1].isspace():
+            chunk_end -= 1
+        if chunk_end > start:
+            yield start, chunk_end
+        match = _NON_SPACE.search(text, end)
+        start = match.start() if match else length
+
+
+def split_text(text, max_length=MAX_CHUNK_LENGTH):
+    """Divide o texto em partes menores para evitar erros com o gTTS"""
+    return [text[start:end] for start, end in iter_chunk_offsets(text, max_length)]
+
+
+def iter_stream_chunk_offsets(paragraphs, max_length=MAX_CHUNK_LENGTH):
+    """Divide em trechos um texto que chega parágrafo a parágrafo e gera (início, fim, trecho)
+
+    As posições são relativas a '\\n'.join(paragraphs). Um trecho só é emitido
+    quando já há texto suficiente depois do seu início para que o ponto de
+    corte não mude, então a síntese pode começar antes de o documento inteiro
+    ser lido; o buffer guarda apenas o final ainda não dividido.
+    """
+    buffer = ''
+    base = 0
+    for i, paragraph in enumerate(paragraphs):
+        buffer += paragraph if i == 0 else '\n' + paragraph
+        if len(buffer) < 2 * max_length:
+            continue
+        consumed = 0
+        for start, end in iter_chunk_offsets(buffer, max_length):
+            if start + max_length >= len(buffer):
+                break
+            yield base + start, base + end, buffer[start:end]
+            consumed = end
+        buffer = buffer[consumed:]
+        base += consumed
+    for start, end in iter_chunk_offsets(buffer, max_length):
+        yield base + start, base + end, buffer[start:end]
+
+
+def iter_text_chunks(source, max_length=MAX_CHUNK_LENGTH):
+    """Gera (início, fim, trecho) de um texto completo ou de um iterável de parágrafos"""
+    if isinstance(source, str):
+        return ((start, end, source[start:end]) for start, end in iter_chunk_offsets(source, max_length))
+    return iter_stream_chunk_offsets(source, max_length)
@@ -0,0 +1,299 @@
+import os
+import re
+import time
+import threading
+from collections import deque
+from chunker import iter_text_chunks
+from readers import docx_to_text, iter_docx_paragraphs, pdf_to_text
+from bags import BagMatcher, BagCache, load_bag_files
+from synthesis import synthesize_chunks, engine_name, engine_settings, engine_signature, SynthesisCancelled
+from tts_engines import create_engine
+from chunk_cache import ChunkCache, chunk_key
+from assembly import ASSEMBLERS
+from mp3_frames import read_range
+from highlight_index import HighlightIndex, index_path
+from incremental import manifest_path, load_manifest, save_manifest, match_chunks
+from metrics import METRICS
+
+# Configurações do projeto
+PROJECT_DIR = "project_files"
+BAGS_DIR = os.path.join(PROJECT_DIR, "bags")
+CACHE_DIR = os.path.join(PROJECT_DIR, "cache")
+TTS_ENGINE = "gtts"  # Motor de síntese padrão: "gtts", "espeak-ng" ou "stub" (offline, para testes)
+TTS_WORKERS = 4  # Número máximo de trechos sintetizados ao mesmo tempo
+CACHE_MAX_BYTES = 500 * 1024 * 1024  # Limite do cache de trechos sintetizados
+# "frames" junta os MP3s sem recodificar; "reencode" normaliza e recodifica em fluxo; "normalize" também
+# corta o silêncio das pontas de cada trecho e iguala o volume pela medida com janelas (requer NumPy)
+ASSEMBLY_MODE = "frames"
+SUPPORTED_EXTENSIONS = (".docx", ".pdf", ".txt")
+
+# Caches compartilhados, criados no primeiro uso para que importar o módulo não toque no disco
+_chunk_cache = None
+_bag_cache = None
+_default_engine = None
+_caches_lock = threading.Lock()
+
+
+def ensure_project_dirs():
+    """Cria os diretórios do projeto, se ainda não existirem"""
+    os.makedirs(BAGS_DIR, exist_ok=True)
+
+
+def get_chunk_cache():
+    """Retorna o cache dos trechos já sintetizados, compartilhado entre as gerações"""
+    global _chunk_cache
+    with _caches_lock:
+        if _chunk_cache is None:
+            ensure_project_dirs()
+            _chunk_cache = ChunkCache(CACHE_DIR, CACHE_MAX_BYTES)
+        return _chunk_cache
+
+
+def get_default_engine():
+    """Retorna o motor de síntese padrão (TTS_ENGINE), que acumula as latências de todas as gerações"""
+    global _default_engine
+    with _caches_lock:
+        if _default_engine is None:
+            _default_engine = create_engine(TTS_ENGINE)
+        return _default_engine
+
+
+def get_bag_matcher():
+    """Retorna as bags compiladas, reaproveitadas enquanto os arquivos do diretório não mudarem"""
+    global _bag_cache
+    with _caches_lock:
+        if _bag_cache is None:
+            ensure_project_dirs()
+            _bag_cache = BagCache(BAGS_DIR, os.path.join(CACHE_DIR, "bags.json"))
+    return _bag_cache.matcher()
+
+
+def replace_abbreviations(text):
+    """Substitui abreviações específicas no texto"""
+    text = re.sub(r'\bArt\.?\s*(\d+)', r'Artigo \1', text)
+    return text
+
+
+def load_bags():
+    """Carrega as bags de palavras do diretório 'bags'"""
+    return load_bag_files(BAGS_DIR)
+
+
+def apply_bags(text, bags):
+    """Aplica as substituições das bags de palavras no texto numa única passada
+
+    Aceita o dicionário de load_bags() ou um BagMatcher já compilado.
+    """
+    if not isinstance(bags, BagMatcher):
+        bags = BagMatcher(bags)
+    return bags.apply(text)
+
+
+def prepare_text(text, bags=None):
+    """Aplica as abreviações e as bags de palavras, como feito ao carregar um documento"""
+    return apply_bags(replace_abbreviations(text), bags if bags is not None else get_bag_matcher())
+
+
+def read_document(filepath, progress=None):
+    """Lê um documento .docx, .pdf ou .txt e retorna seu texto bruto"""
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == ".docx":
+        return docx_to_text(filepath)
+    if ext == ".pdf":
+        return pdf_to_text(filepath, progress=progress, cache_dir=CACHE_DIR)
+    if ext == ".txt":
+        with open(filepath, 'r', encoding='utf-8') as file:
+            return file.read()
+    raise ValueError(f"Formato de arquivo não suportado: {ext}")
+
+
+def iter_document_paragraphs(filepath):
+    """Gera os parágrafos de um documento à medida que são lidos
+
+    '\\n'.join dos parágrafos reproduz o texto de read_document (a menos de
+    uma quebra de linha final nos arquivos .txt).
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == ".docx":
+        yield from iter_docx_paragraphs(filepath)
+    elif ext == ".txt":
+        with open(filepath, 'r', encoding='utf-8') as file:
+            for line in file:
+                yield line.rstrip('\n')
+    else:
+        yield read_document(filepath)
+
+
+def text_to_speech_with_highlight(text, output_filename, synthesize=None, workers=TTS_WORKERS,
+                                  cache=None, previous_manifest=None, assembly=ASSEMBLY_MODE,
+                                  output_dir=PROJECT_DIR, progress=None, cancel=None, on_chunk=None):
+    """Converte o texto em áudio, salva em um arquivo e gera o índice de destaque
+
+    O texto pode ser uma string ou um iterável de parágrafos (ex.: de
+    iter_docx_paragraphs); nesse caso a síntese começa enquanto o documento
+    ainda está sendo lido. Se houver o manifesto da geração anterior, os
+    trechos inalterados são recortados do áudio antigo e só os trechos novos ou
+    editados são sintetizados. O índice de destaque guarda a posição de cada
+    trecho no áudio, medida pela duração real dos quadros, e no texto.
+    Sem synthesize é usado o motor padrão; sem cache é usado o cache padrão e
+    cache=False desliga o cache. progress(feitos, total) é chamado a cada
+    trecho gravado (total é None quando o texto chega em fluxo), e sinalizar o
+    evento cancel interrompe a geração com SynthesisCancelled. on_chunk(dados,
+    início_ms, fim_ms, início_char, fim_char) recebe o áudio de cada trecho
+    como ele foi gravado (MP3, ou WAV nos modos que recodificam) assim que ele
+    é gravado, para tocar enquanto o restante é sintetizado.
+    Retorna o nome do índice e a lista de trechos para o novo manifesto.
+    """
+    synthesize = synthesize or get_default_engine()
+    cache = get_chunk_cache() if cache is None else (cache or None)
+    engine, settings = engine_name(synthesize), engine_settings(synthesize)
+    plan = ((start, end, part, chunk_key(part, 'pt', engine, settings), None)
+            for start, end, part in iter_text_chunks(text))
+    if isinstance(text, str):
+        plan = list(plan)  # O texto já está na memória; a lista dá o total para o progresso
+    index_filename = index_path(output_dir, output_filename)
+    output_filepath = os.path.join(output_dir, output_filename)
+
+    assembler_class = ASSEMBLERS[assembly]
+    old_filepath = None
+    if assembler_class.supports_reuse and previous_manifest and previous_manifest.get('assembly') == assembly:
+        old_filepath = os.path.join(output_dir, previous_manifest['output'])
+        if os.path.exists(old_filepath):
+            # O diff precisa da lista completa de trechos
+            old_chunks = previous_manifest['chunks']
+            plan = list(plan)
+            reuse = match_chunks([chunk['key'] for chunk in old_chunks], [item[3] for item in plan])
+            plan = [item[:4] + (old_chunks[reuse[i]] if i in reuse else None,) for i, item in enumerate(plan)]
+
+    # Trechos já entregues ao pool de síntese e ainda não gravados, na ordem do texto
+    pending = deque()
+
+    def changed_parts():
+        for item in plan:
+            pending.append(item)
+            if item[4] is None:
+                yield item[2]
+
+    assembler = assembler_class(output_filepath, old_filepath)
+    index = HighlightIndex()
+    chunks = []
+
+    total = len(plan) if isinstance(plan, list) else None
+
+    def write(item, data=None):
+        if cancel is not None and cancel.is_set():
+            raise SynthesisCancelled("Geração cancelada")
+        start, end, _, key, old_chunk = item
+        with METRICS.span('assembly'):
+            span = assembler.add(data) if old_chunk is None else assembler.reuse(old_chunk)
+        METRICS.count('chunks_total', source='synthesized' if old_chunk is None else 'reused')
+        chunks.append(dict(span, key=key))
+        index.add(span['start_ms'], span['end_ms'], start, end)
+        if on_chunk:
+            if data is None:
+                data = read_range(old_filepath, old_chunk['offset'], old_chunk['size'])
+            on_chunk(assembler.playable(data), span['start_ms'], span['end_ms'], start, end)
+        if progress:
+            progress(len(chunks), total)
+
+    results = synthesize_chunks(changed_parts(), synthesize, lang='pt', workers=workers, cache=cache, cancel=cancel)
+    try:
+        while True:
+            # O tempo parado aqui é a espera pela síntese (a leitura do texto é medida à parte)
+            with METRICS.span('synthesis_wait'):
+                result = next(results, None)
+            if result is None:
+                break
+            while pending[0][4] is not None:
+                write(pending.popleft())
+            write(pending.popleft(), result[1])
+        while pending:
+            write(pending.popleft())
+        with METRICS.span('assembly'):
+            assembler.close()  # Ex.: o ffmpeg dos modos que recodificam pode falhar só ao finalizar
+    except BaseException:
+        try:
+            results.close()
+        finally:
+            assembler.abort()  # Mesmo que encerrar a síntese falhe, o arquivo parcial é descartado
+        raise
+    METRICS.count('audio_bytes_written_total', os.path.getsize(output_filepath))
+    index.save(index_filename)
+    return index_filename, chunks
+
+
+def convert_document(filepath, output_dir=PROJECT_DIR, synthesize=None, workers=TTS_WORKERS,
+                     cache=None, assembly=ASSEMBLY_MODE, bags=None, progress=None, cancel=None,
+                     text_filename=None):
+    """Converte um documento em <nome>.mp3 e índice de destaque no diretório de saída
+
+    O documento é lido, preparado e sintetizado em fluxo, e o manifesto da
+    conversão anterior do mesmo documento é usado para sintetizar só o que
+    mudou. progress e cancel são repassados a text_to_speech_with_highlight.
+    Com text_filename, o texto preparado (cujas posições o índice usa) é
+    gravado à medida que é lido. Retorna as estatísticas da conversão, com o
+    tempo próprio de cada etapa (leitura, preparo, espera pela síntese e
+    montagem) em stage_seconds.
+    """
+    base_filename = os.path.splitext(os.path.basename(filepath))[0]
+    output_filename = f"{base_filename}.mp3"
+    synthesize = synthesize or get_default_engine()
+    bags = bags if bags is not None else get_bag_matcher()
+    characters = 0
+    os.makedirs(output_dir, exist_ok=True)
+
+    text_file = open(text_filename, 'w', encoding='utf-8', newline='') if text_filename else None
+
+    def paragraphs():
+        nonlocal characters
+        source = iter_document_paragraphs(filepath)
+        i = 0
+        while True:
+            with METRICS.span('read_document'):
+                paragraph = next(source, None)
+            if paragraph is None:
+                return
+            with METRICS.span('prepare_text'):
+                paragraph = prepare_text(paragraph, bags)
+            characters += len(paragraph) + (1 if i else 0)
+            if text_file:
+                text_file.write(f"\n{paragraph}" if i else paragraph)
+            i += 1
+            yield paragraph
+
+    start_time = time.perf_counter()
+    manifest_filename = manifest_path(output_dir, base_filename)
+    with METRICS.collect_stages() as stages, METRICS.span('convert_document', source=filepath):
+        try:
+            index_filename, chunks = text_to_speech_with_highlight(
+                paragraphs(), output_filename, synthesize, workers, cache, load_manifest(manifest_filename),
+                assembly, output_dir=output_dir, progress=progress, cancel=cancel)
+        finally:
+            if text_file:
+                text_file.close()
+        save_manifest(manifest_filename, output_filename, chunks, assembly, engine_signature(synthesize))
+    METRICS.count('conversions_total')
+    elapsed = time.perf_counter() - start_time
+    audio_seconds = chunks[-1]['end_ms'] / 1000 if chunks else 0.0
+    return {
+        'source': filepath,
+        'output': os.path.join(output_dir, output_filename),
+        'index': index_filename,
+        'characters': characters,
+        'chunks': len(chunks),
+        'audio_seconds': round(audio_seconds, 3),
+        'bytes': os.path.getsize(os.path.join(output_dir, output_filename)),
+        'elapsed_seconds': round(elapsed, 3),
+        'characters_per_second': round(characters / elapsed, 1) if elapsed else None,
+        'audio_seconds_per_second': round(audio_seconds / elapsed, 2) if elapsed else None,
+        'stage_seconds': {stage: round(seconds, 4) for stage, seconds in stages.items()},
+    }
+
+
+def text_to_docx(docx_filename, text):
+    """Salva um texto em um arquivo .docx"""
+    from docx import Document
+    doc = Document()
+    for line in text.split('\n'):
+        doc.add_paragraph(line)
+    doc.save(docx_filename)
@@ -0,0 +1,120 @@
+import os
+import json
+from bisect import bisect_right
+
+INDEX_VERSION = 1
+TIMELINE_VERSION = 1
+TEXT_BLOCK_CHARS = 1024 * 1024  # Caracteres lidos por vez ao medir o texto em bytes
+
+
+def index_path(project_dir, output_filename):
+    """Retorna o caminho do índice de destaque de um arquivo de áudio"""
+    return os.path.join(project_dir, f"{os.path.splitext(output_filename)[0]}_highlight.json")
+
+
+def timeline_path(project_dir, output_filename):
+    """Retorna o caminho da linha do tempo usada pelo reprodutor web"""
+    return os.path.join(project_dir, f"{os.path.splitext(output_filename)[0]}_timeline.json")
+
+
+def text_byte_offsets(text_path, char_offsets):
+    """Converte posições crescentes em caracteres para posições em bytes no arquivo UTF-8
+
+    O arquivo é lido em blocos numa única passada, sem ser carregado inteiro.
+    """
+    result = []
+    chars = size = 0
+    with open(text_path, 'r', encoding='utf-8', newline='') as file:
+        while len(result) < len(char_offsets):
+            block = file.read(TEXT_BLOCK_CHARS)
+            if not block:
+                break
+            cursor = 0  # Cada parte do bloco é codificada uma só vez, da última posição até a seguinte
+            while len(result) < len(char_offsets) and char_offsets[len(result)] <= chars + len(block):
+                offset = max(cursor, char_offsets[len(result)] - chars)
+                size += len(block[cursor:offset].encode('utf-8'))
+                cursor = offset
+                result.append(size)
+            chars += len(block)
+            size += len(block[cursor:].encode('utf-8'))
+    result.extend([size] * (len(char_offsets) - len(result)))
+    return result
+
+
+class HighlightIndex:
+    """Índice de destaque: posição exata de cada trecho no áudio (ms) e no texto (caracteres)
+
+    As listas são paralelas e ordenadas, de modo que as buscas por tempo ou
+    por caractere são feitas com busca binária em O(log n).
+    """
+
+    def __init__(self, entries=()):
+        self.start_ms = []
+        self.end_ms = []
+        self.char_start = []
+        self.char_end = []
+        for entry in entries:
+            self.add(*entry)
+
+    def __len__(self):
+        return len(self.start_ms)
+
+    def add(self, start_ms, end_ms, char_start, char_end):
+        """Acrescenta um trecho ao final do índice"""
+        self.start_ms.append(round(start_ms, 1))
+        self.end_ms.append(round(end_ms, 1))
+        self.char_start.append(char_start)
+        self.char_end.append(char_end)
+
+    @property
+    def duration_ms(self):
+        return self.end_ms[-1] if self.end_ms else 0.0
+
+    def at_time(self, position_ms):
+        """Retorna o número do trecho tocado na posição indicada, ou -1 antes do primeiro"""
+        return bisect_right(self.start_ms, position_ms) - 1
+
+    def at_char(self, offset):
+        """Retorna o número do trecho que contém o caractere indicado, ou -1 antes do primeiro"""
+        return bisect_right(self.char_start, offset) - 1
+
+    def entry(self, i):
+        return self.start_ms[i], self.end_ms[i], self.char_start[i], self.char_end[i]
+
+    def save(self, path):
+        """Grava o índice em JSON compacto"""
+        entries = [self.entry(i) for i in range(len(self))]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'version': INDEX_VERSION, 'entries': entries}, file, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def save_timeline(self, path, text_path=None):
+        """Grava a linha do tempo em colunas, para busca binária no navegador
+
+        Cada coluna é uma lista ordenada de inteiros (ms, caracteres e, com o
+        arquivo de texto, bytes), então o reprodutor acha o trecho de um
+        instante sem percorrer o índice e pede só os bytes do texto em volta.
+        """
+        timeline = {
+            'version': TIMELINE_VERSION,
+            'duration_ms': round(self.duration_ms),
+            'start_ms': [round(ms) for ms in self.start_ms],
+            'end_ms': [round(ms) for ms in self.end_ms],
+            'char_start': self.char_start,
+            'char_end': self.char_end,
+        }
+        if text_path is not None:
+            timeline['byte_start'] = text_byte_offsets(text_path, self.char_start)
+            timeline['byte_end'] = text_byte_offsets(text_path, self.char_end)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(timeline, file, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Carrega um índice gravado por save()"""
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        return cls(data['entries'])
@@ -0,0 +1,375 @@
+import re
+import time
+import queue
+import tempfile
+import threading
+from io import BytesIO
+from array import array
+from bisect import bisect_right
+from highlight_index import HighlightIndex
+
+MAX_TICK_MS = 1000  # Intervalo máximo entre verificações, para detectar o fim da reprodução
+MIN_TICK_MS = 10
+WAIT_TICK_MS = 100  # Intervalo de verificação enquanto o próximo trecho não fica pronto
+# Trechos decodificados mantidos na memória pela reprodução em fluxo, antes e depois do atual
+SOUND_WINDOW_BEHIND = 1
+SOUND_WINDOW_AHEAD = 2
+
+
+def _music():
+    """Importa o pygame só quando a reprodução é usada e retorna pygame.mixer.music"""
+    import pygame
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+    return pygame.mixer.music
+
+
+def _mixer():
+    """Importa o pygame só quando a reprodução é usada e retorna pygame.mixer já iniciado"""
+    _music()
+    import pygame
+    return pygame.mixer
+
+
+class TextOffsets:
+    """Converte posições em caracteres do texto em índices "linha.coluna" do Tk e vice-versa
+
+    Guarda o início de cada linha numa tabela ordenada, evitando que o Tk
+    percorra o texto desde "1.0" a cada conversão.
+    """
+
+    def __init__(self, text):
+        self.line_starts = array('Q', [0])
+        self.line_starts.extend(match.end() for match in re.finditer('\n', text))
+
+    def to_tk(self, offset):
+        """Converte uma posição em caracteres para um índice do Tk"""
+        line = bisect_right(self.line_starts, offset) - 1
+        return f"{line + 1}.{offset - self.line_starts[line]}"
+
+    def from_tk(self, tk_index):
+        """Converte um índice "linha.coluna" do Tk para uma posição em caracteres"""
+        line, column = tk_index.split('.')
+        line = min(int(line), len(self.line_starts)) - 1
+        return self.line_starts[line] + int(column)
+
+
+class TextWidgetView:
+    """Adapta um Text do Tk que contém o texto inteiro à interface de destaque do reprodutor
+
+    As posições são convertidas com TextOffsets, por busca binária, então cada
+    troca de destaque custa o mesmo independentemente do tamanho do documento.
+    VirtualTextView (text_view.py) oferece a mesma interface para documentos
+    grandes, com só uma janela do texto no widget.
+    """
+
+    def __init__(self, text_box):
+        self.widget = text_box
+        self.offsets = TextOffsets(text_box.get(1.0, "end"))
+        self._highlighted = {}
+
+    def after(self, delay_ms, callback):
+        return self.widget.after(delay_ms, callback)
+
+    def after_cancel(self, after_id):
+        self.widget.after_cancel(after_id)
+
+    def tag_config(self, tag, **options):
+        self.widget.tag_config(tag, **options)
+
+    def highlight(self, tag, char_start, char_end):
+        """Destaca o intervalo de caracteres com a marca, removendo só o destaque anterior dela"""
+        self.clear_highlight(tag)
+        tk_range = self.offsets.to_tk(char_start), self.offsets.to_tk(char_end)
+        self.widget.tag_add(tag, *tk_range)
+        self.widget.see(tk_range[0])
+        self._highlighted[tag] = tk_range
+
+    def clear_highlight(self, tag):
+        tk_range = self._highlighted.pop(tag, None)
+        if tk_range is not None:
+            self.widget.tag_remove(tag, *tk_range)
+
+    def offset_at(self, tk_index):
+        """Posição em caracteres de um índice do Tk (ex.: "@x,y" do ponto clicado)"""
+        return self.offsets.from_tk(self.widget.index(tk_index))
+
+
+class HighlightPlayer:
+    """Reproduz o áudio e move o destaque com callbacks root.after, sem bloquear a interface
+
+    A posição vem de pygame.mixer.music.get_pos() somada ao ponto de partida
+    da última busca, e o trecho atual é encontrado por busca binária no
+    índice de destaque. Cada callback é agendado para o início do próximo
+    trecho, então a CPU fica ociosa entre as trocas de destaque. text_box
+    pode ser um Text do Tk ou uma VirtualTextView; o destaque é feito por
+    posição em caracteres, convertida pela view.
+    """
+
+    def __init__(self, text_box, index, tag="highlight"):
+        self.view = text_box if hasattr(text_box, 'highlight') else TextWidgetView(text_box)
+        self.index = index
+        self.tag = tag
+        self.current = -1
+        self.paused = False
+        self._offset_ms = 0.0
+        self._after_id = None
+        self.view.tag_config(tag, background="yellow")
+
+    def play(self, audio_filename, start_ms=0.0):
+        """Carrega o áudio e começa a tocar a partir da posição indicada"""
+        _music().load(audio_filename)
+        self.seek(start_ms)
+
+    @property
+    def position_ms(self):
+        """Posição atual da reprodução em milissegundos"""
+        return self._offset_ms + max(0, _music().get_pos())
+
+    def seek(self, position_ms):
+        """Pula para a posição indicada e atualiza o destaque imediatamente"""
+        self._offset_ms = max(0.0, position_ms)
+        _music().play(start=self._offset_ms / 1000)
+        if self.paused:
+            _music().pause()
+        self._reschedule(0)
+
+    def seek_to_char(self, offset):
+        """Pula para o trecho que contém o caractere indicado"""
+        i = self.index.at_char(offset)
+        if i >= 0:
+            self.seek(self.index.start_ms[i])
+
+    def seek_to_tk(self, tk_index):
+        """Pula para o trecho que contém o índice do Tk indicado (ex.: o ponto clicado)"""
+        self.seek_to_char(self.view.offset_at(tk_index))
+
+    def toggle_pause(self):
+        """Pausa ou retoma a reprodução"""
+        if self.paused:
+            _music().unpause()
+            self.paused = False
+            self._reschedule(0)
+        else:
+            _music().pause()
+            self.paused = True
+            self._cancel()
+
+    def stop(self):
+        """Para a reprodução e remove o destaque"""
+        self._cancel()
+        _music().stop()
+        self.paused = False
+        self.current = -1
+        self._clear()
+
+    def _cancel(self):
+        if self._after_id is not None:
+            self.view.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _reschedule(self, delay_ms):
+        self._cancel()
+        self._after_id = self.view.after(int(delay_ms), self._tick)
+
+    def _tick(self):
+        """Atualiza o destaque e agenda a próxima verificação para o início do próximo trecho"""
+        self._after_id = None
+        if not _music().get_busy() and not self.paused:
+            self.stop()
+            return
+        position = self.position_ms
+        i = self.index.at_time(position)
+        if i != self.current and i >= 0:
+            self.current = i
+            self._highlight(i)
+        delay = MAX_TICK_MS
+        if i + 1 < len(self.index):
+            delay = min(delay, max(MIN_TICK_MS, self.index.start_ms[i + 1] - position))
+        self._after_id = self.view.after(int(delay), self._tick)
+
+    def _clear(self):
+        """Remove só o destaque atual, sem varrer o texto inteiro"""
+        self.view.clear_highlight(self.tag)
+
+    def _highlight(self, i):
+        self.view.highlight(self.tag, self.index.char_start[i], self.index.char_end[i])
+
+
+class StreamingHighlightPlayer(HighlightPlayer):
+    """Toca cada trecho assim que ele é sintetizado, enquanto os seguintes ainda estão sendo gerados
+
+    Os trechos chegam por feed(), de qualquer thread, e são tocados num canal
+    do pygame.mixer, com o próximo trecho sempre enfileirado (Channel.queue)
+    para não haver pausa entre eles. Se a síntese atrasar, a reprodução
+    espera o próximo trecho e continua de onde parou. A posição é medida a
+    partir do início do trecho em execução, então o erro não se acumula.
+
+    O áudio de cada trecho vai para um arquivo temporário, e só os trechos em
+    torno do atual ficam decodificados na memória (o PCM de um documento
+    longo ocuparia gigabytes); os demais são decodificados de novo quando a
+    reprodução ou um seek chegam até eles. stop() apaga o arquivo temporário,
+    e os trechos que chegarem depois são descartados.
+    """
+
+    def __init__(self, text_box, tag="highlight"):
+        super().__init__(text_box, HighlightIndex(), tag)
+        self._incoming = queue.Queue()
+        self._spool = tempfile.TemporaryFile()
+        self._spool_lock = threading.Lock()
+        self._spool_size = 0
+        self._offsets = array('Q')  # Posição e tamanho do áudio de cada trecho recebido no arquivo temporário
+        self._sizes = array('Q')
+        self._sounds = {}  # Trechos decodificados, só os da janela em torno do atual
+        self._channel = None
+        self._playing = -1  # Trecho que o canal está tocando
+        self._queued = None  # Trecho enfileirado para tocar em seguida
+        self._anchor = (0.0, 0.0)  # (posição em ms, instante) do início do trecho em execução
+        self._complete = False
+
+    def feed(self, data, start_ms, end_ms, char_start, char_end):
+        """Entrega o áudio (MP3 ou WAV) de um trecho pronto; pode ser chamado pela thread da síntese"""
+        with self._spool_lock:
+            if self._spool is None:
+                return  # Reprodução já parada
+            self._spool.seek(self._spool_size)
+            self._spool.write(data)
+            offset = self._spool_size
+            self._spool_size += len(data)
+        self._incoming.put((offset, len(data), start_ms, end_ms, char_start, char_end))
+
+    def finish(self):
+        """Indica que não há mais trechos a receber"""
+        self._incoming.put(None)
+
+    def play(self, audio_filename=None, start_ms=0.0):
+        """Começa a tocar assim que o primeiro trecho chegar"""
+        self._channel = _mixer().find_channel(True)
+        self.paused = False
+        self._reschedule(0)
+
+    @property
+    def ready_ms(self):
+        """Duração do áudio já recebido"""
+        return self.index.duration_ms
+
+    @property
+    def received(self):
+        """Número de trechos já recebidos"""
+        return len(self._offsets)
+
+    @property
+    def position_ms(self):
+        if self._playing < 0:
+            return 0.0
+        anchor_ms, anchor_time = self._anchor
+        elapsed = 0.0 if self.paused else (time.perf_counter() - anchor_time) * 1000
+        return min(anchor_ms + elapsed, self.index.end_ms[self._playing])
+
+    def seek(self, position_ms):
+        """Pula para o início do trecho que contém a posição, se ele já tiver sido recebido"""
+        self._receive()
+        i = max(0, self.index.at_time(position_ms))
+        if self._channel is not None and self._spool is not None and i < self.received:
+            self._start(i)
+            if self.paused:
+                self._channel.pause()
+            self._reschedule(0)
+
+    def toggle_pause(self):
+        if self._channel is None:
+            return
+        if self.paused:
+            self._anchor = (self._anchor[0], time.perf_counter())
+            self._channel.unpause()
+            self.paused = False
+            self._reschedule(0)
+        else:
+            self._anchor = (self.position_ms, time.perf_counter())
+            self._channel.pause()
+            self.paused = True
+            self._cancel()
+
+    def stop(self):
+        self._cancel()
+        if self._channel is not None:
+            self._channel.stop()
+        self.paused = False
+        self.current = -1
+        self._playing = -1
+        self._queued = None
+        self._sounds.clear()
+        with self._spool_lock:
+            if self._spool is not None:
+                self._spool.close()  # TemporaryFile: fechar também apaga o arquivo
+                self._spool = None
+        self._clear()
+
+    def _receive(self):
+        """Move os trechos recebidos para o índice, na thread da interface"""
+        while True:
+            try:
+                item = self._incoming.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                self._complete = True
+                continue
+            offset, size, start_ms, end_ms, char_start, char_end = item
+            self._offsets.append(offset)
+            self._sizes.append(size)
+            self.index.add(start_ms, end_ms, char_start, char_end)
+
+    def _sound(self, i):
+        """Retorna o trecho decodificado, lendo-o do arquivo temporário se não estiver na janela"""
+        sound = self._sounds.get(i)
+        if sound is None:
+            with self._spool_lock:
+                self._spool.seek(self._offsets[i])
+                data = self._spool.read(self._sizes[i])
+            sound = self._sounds[i] = _mixer().Sound(file=BytesIO(data))
+        return sound
+
+    def _trim_window(self):
+        """Descarta os trechos decodificados fora da janela em torno do atual"""
+        keep = range(self._playing - SOUND_WINDOW_BEHIND, self._playing + SOUND_WINDOW_AHEAD + 1)
+        for i in [i for i in self._sounds if i not in keep and i != self._queued]:
+            del self._sounds[i]
+
+    def _start(self, i):
+        self._channel.play(self._sound(i))
+        self._playing, self._queued = i, None
+        self._anchor = (self.index.start_ms[i], time.perf_counter())
+        self._trim_window()
+
+    def _tick(self):
+        self._after_id = None
+        if self._spool is None:
+            return  # Parado
+        self._receive()
+        if self._channel.get_busy():
+            if self._queued is not None and self._channel.get_sound() is self._sounds.get(self._queued):
+                # O canal passou para o trecho enfileirado
+                self._playing, self._queued = self._queued, None
+                self._anchor = (self.index.start_ms[self._playing], time.perf_counter())
+                self._trim_window()
+        elif self._playing + 1 < self.received:
+            self._start(self._playing + 1)  # Primeiro trecho, ou a síntese tinha ficado para trás
+        elif self._complete:
+            self.stop()
+            return
+        else:
+            self._after_id = self.view.after(WAIT_TICK_MS, self._tick)
+            return
+
+        if self._queued is None and self._playing + 1 < self.received:
+            self._queued = self._playing + 1
+            self._channel.queue(self._sound(self._queued))
+        if self._playing != self.current:
+            self.current = self._playing
+            self._highlight(self._playing)
+        # Próxima verificação no fim do trecho atual, quando o enfileirado começa a tocar
+        delay = max(MIN_TICK_MS, min(MAX_TICK_MS, self.index.end_ms[self._playing] - self.position_ms))
+        if self._queued is None:
+            delay = min(delay, WAIT_TICK_MS)
+        self._after_id = self.view.after(int(delay), self._tick)
@@ -0,0 +1,115 @@
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+
+COPY_BLOCK = 256 * 1024
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600  # Arquivos de um job concluído nunca mudam
+
+RANGE_PATTERN = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+def file_etag(stat):
+    """ETag forte derivada do tamanho e da data de modificação do arquivo"""
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """Converte um cabeçalho Range de intervalo único em (início, fim inclusivo)
+
+    Retorna None se o cabeçalho deve ser ignorado (ausente, malformado ou com
+    vários intervalos, que são atendidos com o arquivo inteiro) e 'invalid' se
+    o intervalo não cabe no arquivo.
+    """
+    match = RANGE_PATTERN.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        length = int(last)  # Sufixo: os últimos N bytes
+        if length == 0 or size == 0:
+            return 'invalid'
+        return max(0, size - length), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or last < first:
+        return 'invalid'
+    return first, last
+
+
+def _not_modified(headers, etag, mtime):
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+    if_modified_since = headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def send_file(handler, path, content_type, max_age=IMMUTABLE_MAX_AGE, head=False):
+    """Envia um arquivo por um BaseHTTPRequestHandler com Range/206, ETag e cabeçalhos de cache
+
+    Suporta pedidos condicionais (If-None-Match / If-Modified-Since -> 304),
+    If-Range e um intervalo por pedido; intervalos fora do arquivo recebem
+    416. Só a parte pedida é lida do disco, então o navegador pode começar a
+    tocar ou pular para qualquer ponto de um MP3 longo sem baixá-lo inteiro.
+    """
+    with open(path, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        size = stat.st_size
+        etag = file_etag(stat)
+        cache_headers = [
+            ('ETag', etag),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+            ('Cache-Control', f"public, max-age={max_age}, immutable" if max_age else "no-cache"),
+            ('Accept-Ranges', 'bytes'),
+        ]
+
+        if _not_modified(handler.headers, etag, stat.st_mtime):
+            handler.send_response(304)
+            for name, value in cache_headers:
+                handler.send_header(name, value)
+            handler.end_headers()
+            return
+
+        byte_range = parse_range(handler.headers.get('Range'), size)
+        if_range = handler.headers.get('If-Range')
+        if byte_range is not None and if_range and if_range.strip() not in (etag, cache_headers[1][1]):
+            byte_range = None  # O arquivo mudou desde a primeira parte; envia tudo de novo
+
+        if byte_range == 'invalid':
+            handler.send_response(416)
+            handler.send_header('Content-Range', f"bytes */{size}")
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+
+        if byte_range is None:
+            start, length = 0, size
+            handler.send_response(200)
+        else:
+            start, last = byte_range
+            length = last - start + 1
+            handler.send_response(206)
+            handler.send_header('Content-Range', f"bytes {start}-{last}/{size}")
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(length))
+        for name, value in cache_headers:
+            handler.send_header(name, value)
+        handler.end_headers()
+        if head:
+            return
+
+        file.seek(start)
+        remaining = length
+        while remaining:
+            block = file.read(min(COPY_BLOCK, remaining))
+            if not block:
+                break
+            handler.wfile.write(block)
+            remaining -= len(block)
@@ -0,0 +1,43 @@
+import os
+import json
+from difflib import SequenceMatcher
+
+
+def manifest_path(project_dir, base_filename):
+    """Retorna o caminho do manifesto de trechos de um documento"""
+    return os.path.join(project_dir, f"{base_filename}_manifest.json")
+
+
+def load_manifest(path):
+    """Carrega o manifesto da geração anterior, ou None se não existir"""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_manifest(path, output_filename, chunks, assembly, engine=None):
+    """Salva o manifesto com o arquivo de saída, o modo de montagem, o motor e a lista de trechos gerados"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump({'output': output_filename, 'assembly': assembly, 'engine': engine, 'chunks': chunks}, file)
+    os.replace(tmp_path, path)
+
+
+def manifest_matches(manifest, assembly, engine):
+    """Indica se o manifesto é de uma geração com o mesmo modo de montagem e o mesmo motor e voz"""
+    # A comparação é feita depois de passar pelo JSON, como o manifesto gravado (tuplas viram listas)
+    return (manifest is not None and manifest.get('assembly') == assembly
+            and manifest.get('engine') == json.loads(json.dumps(engine)))
+
+
+def match_chunks(old_keys, new_keys):
+    """Compara as listas de chaves e retorna {índice novo: índice antigo} dos trechos inalterados"""
+    matcher = SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+    reuse = {}
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == 'equal':
+            for offset in range(new_end - new_start):
+                reuse[new_start + offset] = old_start + offset
+    return reuse
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+
+# Estados de um job: queued -> running -> done | failed | cancelled
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    source_path TEXT NOT NULL,
+    output_dir TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    done_chunks INTEGER NOT NULL DEFAULT 0,
+    total_chunks INTEGER,
+    error TEXT,
+    result TEXT,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+
+class JobQueue:
+    """Fila persistente de conversões em SQLite, compartilhável entre threads e processos
+
+    Cada operação abre sua própria conexão (em modo WAL), e a retirada de um
+    job é feita numa transação exclusiva, então vários workers nunca pegam o
+    mesmo job. O job retirado guarda o owner da fila que o pegou; ao
+    reiniciar, requeue_interrupted() devolve à fila só os jobs que esse mesmo
+    owner deixou em execução. Processos que compartilham o banco precisam de
+    owners diferentes (o padrão é o nome da máquina), senão um devolveria à
+    fila os jobs ainda em execução no outro.
+    """
+
+    def __init__(self, db_path, owner=None):
+        self.db_path = db_path
+        self.owner = owner or socket.gethostname()
+        self._available = threading.Condition()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            if 'owner' not in {column['name'] for column in db.execute("PRAGMA table_info(jobs)")}:
+                db.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")  # Banco criado antes da coluna
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return _Connection(db)
+
+    def submit(self, filename, source_path, output_dir, job_id=None):
+        """Coloca um documento na fila e retorna o id do job"""
+        job_id = job_id or uuid.uuid4().hex
+        with self._connect() as db:
+            db.execute("INSERT INTO jobs (id, status, filename, source_path, output_dir, created_at) "
+                       "VALUES (?, ?, ?, ?, ?, ?)", (job_id, QUEUED, filename, source_path, output_dir, time.time()))
+        with self._available:
+            self._available.notify()
+        return job_id
+
+    def claim(self, timeout=None):
+        """Retira o job mais antigo da fila, marcando-o como em execução, ou None após timeout segundos"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._connect() as db:
+                db.execute("BEGIN IMMEDIATE")
+                row = db.execute("SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                                 (QUEUED,)).fetchone()
+                if row is not None:
+                    db.execute("UPDATE jobs SET status = ?, started_at = ?, owner = ? WHERE id = ?",
+                               (RUNNING, time.time(), self.owner, row['id']))
+                db.execute("COMMIT")
+            if row is not None:
+                return self.get(row['id'])
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            with self._available:
+                # O aviso de submit() acorda na hora; o limite cobre jobs de outros processos
+                self._available.wait(1.0 if remaining is None else min(1.0, remaining))
+
+    def update_progress(self, job_id, done, total=None):
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET done_chunks = ?, total_chunks = COALESCE(?, total_chunks) WHERE id = ?",
+                       (done, total, job_id))
+
+    def finish(self, job_id, result):
+        """Marca o job como concluído, guardando as métricas da conversão"""
+        self._close(job_id, DONE, result=json.dumps(result, ensure_ascii=False))
+
+    def fail(self, job_id, error):
+        self._close(job_id, FAILED, error=error)
+
+    def cancel(self, job_id):
+        """Cancela um job que ainda não terminou; retorna False se ele já tinha terminado"""
+        with self._connect() as db:
+            cursor = db.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                                (CANCELLED, time.time(), job_id, QUEUED, RUNNING))
+            return cursor.rowcount > 0
+
+    def _close(self, job_id, status, error=None, result=None):
+        with self._connect() as db:
+            # Um job cancelado durante a execução continua cancelado
+            db.execute("UPDATE jobs SET status = ?, finished_at = ?, error = ?, result = ? "
+                       "WHERE id = ? AND status = ?", (status, time.time(), error, result, job_id, RUNNING))
+
+    def requeue_interrupted(self):
+        """Devolve à fila os jobs que este owner deixou em execução (ex.: após uma queda do serviço)
+
+        Jobs em execução sem owner vêm de um banco anterior à coluna e também voltam à fila.
+        """
+        with self._connect() as db:
+            return db.execute("UPDATE jobs SET status = ?, started_at = NULL, done_chunks = 0, owner = NULL "
+                              "WHERE status = ? AND (owner = ? OR owner IS NULL)",
+                              (QUEUED, RUNNING, self.owner)).rowcount
+
+    def get(self, job_id):
+        """Retorna o job como dicionário, ou None se não existir"""
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return job_dict(row) if row is not None else None
+
+    def list(self, limit=100):
+        with self._connect() as db:
+            rows = db.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [job_dict(row) for row in rows]
+
+    def counts(self):
+        """Número de jobs em cada estado"""
+        with self._connect() as db:
+            return dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+class _Connection:
+    """Conexão que é fechada ao sair do bloco with (sqlite3 só encerra a transação)"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None and self.db.in_transaction:
+            self.db.execute("ROLLBACK")
+        self.db.close()
+
+
+def job_dict(row):
+    """Converte uma linha da tabela em dicionário, com as métricas e o progresso calculados"""
+    job = dict(row)
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    now = job['finished_at'] or time.time()
+    job['queued_seconds'] = round((job['started_at'] or now) - job['created_at'], 3)
+    job['running_seconds'] = round(now - job['started_at'], 3) if job['started_at'] else None
+    if job['total_chunks']:
+        job['progress'] = round(job['done_chunks'] / job['total_chunks'], 4)
+    else:
+        job['progress'] = 1.0 if job['status'] == DONE else None
+    return job
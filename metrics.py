@@ -0,0 +1,281 @@
+import os
+import json
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+
+METRIC_PREFIX = "newreader_"
+# Limites dos histogramas de duração, em segundos (de 1 ms a 1 min)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+MAX_TRACE_EVENTS = 500000  # Acima disso os intervalos deixam de ser gravados no trace
+
+# Totais por etapa da conversão em andamento; é uma variável de contexto para acompanhar
+# o trabalho entregue a outras threads com asyncio.to_thread
+_stage_totals = contextvars.ContextVar('stage_totals', default=None)
+
+# Descrição das métricas gravadas pelo pipeline, usada no HELP do formato Prometheus
+DESCRIPTIONS = {
+    'stage_seconds': "Tempo próprio de cada etapa por conversão (sem o das etapas internas)",
+    'chunk_synthesis_seconds': "Latência das sínteses de trecho bem-sucedidas",
+    'synthesis_retries_total': "Tentativas de síntese repetidas após erro ou limite de requisições",
+    'synthesis_failures_total': "Trechos cuja síntese falhou depois de todas as tentativas",
+    'cache_lookups_total': "Consultas ao cache de trechos, por resultado",
+    'chunks_total': "Trechos gravados no áudio, sintetizados ou reaproveitados da geração anterior",
+    'audio_bytes_written_total': "Bytes de MP3 gravados nos arquivos de saída",
+    'conversions_total': "Documentos convertidos",
+    'silence_trimmed_seconds_total': "Silêncio cortado das pontas dos trechos no modo normalize",
+    'jobs': "Jobs do serviço por estado",
+    'workers_running': "Jobs em conversão no serviço",
+    'cache_hit_ratio': "Fração das consultas ao cache de trechos que acertaram",
+    'cache_bytes': "Bytes ocupados pelo cache de trechos",
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Contagem acumulada de observações por faixa, como no tipo histogram do Prometheus"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # A última faixa é +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Estimativa de um quantil pelo limite superior da faixa onde ele cai, sem passar do máximo observado"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return min(bound, self.max)
+        return self.max  # Acima da última faixa
+
+
+class Metrics:
+    """Contadores, histogramas e intervalos (spans) do pipeline de conversão
+
+    Contadores e histogramas têm tamanho fixo e ficam sempre ligados, para o
+    endpoint /metrics do serviço; os intervalos só são gravados, no formato
+    de trace do Chrome (chrome://tracing, Perfetto), depois de
+    start_tracing(). Intervalos aninhados na mesma thread descontam o tempo
+    dos internos, então a soma por etapa de collect_stages() é o tempo
+    próprio de cada uma.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._local = threading.local()
+        self._events = []
+        self._thread_names = {}
+        self.tracing = False
+        self.dropped_events = 0
+        self.epoch = time.perf_counter()
+
+    def count(self, name, value=1, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _labels_key(labels))] = value
+
+    def start_tracing(self):
+        """Passa a gravar os intervalos, descartando os de um trace anterior"""
+        with self._lock:
+            self._events = []
+            self._thread_names = {}
+            self.dropped_events = 0
+            self.epoch = time.perf_counter()
+            self.tracing = True
+
+    def stop_tracing(self):
+        self.tracing = False
+
+    @contextmanager
+    def span(self, name, **args):
+        """Mede um intervalo; args aparecem no trace ao selecionar o intervalo"""
+        stack = self._local.__dict__.setdefault('stack', [])
+        frame = [0.0]  # Tempo dos intervalos internos
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            duration = end - start
+            if stack:
+                stack[-1][0] += duration
+            totals = _stage_totals.get()
+            if totals is not None:
+                with self._lock:
+                    totals[name] = totals.get(name, 0.0) + duration - frame[0]
+            if self.tracing:
+                self.add_event(name, start, duration, **args)
+
+    def add_event(self, name, start, duration, **args):
+        """Grava no trace um intervalo já medido (start em perf_counter), sem somá-lo às etapas
+
+        Para código assíncrono, em que vários intervalos se intercalam na mesma thread.
+        """
+        if not self.tracing:
+            return
+        thread = threading.current_thread()
+        event = {'name': name, 'ph': 'X', 'pid': 1, 'tid': thread.ident,
+                 'ts': round((start - self.epoch) * 1e6, 1), 'dur': round(duration * 1e6, 1)}
+        if args:
+            event['args'] = args
+        with self._lock:
+            if len(self._events) >= MAX_TRACE_EVENTS:
+                self.dropped_events += 1
+                return
+            self._events.append(event)
+            self._thread_names.setdefault(thread.ident, thread.name)
+
+    @contextmanager
+    def collect_stages(self):
+        """Soma o tempo próprio dos intervalos deste contexto por nome, no dicionário retornado
+
+        Ao sair, cada total também é registrado no histograma stage_seconds.
+        """
+        totals = {}
+        token = _stage_totals.set(totals)
+        try:
+            yield totals
+        finally:
+            _stage_totals.reset(token)
+            for stage, seconds in totals.items():
+                self.observe('stage_seconds', seconds, stage=stage)
+
+    def snapshot(self):
+        """Resumo das métricas em dicionário (para o resumo JSON do lote)"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (histogram.count, histogram.sum, histogram.quantile(0.5), histogram.quantile(0.95))
+                          for key, histogram in self._histograms.items()}
+            gauges = dict(self._gauges)
+
+        def label(name, key):
+            return name + _format_labels(key)
+
+        result = {'counters': {label(*key): value for key, value in counters.items()},
+                  'gauges': {label(*key): value for key, value in gauges.items()},
+                  'histograms': {label(*key): {'count': count, 'sum': round(total, 4), 'p50_le': p50, 'p95_le': p95}
+                                 for key, (count, total, p50, p95) in histograms.items()}}
+        hits = sum(value for (name, key), value in counters.items()
+                   if name == 'cache_lookups_total' and ('result', 'hit') in key)
+        lookups = sum(value for (name, _), value in counters.items() if name == 'cache_lookups_total')
+        result['cache_hit_rate'] = round(hits / lookups, 4) if lookups else None
+        return result
+
+    def chrome_trace(self):
+        """Intervalos gravados no formato JSON de trace do Chrome"""
+        with self._lock:
+            events = list(self._events)
+            names = dict(self._thread_names)
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': name}}
+                    for tid, name in names.items()]
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms',
+                'otherData': {'dropped_events': self.dropped_events}}
+
+    def save_trace(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.chrome_trace(), file, ensure_ascii=False)
+
+    def prometheus_text(self):
+        """Métricas no formato de exposição de texto do Prometheus"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted((key, (h.buckets, list(h.counts), h.sum, h.count))
+                                for key, h in self._histograms.items())
+        lines = []
+        declared = set()
+
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                if name in DESCRIPTIONS:
+                    lines.append(f"# HELP {METRIC_PREFIX}{name} {DESCRIPTIONS[name]}")
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} {kind}")
+
+        for kind, items in (('counter', counters), ('gauge', gauges)):
+            for (name, key), value in items:
+                declare(name, kind)
+                lines.append(f"{METRIC_PREFIX}{name}{_format_labels(key)} {_format_value(value)}")
+        for (name, key), (buckets, counts, total, count) in histograms:
+            declare(name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                lines.append(f"{METRIC_PREFIX}{name}_bucket{_format_labels(key, [('le', le)])} {cumulative}")
+            lines.append(f"{METRIC_PREFIX}{name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{METRIC_PREFIX}{name}_count{_format_labels(key)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def save_prometheus(self, path):
+        """Grava as métricas num arquivo .prom (ex.: para o textfile collector do node_exporter)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+
+# Coletor do processo, usado por todo o pipeline
+METRICS = Metrics()
+
+
+@contextmanager
+def profiled(path):
+    """Executa o bloco sob o cProfile e grava as estatísticas em path (abrir com pstats ou snakeviz)
+
+    O cProfile mede só a thread que entra no bloco.
+    """
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
@@ -0,0 +1,202 @@
+import os
+import struct
+from array import array
+
+# Tabelas do cabeçalho MPEG Audio Layer III
+BITRATES = {
+    'mpeg1': [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    'mpeg2': [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+TOC_STEP = 64  # Guarda a posição de um a cada TOC_STEP quadros para montar a tabela de busca
+
+
+class FrameHeader:
+    """Cabeçalho decodificado de um quadro MP3 Layer III"""
+
+    __slots__ = ('version', 'bitrate_index', 'sample_rate_index', 'sample_rate', 'channel_mode',
+                 'samples', 'length')
+
+    def __init__(self, version, bitrate_index, sample_rate_index, padding, channel_mode):
+        self.version = version
+        self.bitrate_index = bitrate_index
+        self.sample_rate_index = sample_rate_index
+        self.sample_rate = SAMPLE_RATES[version][sample_rate_index]
+        self.channel_mode = channel_mode
+        self.samples = 1152 if version == 3 else 576
+        table = BITRATES['mpeg1' if version == 3 else 'mpeg2']
+        self.length = (self.samples // 8) * table[bitrate_index] * 1000 // self.sample_rate + padding
+
+    @property
+    def side_info_length(self):
+        mono = self.channel_mode == 3
+        if self.version == 3:
+            return 17 if mono else 32
+        return 9 if mono else 17
+
+    def same_stream(self, other):
+        """Indica se dois quadros podem ser concatenados no mesmo fluxo"""
+        return (self.version == other.version and self.sample_rate == other.sample_rate
+                and (self.channel_mode == 3) == (other.channel_mode == 3))
+
+
+def parse_header(data, pos):
+    """Decodifica o cabeçalho na posição indicada ou retorna None se não for um quadro válido"""
+    if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    version = (b1 >> 3) & 3
+    layer = (b1 >> 1) & 3
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    return FrameHeader(version, bitrate_index, sample_rate_index, (b2 >> 1) & 1, b3 >> 6)
+
+
+def id3v2_size(data):
+    """Retorna o tamanho da tag ID3v2 no início dos dados (0 se não houver)"""
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def is_info_frame(data, pos, header):
+    """Indica se o quadro é um cabeçalho Xing/Info (LAME) ou VBRI em vez de áudio"""
+    xing = pos + 4 + header.side_info_length
+    if data[xing:xing + 4] in (b'Xing', b'Info'):
+        return True
+    return data[pos + 36:pos + 40] == b'VBRI'
+
+
+def iter_frames(data):
+    """Gera (posição, cabeçalho) de cada quadro de áudio, ignorando tags ID3 e quadros Xing/LAME/VBRI"""
+    pos = id3v2_size(data)
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b'TAG':
+        end -= 128  # Tag ID3v1 no final
+    first = True
+    while pos + 4 <= end:
+        header = parse_header(data, pos)
+        if header is None or pos + header.length > end:
+            pos += 1  # Lixo entre quadros: procura a próxima sincronia
+            continue
+        if not (first and is_info_frame(data, pos, header)):
+            yield pos, header
+        first = False
+        pos += header.length
+
+
+def mp3_duration_ms(data):
+    """Calcula a duração exata do MP3 pela contagem de quadros"""
+    samples = 0
+    sample_rate = None
+    for _, header in iter_frames(data):
+        samples += header.samples
+        sample_rate = header.sample_rate
+    return samples * 1000 / sample_rate if sample_rate else 0.0
+
+
+def info_frame_header(header):
+    """Escolhe o menor bitrate cujo quadro comporta os dados Xing/Info no formato do fluxo"""
+    needed = 4 + header.side_info_length + 120
+    for bitrate_index in range(1, 15):
+        info = FrameHeader(header.version, bitrate_index, header.sample_rate_index, 0, header.channel_mode)
+        if info.length >= needed:
+            return info
+    raise ValueError("Formato MP3 sem espaço para o quadro Info")
+
+
+def build_info_frame(header, frames, audio_bytes, toc, cbr):
+    """Monta um quadro Xing/Info com o total de quadros, de bytes e a tabela de busca"""
+    info = info_frame_header(header)
+    total_bytes = info.length + audio_bytes
+    frame = bytearray(info.length)
+    frame[0:4] = bytes([0xFF, 0xE0 | (info.version << 3) | (1 << 1) | 1,
+                        (info.bitrate_index << 4) | (info.sample_rate_index << 2),
+                        info.channel_mode << 6])
+    pos = 4 + info.side_info_length
+    frame[pos:pos + 16] = (b'Info' if cbr else b'Xing') + struct.pack('>III', 0x0F, frames, total_bytes)
+    pos += 16
+    for i in range(100):
+        index = min(len(toc) - 1, (i * frames // 100) // TOC_STEP) if toc else 0
+        offset = info.length + (toc[index] if toc else 0)
+        frame[pos + i] = min(255, offset * 256 // total_bytes)
+    return bytes(frame)
+
+
+class Mp3FrameWriter:
+    """Concatena MP3s no nível de quadros, sem decodificar nem recodificar
+
+    As tags ID3 e os quadros Xing/LAME de cada trecho são descartados e, ao
+    fechar, um único quadro Info com a tabela de busca é gravado no início do
+    arquivo. A memória usada não depende do tamanho do documento, exceto pela
+    tabela de busca, que guarda uma posição a cada TOC_STEP quadros.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._tmp_path = f"{path}.part"
+        self._file = open(self._tmp_path, 'wb')
+        self.header = None
+        self.frames = 0
+        self.samples = 0
+        self.audio_bytes = 0
+        self._info_length = 0
+        self._bitrates = set()
+        self._toc = array('Q')
+
+    @property
+    def duration_ms(self):
+        return self.samples * 1000 / self.header.sample_rate if self.header else 0.0
+
+    def write(self, data):
+        """Acrescenta os quadros de áudio de um MP3 e retorna o trecho gravado (posição, tamanho, início e fim em ms)"""
+        out = bytearray()
+        start_offset = self.audio_bytes
+        start_ms = self.duration_ms
+        for pos, header in iter_frames(data):
+            if self.header is None:
+                self.header = header
+                self._info_length = info_frame_header(header).length
+                self._file.write(bytes(self._info_length))  # Reserva o espaço do quadro Info
+            elif not header.same_stream(self.header):
+                raise ValueError("Os trechos MP3 têm formatos diferentes e não podem ser concatenados sem recodificação")
+            if self.frames % TOC_STEP == 0:
+                self._toc.append(self.audio_bytes + len(out))
+            self._bitrates.add(header.bitrate_index)
+            out += data[pos:pos + header.length]
+            self.frames += 1
+            self.samples += header.samples
+        self._file.write(out)
+        self.audio_bytes += len(out)
+        return {'offset': self._info_length + start_offset, 'size': len(out),
+                'start_ms': start_ms, 'end_ms': self.duration_ms}
+
+    def close(self):
+        """Grava o quadro Info e move o arquivo para o destino final"""
+        if self.header is not None:
+            self._file.seek(0)
+            self._file.write(build_info_frame(self.header, self.frames, self.audio_bytes, self._toc,
+                                              len(self._bitrates) == 1))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Descarta o arquivo parcial (também depois de um close() que falhou)"""
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+def read_range(path, offset, size):
+    """Lê um intervalo de bytes de um arquivo"""
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        return file.read(size)
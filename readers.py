@@ -0,0 +1,163 @@
+import os
+import json
+import hashlib
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+# Marcas do WordprocessingML usadas na leitura incremental do .docx
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+BODY, PARAGRAPH = W + 'body', W + 'p'
+RUN, HYPERLINK = W + 'r', W + 'hyperlink'
+RUN_TEXT = {W + 't': None, W + 'tab': '\t', W + 'ptab': '\t', W + 'cr': '\n', W + 'noBreakHyphen': '-'}
+BREAK, BREAK_TYPE = W + 'br', W + 'type'
+
+PDF_BATCH_PAGES = 16  # Páginas extraídas por tarefa do pool de processos
+
+
+def _run_text(run):
+    """Texto de um w:r, com tabulações e quebras de linha como em python-docx"""
+    parts = []
+    for child in run:
+        if child.tag in RUN_TEXT:
+            parts.append(RUN_TEXT[child.tag] or child.text or '')
+        elif child.tag == BREAK and child.get(BREAK_TYPE, 'textWrapping') == 'textWrapping':
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def _paragraph_text(paragraph):
+    parts = []
+    for child in paragraph:
+        if child.tag == RUN:
+            parts.append(_run_text(child))
+        elif child.tag == HYPERLINK:
+            parts.extend(_run_text(run) for run in child.iter(RUN))
+    return ''.join(parts)
+
+
+def iter_docx_paragraphs(docx_filename):
+    """Lê o word/document.xml de forma incremental e gera o texto de cada parágrafo do corpo
+
+    Cada parágrafo é descartado da árvore logo depois de lido, então a memória
+    usada não depende do tamanho do documento. Assim como doc.paragraphs do
+    python-docx, só os parágrafos filhos diretos de w:body são lidos: os de
+    tabelas, controles de conteúdo (w:sdt) e caixas de texto são ignorados.
+    """
+    with zipfile.ZipFile(docx_filename) as archive, archive.open('word/document.xml') as xml:
+        body = None
+        body_depth = None
+        depth = 0
+        for event, element in iterparse(xml, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if element.tag == BODY:
+                    body, body_depth = element, depth
+                continue
+            depth -= 1
+            if depth == body_depth:  # Terminou um filho direto do corpo
+                if element.tag == PARAGRAPH:
+                    yield _paragraph_text(element)
+                body.clear()  # Libera os elementos já processados
+
+
+def docx_to_text(docx_filename):
+    """Lê um arquivo .docx e retorna seu conteúdo como uma string"""
+    return '\n'.join(iter_docx_paragraphs(docx_filename))
+
+
+def file_hash(filename):
+    """Calcula o SHA-256 do conteúdo de um arquivo sem carregá-lo inteiro"""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extract_pdf_pages(pdf_filename, page_numbers):
+    """Extrai o texto de um lote de páginas (executado nos processos do pool)"""
+    import PyPDF2
+    with open(pdf_filename, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        return {page_num: reader.pages[page_num].extract_text() or '' for page_num in page_numbers}
+
+
+def pdf_page_count(pdf_filename):
+    """Retorna o número de páginas de um PDF"""
+    import PyPDF2
+    with open(pdf_filename, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+class PdfPageCache:
+    """Cache em disco do número de páginas e do texto de cada página, indexado pelo hash do arquivo PDF"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _path(self, digest):
+        return os.path.join(self.cache_dir, f"pdf_{digest}.json")
+
+    def load(self, digest):
+        """Retorna (número de páginas ou None, {página: texto})"""
+        try:
+            with open(self._path(digest), 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None, {}
+        if 'pages' not in data:
+            data = {'page_count': None, 'pages': data}  # Formato antigo, só com as páginas
+        return data['page_count'], {int(page): text for page, text in data['pages'].items()}
+
+    def save(self, digest, page_count, pages):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._path(digest)}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'page_count': page_count, 'pages': pages}, file, ensure_ascii=False)
+        os.replace(tmp_path, self._path(digest))
+
+
+def pdf_to_text(pdf_filename, first_page=1, last_page=None, workers=None, progress=None, cache_dir=None):
+    """Lê um arquivo PDF e retorna seu conteúdo como uma string
+
+    As páginas (de first_page a last_page, contando a partir de 1) são
+    extraídas em lotes por um pool de processos e remontadas na ordem.
+    progress(feitas, total) é chamado a cada lote concluído. Com cache_dir, o
+    texto de cada página e o número de páginas ficam guardados pelo hash do
+    arquivo, e reabrir o mesmo PDF nem chega a analisá-lo com o PyPDF2.
+    """
+    cache = PdfPageCache(cache_dir) if cache_dir else None
+    digest = file_hash(pdf_filename) if cache else None
+    total_pages, pages = cache.load(digest) if cache else (None, {})
+    counted = total_pages is None
+    if counted:
+        total_pages = pdf_page_count(pdf_filename)
+    last_page = total_pages if last_page is None else min(last_page, total_pages)
+    wanted = range(max(first_page, 1) - 1, last_page)
+
+    missing = [page_num for page_num in wanted if page_num not in pages]
+    batches = [missing[i:i + PDF_BATCH_PAGES] for i in range(0, len(missing), PDF_BATCH_PAGES)]
+    done = len(wanted) - len(missing)
+    if progress:
+        progress(done, len(wanted))
+
+    if len(batches) <= 1 or workers == 1:
+        for batch in batches:
+            pages.update(_extract_pdf_pages(pdf_filename, batch))
+            done += len(batch)
+            if progress:
+                progress(done, len(wanted))
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_extract_pdf_pages, pdf_filename, batch) for batch in batches]
+            for future in as_completed(futures):
+                result = future.result()
+                pages.update(result)
+                done += len(result)
+                if progress:
+                    progress(done, len(wanted))
+
+    if cache and (missing or counted):
+        cache.save(digest, total_pages, pages)
+    return '\n'.join(pages[page_num] for page_num in wanted)
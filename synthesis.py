@@ -0,0 +1,110 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from chunk_cache import chunk_key
+from metrics import METRICS
+
+# Configurações padrão da síntese concorrente
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+CANCEL_POLL_SECONDS = 0.1  # Intervalo de verificação do pedido de cancelamento
+
+
+class SynthesisCancelled(Exception):
+    """A síntese foi interrompida por um pedido de cancelamento"""
+
+
+def synthesize_with_retry(synthesize, text, lang='pt', retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    """Sintetiza um trecho, repetindo com espera exponencial em caso de erro"""
+    engine = engine_name(synthesize)
+    for attempt in range(retries + 1):
+        start = time.perf_counter()
+        try:
+            with METRICS.span('synthesize_chunk', characters=len(text), attempt=attempt):
+                data = synthesize(text, lang)
+        except Exception:
+            if attempt == retries:
+                METRICS.count('synthesis_failures_total', engine=engine)
+                raise
+            METRICS.count('synthesis_retries_total', engine=engine)
+            time.sleep(backoff * (2 ** attempt))
+            continue
+        METRICS.observe('chunk_synthesis_seconds', time.perf_counter() - start, engine=engine)
+        return data
+
+
+def engine_name(synthesize):
+    """Retorna o nome do motor de síntese usado na chave do cache"""
+    return getattr(synthesize, 'name', None) or getattr(synthesize, '__name__', type(synthesize).__name__)
+
+
+def engine_settings(synthesize):
+    """Retorna as configurações de voz do motor, que fazem parte da chave do cache"""
+    return getattr(synthesize, 'settings', None)
+
+
+def engine_signature(synthesize):
+    """Nome e configurações de voz do motor, gravados no manifesto para saber com que voz o áudio foi gerado"""
+    return {'name': engine_name(synthesize), 'settings': engine_settings(synthesize) or {}}
+
+
+def synthesize_cached(synthesize, text, lang='pt', retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                      cache=None, settings=None):
+    """Consulta o cache antes de sintetizar e guarda o resultado novo"""
+    if cache is None:
+        return synthesize_with_retry(synthesize, text, lang, retries, backoff)
+    if settings is None:
+        settings = engine_settings(synthesize)
+    key = chunk_key(text, lang, engine_name(synthesize), settings)
+    data = cache.get(key)
+    METRICS.count('cache_lookups_total', result='miss' if data is None else 'hit')
+    if data is None:
+        data = synthesize_with_retry(synthesize, text, lang, retries, backoff)
+        cache.put(key, data)
+    return data
+
+
+def _wait_result(future, cancel):
+    """Espera o resultado de um trecho, desistindo assim que o cancelamento for pedido"""
+    if cancel is not None:
+        while not wait([future], CANCEL_POLL_SECONDS).done:
+            if cancel.is_set():
+                raise SynthesisCancelled("Síntese cancelada")
+    return future.result()
+
+
+def synthesize_chunks(parts, synthesize, lang='pt', workers=DEFAULT_WORKERS,
+                      retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, cache=None, settings=None, cancel=None):
+    """Sintetiza os trechos em paralelo e gera (índice, bytes) na ordem original
+
+    No máximo 2 * workers trechos ficam em andamento ou aguardando na memória,
+    de modo que o consumo não cresce com o tamanho do documento. Motores com
+    client() (conexões persistentes) usam o pipeline de async_synthesis.
+    Quando o evento cancel é sinalizado, a espera é interrompida com
+    SynthesisCancelled e os trechos que ainda não começaram são descartados.
+    """
+    if hasattr(synthesize, 'client'):
+        from async_synthesis import synthesize_chunks_async
+        yield from synthesize_chunks_async(parts, synthesize, lang, workers, retries, backoff, cache, settings,
+                                           cancel)
+        return
+    window = max(1, workers) * 2
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    pending = deque()
+    try:
+        for i, part in enumerate(parts):
+            future = executor.submit(synthesize_cached, synthesize, part, lang, retries, backoff, cache, settings)
+            pending.append((i, future))
+            if len(pending) >= window:
+                index, future = pending.popleft()
+                yield index, _wait_result(future, cancel)
+        while pending:
+            index, future = pending.popleft()
+            yield index, _wait_result(future, cancel)
+    finally:
+        # Cancela o que ainda não começou se o consumidor desistir ou houver erro, sem
+        # esperar as requisições em andamento
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,66 @@
+import wave
+from io import BytesIO
+
+import pytest
+
+import converter
+from assembly import ASSEMBLERS, FrameAssembler, StreamingEncoderAssembler
+from tts_engines import StubEngine
+
+
+class FailingProcess:
+    """Processo do ffmpeg que sai com erro ao finalizar"""
+
+    class Stdin:
+        def close(self):
+            raise BrokenPipeError
+
+    def __init__(self):
+        self.stdin = self.Stdin()
+        self.returncode = None
+
+    def wait(self):
+        self.returncode = 1
+        return 1
+
+    def kill(self):
+        pass
+
+
+def test_failed_encoder_removes_the_partial_file(tmp_path):
+    output = tmp_path / "saida.mp3"
+    assembler = StreamingEncoderAssembler(str(output))
+    assembler._process = FailingProcess()
+    (tmp_path / "saida.mp3.part").write_bytes(b"parcial")
+    with pytest.raises(RuntimeError):
+        assembler.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+class FailingCloseAssembler(FrameAssembler):
+    aborted = False
+
+    def close(self):
+        raise RuntimeError("falha ao finalizar")
+
+    def abort(self):
+        FailingCloseAssembler.aborted = True
+        super().abort()
+
+
+def test_failed_close_aborts_the_assembler(tmp_path, monkeypatch):
+    monkeypatch.setitem(ASSEMBLERS, 'frames', FailingCloseAssembler)
+    with pytest.raises(RuntimeError):
+        converter.text_to_speech_with_highlight("Uma frase curta.", "saida.mp3", StubEngine(latency=0),
+                                                cache=False, assembly='frames', output_dir=str(tmp_path))
+    assert FailingCloseAssembler.aborted
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_reencoding_assembler_plays_the_processed_pcm():
+    assembler = StreamingEncoderAssembler('saida.mp3')
+    assembler.channels, assembler.frame_rate = 2, 16000
+    assembler._last_pcm = bytes(range(256)) * 16
+    with wave.open(BytesIO(assembler.playable(b'mp3 original')), 'rb') as wav:
+        assert (wav.getnchannels(), wav.getframerate(), wav.getsampwidth()) == (2, 16000, 2)
+        assert wav.readframes(wav.getnframes()) == assembler._last_pcm
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+from async_synthesis import synthesize_chunks_async
+from converter import text_to_speech_with_highlight
+from synthesis import SynthesisCancelled
+from tts_engines import AsyncGTTSEngine
+
+pytest.importorskip('gtts')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from tts_standin import start_server  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def standin_url():
+    server, url = start_server(latency=0.01, jitter=0, max_rate=1000)
+    yield url
+    server.shutdown()
+
+
+def make_engine(url):
+    return AsyncGTTSEngine(rate=1000, base_url=url)
+
+
+def wait_for_pipeline_end(timeout=5):
+    deadline = time.monotonic() + timeout
+    while any(thread.name == 'tts-async' for thread in threading.enumerate()):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_results_arrive_in_order(standin_url):
+    parts = [f"trecho número {i}." for i in range(12)]
+    results = list(synthesize_chunks_async(parts, make_engine(standin_url), workers=4))
+    assert [index for index, _ in results] == list(range(12))
+    assert all(data for _, data in results)
+
+
+def test_closing_after_the_pipeline_finished(standin_url):
+    results = synthesize_chunks_async(["um.", "dois."], make_engine(standin_url), workers=2)
+    next(results)
+    wait_for_pipeline_end()  # Tudo já está na fila e o loop de eventos foi fechado
+    results.close()
+
+
+def test_cancel_after_completion_keeps_the_original_error(standin_url, tmp_path):
+    cancel = threading.Event()
+
+    def progress(done, total):
+        if done == 1:
+            wait_for_pipeline_end()
+            cancel.set()
+
+    with pytest.raises(SynthesisCancelled):
+        text_to_speech_with_highlight("Uma frase de teste. " * 80, "o.mp3",
+                                      make_engine(standin_url), workers=2, cache=False,
+                                      output_dir=str(tmp_path), progress=progress, cancel=cancel)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_closing_before_the_pipeline_starts(standin_url):
+    results = synthesize_chunks_async((f"t{i}." for i in range(1000)), make_engine(standin_url), workers=2)
+    next(results)
+    start = time.perf_counter()
+    results.close()
+    assert time.perf_counter() - start < 2
+
+
+def test_throttled_requests_are_retried_over_reused_connections():
+    # O servidor aceita 5 requisições por segundo e pede 0,2 s de espera nas demais
+    server, url = start_server(latency=0.01, jitter=0, max_rate=5, retry_after=0.2)
+    try:
+        engine = make_engine(url)
+        parts = [f"trecho número {i}." for i in range(12)]
+        start = time.monotonic()
+        results = list(synthesize_chunks_async(parts, engine, workers=3, retries=20, backoff=0.05))
+        elapsed = time.monotonic() - start
+        wait_for_pipeline_end()
+        counters = server.state.counters
+    finally:
+        server.shutdown()
+
+    assert [index for index, _ in results] == list(range(12))
+    assert all(data for _, data in results)
+    stats = engine.latency_stats()
+    assert counters['throttled'] > 0
+    assert stats['throttled'] == counters['throttled']
+    assert stats['retried'] >= stats['throttled']
+    # Cada 429 pausa o pool inteiro pelo Retry-After: no máximo uma rodada de 429s por pausa
+    assert counters['throttled'] <= 3 * (elapsed / 0.2 + 1)
+    # As conexões persistentes são reaproveitadas entre as requisições e as novas tentativas
+    assert counters['connections'] <= 3
+    assert stats['connections_opened'] == counters['connections']
+    assert counters['requests'] == stats['requests']
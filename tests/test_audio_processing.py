@@ -0,0 +1,65 @@
+import pytest
+
+np = pytest.importorskip("numpy")  # Opcional: só o modo 'normalize' usa
+
+import audio_processing  # noqa: E402
+from audio_processing import process_pcm, gated_loudness, FULL_SCALE  # noqa: E402
+
+RATE = 16000
+
+
+def tone(seconds, dbfs, channels=1, rate=RATE):
+    """Senoide de 440 Hz com o volume RMS indicado, em PCM s16le"""
+    t = np.arange(int(seconds * rate)) / rate
+    amplitude = 10 ** (dbfs / 20) * np.sqrt(2)
+    samples = np.repeat((amplitude * np.sin(2 * np.pi * 440 * t))[:, None], channels, axis=1)
+    return np.rint(samples * FULL_SCALE).astype('<i2').tobytes()
+
+
+def silence(seconds, channels=1, rate=RATE):
+    return bytes(2 * channels * int(seconds * rate))
+
+
+def samples_of(pcm, channels=1):
+    return np.frombuffer(pcm, dtype='<i2').reshape(-1, channels).astype(np.float32) / FULL_SCALE
+
+
+def peak_dbfs(pcm):
+    return 20 * np.log10(np.abs(samples_of(pcm)).max())
+
+
+@pytest.mark.parametrize('channels', [1, 2])
+def test_silent_chunk_is_reduced_to_twice_the_kept_silence(channels):
+    pcm, trimmed = process_pcm(silence(2.0, channels), channels, RATE)
+    keep = RATE * audio_processing.KEEP_SILENCE_MS // 1000
+    assert len(pcm) == 2 * keep * 2 * channels
+    assert trimmed == 2 * RATE - 2 * keep
+    assert not any(pcm)
+
+
+def test_edges_are_trimmed_keeping_some_silence():
+    pcm, trimmed = process_pcm(silence(1.0) + tone(1.0, -20) + silence(0.5), 1, RATE, target_dbfs=None)
+    keep = RATE * audio_processing.KEEP_SILENCE_MS // 1000
+    assert len(pcm) // 2 == pytest.approx(RATE + 2 * keep, abs=RATE * audio_processing.WINDOW_MS // 1000)
+    assert trimmed == 2.5 * RATE - len(pcm) // 2
+
+
+def test_normal_chunk_reaches_the_target_loudness():
+    pcm, _ = process_pcm(tone(2.0, -30), 1, RATE)
+    assert gated_loudness(samples_of(pcm), RATE) == pytest.approx(audio_processing.TARGET_LOUDNESS_DBFS, abs=0.1)
+
+
+def test_gain_is_capped_by_max_gain():
+    pcm, _ = process_pcm(tone(2.0, -60), 1, RATE)
+    gain = gated_loudness(samples_of(pcm), RATE) + 60
+    assert gain == pytest.approx(audio_processing.MAX_GAIN_DB, abs=0.1)
+
+
+def test_gain_is_capped_by_the_peak_ceiling():
+    # Volume médio baixo, mas com um estalo quase no máximo
+    quiet = bytearray(tone(2.0, -40))
+    quiet[RATE:RATE + 2] = np.int16(-29000).tobytes()
+    pcm, _ = process_pcm(bytes(quiet), 1, RATE)
+    assert peak_dbfs(pcm) == pytest.approx(audio_processing.PEAK_CEILING_DBFS, abs=0.05)
+    assert gated_loudness(samples_of(pcm), RATE) < audio_processing.TARGET_LOUDNESS_DBFS - 5
+
@@ -0,0 +1,40 @@
+import os
+
+import bags
+from bags import BagCache, BagMatcher
+
+
+def write_bags(directory, content):
+    directory.mkdir(exist_ok=True)
+    (directory / "numerais.txt").write_text(content, encoding='utf-8')
+
+
+def test_longest_key_wins():
+    matcher = BagMatcher({'I': 'um', 'II': 'dois', 'III': 'três'})
+    assert matcher.apply("Capítulo II e III, item I") == "Capítulo dois e três, item um"
+
+
+def test_compiled_matcher_is_shared_within_the_process(tmp_path):
+    write_bags(tmp_path / "bags", "I=um\nII=dois\n")
+    first = BagCache(str(tmp_path / "bags"), str(tmp_path / "cache.json")).matcher()
+    second = BagCache(str(tmp_path / "bags"), str(tmp_path / "other.json")).matcher()
+    assert second is first
+
+
+def test_disk_cache_does_not_recompile_a_known_pattern(tmp_path):
+    write_bags(tmp_path / "bags", "I=um\nII=dois\n")
+    matcher = BagCache(str(tmp_path / "bags"), str(tmp_path / "cache.json")).matcher()
+    bags._process_matchers.clear()  # Simula um processo novo que só tem o arquivo de cache
+    loaded = BagCache(str(tmp_path / "bags"), str(tmp_path / "cache.json")).matcher()
+    assert loaded is not matcher
+    assert loaded.pattern is matcher.pattern
+    assert loaded.apply("II") == "dois"
+
+
+def test_changed_files_are_recompiled(tmp_path):
+    write_bags(tmp_path / "bags", "I=um\n")
+    cache = BagCache(str(tmp_path / "bags"), str(tmp_path / "cache.json"))
+    assert cache.matcher().apply("I") == "um"
+    write_bags(tmp_path / "bags", "I=primeiro\n")
+    os.utime(tmp_path / "bags" / "numerais.txt", ns=(1, 1))
+    assert cache.matcher().apply("I") == "primeiro"
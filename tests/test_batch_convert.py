@@ -0,0 +1,72 @@
+import json
+
+import batch_convert
+import converter
+from bags import BagCache
+from chunk_cache import ChunkCache
+from batch_convert import find_collisions
+from tts_engines import StubEngine
+
+
+def test_same_stem_in_the_same_directory_collides():
+    documents = [('in/lei.docx', ''), ('in/lei.txt', ''), ('in/outra.txt', ''), ('in/sub/lei.pdf', 'sub')]
+    assert find_collisions(documents) == {'in/lei.docx': ['in/lei.txt'], 'in/lei.txt': ['in/lei.docx']}
+
+
+def test_colliding_documents_fail_without_writing_outputs(tmp_path, monkeypatch):
+    # Caches isolados, para não gravar em project_files
+    monkeypatch.setattr(converter, '_chunk_cache', ChunkCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(converter, '_bag_cache', BagCache(converter.BAGS_DIR, str(tmp_path / "bags.json")))
+    source = tmp_path / "in"
+    source.mkdir()
+    (source / "lei.txt").write_text("Texto da lei.", encoding='utf-8')
+    (source / "lei.docx").write_bytes(b"")
+    (source / "outra.txt").write_text("Outro texto.", encoding='utf-8')
+    out = tmp_path / "out"
+    summary_path = tmp_path / "summary.json"
+
+    status = batch_convert.main([str(source), '-o', str(out), '--engine', 'stub', '--summary', str(summary_path)])
+
+    summary = json.loads(summary_path.read_text(encoding='utf-8'))
+    by_name = {doc['source'].rsplit('/', 1)[-1]: doc for doc in summary['documents']}
+    assert status == 1
+    assert by_name['lei.txt']['status'] == by_name['lei.docx']['status'] == 'failed'
+    assert by_name['outra.txt']['status'] == 'converted'
+    assert not (out / "lei.mp3").exists()
+    assert (out / "outra.mp3").exists()
+
+
+def test_changing_engine_or_assembly_converts_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(converter, '_chunk_cache', ChunkCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(converter, '_bag_cache', BagCache(converter.BAGS_DIR, str(tmp_path / "bags.json")))
+    source = tmp_path / "doc.txt"
+    source.write_text("Um texto curto.", encoding='utf-8')
+    out = tmp_path / "out"
+
+    def run(*options):
+        summary_path = tmp_path / "summary.json"
+        batch_convert.main([str(source), '-o', str(out), '--summary', str(summary_path)] + list(options))
+        return json.loads(summary_path.read_text(encoding='utf-8'))['documents'][0]['status']
+
+    manifest_path = out / "doc_manifest.json"
+
+    def edit_manifest(old, new):
+        manifest_path.write_text(manifest_path.read_text(encoding='utf-8').replace(old, new), encoding='utf-8')
+
+    assert run('--engine', 'stub') == 'converted'
+    assert run('--engine', 'stub') == 'skipped'
+    edit_manifest('"stub"', '"gtts"')  # Áudio de outro motor
+    assert run('--engine', 'stub') == 'converted'
+    edit_manifest('"frames"', '"normalize"')  # Áudio de outro modo de montagem
+    assert run('--engine', 'stub') == 'converted'
+    assert run('--engine', 'stub') == 'skipped'
+
+
+def test_convert_document_creates_the_output_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(converter, '_bag_cache', BagCache(converter.BAGS_DIR, str(tmp_path / "bags.json")))
+    source = tmp_path / "doc.txt"
+    source.write_text("Um texto curto.", encoding='utf-8')
+    output_dir = tmp_path / "saida" / "job"
+    result = converter.convert_document(str(source), str(output_dir), StubEngine(latency=0), cache=False)
+    assert (output_dir / "doc.mp3").exists()
+    assert result['chunks'] == 1
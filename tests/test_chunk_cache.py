@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from chunk_cache import ChunkCache, chunk_key
+
+
+def test_key_covers_text_language_engine_and_settings():
+    base = chunk_key("Olá.", 'pt', 'gtts', {'tld': 'com.br'})
+    assert chunk_key("Olá.", 'pt', 'gtts', {'tld': 'com.br'}) == base
+    assert len({base,
+                chunk_key("Olá!", 'pt', 'gtts', {'tld': 'com.br'}),
+                chunk_key("Olá.", 'en', 'gtts', {'tld': 'com.br'}),
+                chunk_key("Olá.", 'pt', 'espeak-ng', {'tld': 'com.br'}),
+                chunk_key("Olá.", 'pt', 'gtts', {'tld': 'pt'}),
+                chunk_key("Olá.", 'pt', 'gtts')}) == 6
+    # A ordem das configurações não muda a chave
+    assert chunk_key("a", settings={'x': 1, 'y': 2}) == chunk_key("a", settings={'y': 2, 'x': 1})
+
+
+def test_hits_and_misses(tmp_path):
+    cache = ChunkCache(str(tmp_path))
+    assert cache.get('a') is None
+    cache.put('a', b'audio')
+    assert cache.get('a') == b'audio'
+    assert cache.get('a') == b'audio'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (2, 1, 0)
+    assert stats['hit_rate'] == pytest.approx(2 / 3)
+    assert stats['bytes'] == 5
+
+
+def test_overwrite_keeps_the_size_right(tmp_path):
+    cache = ChunkCache(str(tmp_path))
+    cache.put('a', b'12345')
+    cache.put('a', b'12')
+    assert cache.stats()['bytes'] == 2
+    assert ChunkCache(str(tmp_path)).total_bytes == 2
+
+
+def test_evicts_least_recently_used_down_to_ninety_percent(tmp_path):
+    cache = ChunkCache(str(tmp_path), max_bytes=1000)
+    for i, key in enumerate('abcd'):
+        cache.put(key, bytes(200))
+        os.utime(cache._path(key), (1000 + i, 1000 + i))  # a é o mais antigo
+    assert cache.get('a') is not None  # Usar a o torna o mais recente
+    cache.put('e', bytes(400))  # 1200 bytes: passa do limite
+
+    assert cache.total_bytes <= 900  # Para no primeiro despejo que chega a 90%
+    assert cache.get('b') is None and cache.get('c') is None
+    assert all(cache.get(key) is not None for key in 'ade')
+    stats = cache.stats()
+    assert stats['evictions'] == 2
+    assert stats['bytes'] == 800 == sum(entry.stat().st_size for entry in os.scandir(tmp_path))
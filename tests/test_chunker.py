@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from chunker import MAX_CHUNK_LENGTH, iter_chunk_offsets, iter_stream_chunk_offsets, iter_text_chunks, split_text
+
+
+def random_text(rng, length):
+    words = ["lei", "artigo", "parágrafo", "inciso", "é", "vedado", "€", "x" * 30]
+    parts = []
+    while sum(map(len, parts)) < length:
+        parts.append(rng.choice(words))
+        parts.append(rng.choices([" ", ". ", "; ", "\n", "  ", "! "], [20, 3, 1, 1, 1, 1])[0])
+    return ''.join(parts)
+
+
+def test_chunks_respect_the_limit_and_cover_the_text():
+    rng = random.Random(11)
+    text = random_text(rng, 20000)
+    chunks = list(iter_chunk_offsets(text))
+    assert all(0 < end - start <= MAX_CHUNK_LENGTH for start, end in chunks)
+    assert all(a_end <= b_start for (_, a_end), (b_start, _) in zip(chunks, chunks[1:]))
+    # Fora dos trechos só sobra espaço em branco
+    covered = set()
+    for start, end in chunks:
+        assert not text[start].isspace() and not text[end - 1].isspace()
+        covered.update(range(start, end))
+    assert all(text[i].isspace() for i in range(len(text)) if i not in covered)
+
+
+def test_prefers_paragraph_break():
+    text = "a" * 300 + ". " + "b" * 50 + "\n" + "c" * 300
+    assert split_text(text) == ["a" * 300 + ". " + "b" * 50, "c" * 300]
+
+
+def test_then_sentence_end():
+    text = "a" * 300 + ". " + "b" * 50 + " " + "c" * 300
+    assert split_text(text) == ["a" * 300 + ".", "b" * 50 + " " + "c" * 300]
+
+
+def test_then_space():
+    text = "a" * 300 + " " + "b" * 300
+    assert split_text(text) == ["a" * 300, "b" * 300]
+
+
+def test_hard_cut_without_spaces():
+    text = "a" * 1200
+    assert split_text(text) == ["a" * 500, "a" * 500, "a" * 200]
+
+
+def test_boundaries_in_the_first_half_are_ignored():
+    # A quebra de parágrafo cedo demais daria trechos curtos; o corte vai para o último espaço
+    text = "a" * 100 + "\n" + "b " * 300
+    chunks = split_text(text)
+    assert len(chunks[0]) > MAX_CHUNK_LENGTH // 2
+
+
+def test_blank_text_has_no_chunks():
+    assert split_text("") == []
+    assert split_text(" \n\t ") == []
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_stream_offsets_match_the_string_chunker(seed):
+    rng = random.Random(seed)
+    paragraphs = [random_text(rng, rng.choice([0, 5, 80, 400, 1500])) for _ in range(60)]
+    text = '\n'.join(paragraphs)
+    expected = [(start, end, text[start:end]) for start, end in iter_chunk_offsets(text)]
+    assert list(iter_stream_chunk_offsets(iter(paragraphs))) == expected
+    assert list(iter_text_chunks(paragraphs)) == list(iter_text_chunks(text)) == expected
+
+
+def test_stream_starts_before_the_end_of_the_document():
+    read = []
+
+    def paragraphs():
+        for i in range(100):
+            read.append(i)
+            yield "Uma frase do documento. " * 10
+
+    first = next(iter_stream_chunk_offsets(paragraphs()))
+    assert first[0] == 0
+    assert len(read) < 100
@@ -0,0 +1,67 @@
+import random
+
+import highlight_index
+from highlight_index import HighlightIndex, text_byte_offsets
+
+
+def test_byte_offsets_match_encoding_the_prefix(tmp_path, monkeypatch):
+    monkeypatch.setattr(highlight_index, 'TEXT_BLOCK_CHARS', 13)
+    rng = random.Random(3)
+    text = ''.join(rng.choice("ab \nçã€😀") for _ in range(500))
+    path = tmp_path / "texto.txt"
+    path.write_bytes(text.encode('utf-8'))
+    offsets = sorted(rng.randint(0, len(text)) for _ in range(120)) + [0, len(text), len(text) + 5]
+    offsets.sort()
+    expected = [len(text[:offset].encode('utf-8')) for offset in offsets]
+    assert text_byte_offsets(str(path), offsets) == expected
+
+
+def test_byte_offsets_of_empty_file(tmp_path):
+    path = tmp_path / "vazio.txt"
+    path.write_bytes(b'')
+    assert text_byte_offsets(str(path), [0, 3]) == [0, 0]
+
+
+def make_index():
+    # Trechos de 0-1000, 1000-2500 e 2500-3000 ms; o texto tem um espaço entre os trechos
+    return HighlightIndex([(0, 1000, 0, 10), (1000, 2500, 11, 30), (2500, 3000, 31, 40)])
+
+
+def test_time_lookup_at_and_between_boundaries():
+    index = make_index()
+    assert index.at_time(-1) == -1
+    assert index.at_time(0) == 0
+    assert index.at_time(999.9) == 0
+    assert index.at_time(1000) == 1  # O início exato pertence ao trecho que começa ali
+    assert index.at_time(2499.9) == 1
+    assert index.at_time(2500) == 2
+    assert index.at_time(3000) == 2  # No fim, e depois dele, fica o último trecho
+    assert index.at_time(10 ** 9) == 2
+    assert index.duration_ms == 3000
+
+
+def test_char_lookup_at_and_between_boundaries():
+    index = make_index()
+    assert index.at_char(-1) == -1
+    assert index.at_char(0) == 0
+    assert index.at_char(9) == 0
+    assert index.at_char(10) == 0  # O espaço entre trechos fica com o anterior
+    assert index.at_char(11) == 1
+    assert index.at_char(31) == 2
+    assert index.at_char(1000) == 2
+
+
+def test_empty_index():
+    index = HighlightIndex()
+    assert len(index) == 0
+    assert index.duration_ms == 0.0
+    assert index.at_time(0) == -1
+    assert index.at_char(0) == -1
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = HighlightIndex([(0, 1000.04, 0, 5), (1000.04, 2000.46, 6, 9)])
+    path = str(tmp_path / "doc.index.json")
+    index.save(path)
+    loaded = HighlightIndex.load(path)
+    assert [loaded.entry(i) for i in range(len(loaded))] == [(0, 1000.0, 0, 5), (1000.0, 2000.5, 6, 9)]
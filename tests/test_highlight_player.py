@@ -0,0 +1,179 @@
+import highlight_player
+from highlight_player import StreamingHighlightPlayer, TextOffsets, TextWidgetView
+
+
+class FakeSound:
+    def __init__(self, file):
+        self.data = file.read()
+
+
+class FakeChannel:
+    """Canal que termina o trecho atual a cada chamada de finish_sound()"""
+
+    def __init__(self):
+        self.sound = None
+        self.next = None
+
+    def play(self, sound):
+        self.sound, self.next = sound, None
+
+    def queue(self, sound):
+        self.next = sound
+
+    def finish_sound(self):
+        self.sound, self.next = self.next, None
+
+    def get_busy(self):
+        return self.sound is not None
+
+    def get_sound(self):
+        return self.sound
+
+    def stop(self):
+        self.sound = self.next = None
+
+
+class FakeMixer:
+    Sound = FakeSound
+
+    def __init__(self):
+        self.channel = FakeChannel()
+
+    def find_channel(self, force):
+        return self.channel
+
+
+class FakeView:
+    def __init__(self):
+        self.highlighted = None
+
+    def highlight(self, tag, start, end):
+        self.highlighted = (start, end)
+
+    def clear_highlight(self, tag):
+        self.highlighted = None
+
+    def tag_config(self, tag, **options):
+        pass
+
+    def after(self, delay, callback):
+        return object()  # Os testes chamam _tick() diretamente
+
+    def after_cancel(self, after_id):
+        pass
+
+
+def test_streaming_keeps_only_a_window_of_decoded_chunks(monkeypatch):
+    mixer = FakeMixer()
+    monkeypatch.setattr(highlight_player, '_mixer', lambda: mixer)
+    player = StreamingHighlightPlayer(FakeView())
+    player.play()
+    count = 20
+    for i in range(count):
+        player.feed(f"mp3-{i}".encode(), i * 1000.0, (i + 1) * 1000.0, i * 10, (i + 1) * 10)
+    player.finish()
+
+    limit = highlight_player.SOUND_WINDOW_BEHIND + highlight_player.SOUND_WINDOW_AHEAD + 1
+    played = []
+    player._tick()
+    while player._playing >= 0:
+        played.append(mixer.channel.sound.data)
+        assert player.view.highlighted == (player._playing * 10, (player._playing + 1) * 10)
+        assert len(player._sounds) <= limit
+        mixer.channel.finish_sound()
+        player._tick()
+    assert played == [f"mp3-{i}".encode() for i in range(count)]
+
+
+def test_seek_decodes_a_dropped_chunk_again(monkeypatch):
+    mixer = FakeMixer()
+    monkeypatch.setattr(highlight_player, '_mixer', lambda: mixer)
+    player = StreamingHighlightPlayer(FakeView())
+    player.play()
+    for i in range(10):
+        player.feed(f"mp3-{i}".encode(), i * 1000.0, (i + 1) * 1000.0, i * 10, (i + 1) * 10)
+    player._tick()
+    player.seek(8500)
+    assert mixer.channel.sound.data == b"mp3-8"
+    assert 0 not in player._sounds
+    player.seek(0)
+    assert mixer.channel.sound.data == b"mp3-0"
+    assert 8 not in player._sounds
+
+
+def test_stop_deletes_the_spool_and_ignores_later_chunks(monkeypatch):
+    mixer = FakeMixer()
+    monkeypatch.setattr(highlight_player, '_mixer', lambda: mixer)
+    player = StreamingHighlightPlayer(FakeView())
+    player.play()
+    player.feed(b"mp3-0", 0.0, 1000.0, 0, 10)
+    player._tick()
+    spool = player._spool
+    player.stop()
+    assert spool.closed
+    player.feed(b"mp3-1", 1000.0, 2000.0, 11, 20)  # A síntese ainda pode entregar trechos
+    player.seek(0)
+    player._tick()
+    assert mixer.channel.sound is None
+
+
+TEXT = "Título\nação e coração\n\núltima línea €\n"
+
+
+def tk_index_of(text, offset):
+    """Conversão de referência: conta as quebras de linha antes da posição"""
+    line = text.count('\n', 0, offset)
+    column = offset - (text.rfind('\n', 0, offset) + 1)
+    return f"{line + 1}.{column}"
+
+
+def test_offsets_to_tk_and_back():
+    offsets = TextOffsets(TEXT)
+    for offset in range(len(TEXT) + 1):
+        tk_index = offsets.to_tk(offset)
+        assert tk_index == tk_index_of(TEXT, offset)
+        assert offsets.from_tk(tk_index) == offset
+    assert offsets.to_tk(0) == "1.0"
+    assert offsets.to_tk(TEXT.index("ação")) == "2.0"
+    assert offsets.to_tk(TEXT.index("coração")) == "2.7"
+    assert offsets.to_tk(TEXT.index("€")) == "4.13"
+
+
+def test_offsets_clamp_lines_past_the_end():
+    offsets = TextOffsets("um\ndois")
+    assert offsets.from_tk("9.0") == len("um\n")  # O Tk devolve linhas além do fim em "end"
+    assert TextOffsets("").to_tk(0) == "1.0"
+
+
+class FakeText:
+    def __init__(self, text):
+        self.text = text
+        self.tags = []
+
+    def get(self, start, end):
+        return self.text + "\n"
+
+    def tag_config(self, tag, **options):
+        pass
+
+    def tag_add(self, tag, start, end):
+        self.tags.append(('add', tag, start, end))
+
+    def tag_remove(self, tag, start, end):
+        self.tags.append(('remove', tag, start, end))
+
+    def see(self, index):
+        pass
+
+    def index(self, tk_index):
+        return tk_index
+
+
+def test_text_widget_view_highlights_by_offset():
+    widget = FakeText(TEXT)
+    view = TextWidgetView(widget)
+    view.highlight("hl", TEXT.index("coração"), TEXT.index("coração") + len("coração"))
+    view.highlight("hl", TEXT.index("línea"), TEXT.index("línea") + len("línea"))
+    assert widget.tags == [('add', "hl", "2.7", "2.14"), ('remove', "hl", "2.7", "2.14"),
+                           ('add', "hl", "4.7", "4.12")]
+    assert view.offset_at("4.7") == TEXT.index("línea")
@@ -0,0 +1,33 @@
+import pytest
+
+from http_files import parse_range
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('', None),
+    ('bytes=0-99', (0, 99)),
+    ('bytes=100-', (100, 999)),
+    ('bytes=900-5000', (900, 999)),
+    ('bytes=-100', (900, 999)),
+    ('bytes=-5000', (0, 999)),
+    ('bytes=999-999', (999, 999)),
+    (' bytes=1-2 ', (1, 2)),
+])
+def test_valid_or_ignored_ranges(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize('header', ['bytes=0-1,5-6', 'items=0-1', 'bytes=-', 'bytes=a-b'])
+def test_unsupported_ranges_serve_the_whole_file(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize('header', ['bytes=1000-', 'bytes=1000-2000', 'bytes=50-10', 'bytes=-0'])
+def test_unsatisfiable_ranges(header):
+    assert parse_range(header, 1000) == 'invalid'
+
+
+@pytest.mark.parametrize('header', ['bytes=0-', 'bytes=0-10', 'bytes=-1', 'bytes=-500'])
+def test_empty_file_has_no_satisfiable_range(header):
+    assert parse_range(header, 0) == 'invalid'
@@ -0,0 +1,25 @@
+from incremental import match_chunks
+
+
+def test_identical_lists_reuse_everything():
+    assert match_chunks(['a', 'b', 'c'], ['a', 'b', 'c']) == {0: 0, 1: 1, 2: 2}
+
+
+def test_edit_in_the_middle_keeps_both_sides():
+    assert match_chunks(['a', 'b', 'c', 'd'], ['a', 'x', 'c', 'd']) == {0: 0, 2: 2, 3: 3}
+
+
+def test_insertion_shifts_the_following_chunks():
+    assert match_chunks(['a', 'b', 'c'], ['new', 'a', 'b', 'c']) == {1: 0, 2: 1, 3: 2}
+
+
+def test_deletion_and_empty_lists():
+    assert match_chunks(['a', 'b', 'c'], ['a', 'c']) == {0: 0, 1: 2}
+    assert match_chunks([], ['a']) == {}
+    assert match_chunks(['a'], []) == {}
+
+
+def test_repeated_keys_are_not_treated_as_junk():
+    old = ['same'] * 300 + ['end']
+    new = ['same'] * 300 + ['other']
+    assert match_chunks(old, new) == {i: i for i in range(300)}
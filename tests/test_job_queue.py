@@ -0,0 +1,120 @@
+import sqlite3
+import threading
+
+from job_queue import JobQueue, SCHEMA, QUEUED, RUNNING, DONE, FAILED, CANCELLED
+
+
+def make_queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"))
+
+
+def test_jobs_are_claimed_in_submission_order(tmp_path):
+    queue = make_queue(tmp_path)
+    first = queue.submit("a.txt", "/in/a.txt", "/out/a")
+    second = queue.submit("b.txt", "/in/b.txt", "/out/b")
+    assert queue.get(first)['status'] == QUEUED
+    assert queue.claim(timeout=0)['id'] == first
+    assert queue.claim(timeout=0)['id'] == second
+    assert queue.claim(timeout=0) is None
+    assert queue.get(first)['status'] == RUNNING
+
+
+def test_progress_and_finish(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("a.txt", "/in/a.txt", "/out/a")
+    queue.claim(timeout=0)
+    queue.update_progress(job_id, 2, 8)
+    assert queue.get(job_id)['progress'] == 0.25
+    queue.finish(job_id, {'chunks': 8})
+    job = queue.get(job_id)
+    assert job['status'] == DONE
+    assert job['result'] == {'chunks': 8}
+    assert queue.counts() == {DONE: 1}
+
+
+def test_failure_is_recorded(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("a.txt", "/in/a.txt", "/out/a")
+    queue.claim(timeout=0)
+    queue.fail(job_id, "ValueError: ruim")
+    assert queue.get(job_id)['status'] == FAILED
+    assert queue.get(job_id)['error'] == "ValueError: ruim"
+
+
+def test_cancel_wins_over_a_late_finish(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("a.txt", "/in/a.txt", "/out/a")
+    queue.claim(timeout=0)
+    assert queue.cancel(job_id)
+    queue.finish(job_id, {'chunks': 1})
+    assert queue.get(job_id)['status'] == CANCELLED
+    assert not queue.cancel(job_id)
+
+
+def test_cancelled_queued_job_is_never_claimed(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("a.txt", "/in/a.txt", "/out/a")
+    assert queue.cancel(job_id)
+    assert queue.claim(timeout=0) is None
+
+
+def test_requeue_leaves_jobs_of_other_owners_running(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first, second = JobQueue(path, owner='a'), JobQueue(path, owner='b')
+    mine = first.submit("a.txt", "/in/a.txt", "/out/a")
+    first.claim(timeout=0)
+    theirs = second.submit("b.txt", "/in/b.txt", "/out/b")
+    second.claim(timeout=0)
+    assert second.get(theirs)['owner'] == 'b'
+
+    assert JobQueue(path, owner='a').requeue_interrupted() == 1  # O processo "a" reiniciou
+    assert first.get(mine)['status'] == QUEUED
+    assert first.get(theirs)['status'] == RUNNING
+
+
+def test_database_without_owner_column_is_migrated(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    with sqlite3.connect(path) as db:
+        db.executescript(SCHEMA.replace(",\n    owner TEXT", ""))
+        db.execute("INSERT INTO jobs (id, status, filename, source_path, output_dir, created_at) "
+                   "VALUES ('x', ?, 'a.txt', '/in/a.txt', '/out/a', 0)", (RUNNING,))
+    db.close()
+    queue = JobQueue(path, owner='a')
+    assert queue.requeue_interrupted() == 1
+    assert queue.get('x')['status'] == QUEUED
+
+
+def test_interrupted_jobs_go_back_to_the_queue(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("a.txt", "/in/a.txt", "/out/a")
+    queue.claim(timeout=0)
+    queue.update_progress(job_id, 3, 10)
+    assert make_queue(tmp_path).requeue_interrupted() == 1
+    job = queue.get(job_id)
+    assert job['status'] == QUEUED
+    assert job['done_chunks'] == 0
+
+
+def test_concurrent_workers_never_share_a_job(tmp_path):
+    queue = make_queue(tmp_path)
+    ids = {queue.submit(f"{i}.txt", f"/in/{i}.txt", f"/out/{i}") for i in range(40)}
+    claimed = []
+    lock = threading.Lock()
+
+    def worker():
+        while (job := queue.claim(timeout=0)) is not None:
+            with lock:
+                claimed.append(job['id'])
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(ids)
+
+
+def test_claim_wakes_up_on_submit(tmp_path):
+    queue = make_queue(tmp_path)
+    threading.Timer(0.05, queue.submit, ("a.txt", "/in/a.txt", "/out/a")).start()
+    assert queue.claim(timeout=2) is not None
@@ -0,0 +1,114 @@
+import re
+import json
+import threading
+
+import pytest
+
+from metrics import Metrics, Histogram, METRIC_PREFIX
+
+
+def test_nested_spans_make_valid_chrome_trace(tmp_path):
+    metrics = Metrics()
+    metrics.start_tracing()
+    with metrics.collect_stages() as stages:
+        with metrics.span('convert', source='doc.txt'):
+            with metrics.span('read'):
+                pass
+            with metrics.span('synthesize'):
+                pass
+
+    def work():
+        with metrics.span('worker'):
+            pass
+
+    worker = threading.Thread(target=work, name='trabalhador')
+    worker.start()
+    worker.join()
+    path = tmp_path / "trace.json"
+    metrics.save_trace(str(path))
+    trace = json.loads(path.read_text(encoding='utf-8'))
+
+    events = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+    names = {event['tid']: event['args']['name'] for event in trace['traceEvents'] if event['ph'] == 'M'}
+    assert [event['name'] for event in events] == ['read', 'synthesize', 'convert', 'worker']
+    assert names[events[-1]['tid']] == 'trabalhador' and events[-1]['tid'] != events[0]['tid']
+    for event in events:
+        assert set(event) >= {'name', 'ph', 'pid', 'tid', 'ts', 'dur'}
+        assert event['dur'] >= 0 and event['ts'] >= 0
+        assert event['tid'] in names
+    by_name = {event['name']: event for event in events}
+    outer = by_name['convert']
+    assert outer['args'] == {'source': 'doc.txt'}
+    for inner in (by_name['read'], by_name['synthesize']):
+        assert outer['ts'] <= inner['ts'] and inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur'] + 0.2
+    # O tempo próprio da etapa externa desconta o das internas
+    assert set(stages) == {'convert', 'read', 'synthesize'}
+    assert stages['convert'] <= outer['dur'] / 1e6 - stages['read'] - stages['synthesize'] + 1e-6
+
+
+def test_tracing_off_records_no_events():
+    metrics = Metrics()
+    with metrics.span('etapa'):
+        pass
+    assert metrics.chrome_trace()['traceEvents'] == []
+
+
+def parse_prometheus(text):
+    types, samples = {}, {}
+    for line in text.splitlines():
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            types[name] = kind
+        elif line and not line.startswith('#'):
+            series, value = line.rsplit(' ', 1)
+            samples[series] = float(value)
+    return types, samples
+
+
+def test_prometheus_names_types_and_histogram_series():
+    metrics = Metrics()
+    metrics.count('chunks_total', 3, source='synthesized')
+    metrics.count('chunks_total', source='reused')
+    metrics.set_gauge('workers_running', 2)
+    for value in (0.002, 0.02, 0.2, 100.0):
+        metrics.observe('chunk_synthesis_seconds', value, engine='stub')
+    text = metrics.prometheus_text()
+    types, samples = parse_prometheus(text)
+
+    chunks, gauge, hist = (METRIC_PREFIX + name for name in ('chunks_total', 'workers_running',
+                                                             'chunk_synthesis_seconds'))
+    assert types == {chunks: 'counter', gauge: 'gauge', hist: 'histogram'}
+    assert f"# HELP {chunks} " in text
+    assert samples[f'{chunks}{{source="synthesized"}}'] == 3
+    assert samples[f'{chunks}{{source="reused"}}'] == 1
+    assert samples[gauge] == 2
+    buckets = [(series, value) for series, value in samples.items() if series.startswith(hist + '_bucket')]
+    assert all(re.fullmatch(re.escape(hist) + r'_bucket\{engine="stub",le="[^"]+"\}', series) for series, _ in buckets)
+    counts = [value for _, value in buckets]
+    assert counts == sorted(counts)  # Cumulativos
+    assert buckets[-1] == (f'{hist}_bucket{{engine="stub",le="+Inf"}}', 4)
+    assert samples[f'{hist}_bucket{{engine="stub",le="0.025"}}'] == 2
+    assert samples[f'{hist}_count{{engine="stub"}}'] == 4
+    assert samples[f'{hist}_sum{{engine="stub"}}'] == pytest.approx(100.222)
+
+
+def test_label_values_are_escaped():
+    metrics = Metrics()
+    metrics.count('conversions_total', source='a"b\\c\nd')
+    assert 'source="a\\"b\\\\c\\nd"' in metrics.prometheus_text()
+
+
+@pytest.mark.parametrize('values', [[0.003], [0.003, 0.004, 0.0041], [0.2] * 10 + [0.9], [5000.0, 7000.0]])
+def test_histogram_quantiles_stay_within_the_observed_max(values):
+    histogram = Histogram()
+    for value in values:
+        histogram.observe(value)
+    for q in (0.5, 0.95, 1.0):
+        estimate = histogram.quantile(q)
+        assert estimate <= max(values)
+        # Limite superior: ao menos a fração q das observações fica abaixo dele
+        assert sum(value <= estimate for value in values) >= q * len(values)
+
+
+def test_empty_histogram_has_no_quantile():
+    assert Histogram().quantile(0.5) is None
@@ -0,0 +1,60 @@
+from mp3_frames import Mp3FrameWriter, iter_frames, parse_header, mp3_duration_ms, read_range, TOC_STEP
+from tts_engines import SILENT_FRAME
+
+FRAME_MS = 576 * 1000 / 24000
+
+
+def test_concatenation_keeps_every_audio_frame(tmp_path):
+    path = tmp_path / "out.mp3"
+    writer = Mp3FrameWriter(str(path))
+    spans = [writer.write(SILENT_FRAME * frames) for frames in (3, 5, 7)]
+    writer.close()
+    data = path.read_bytes()
+
+    assert len(list(iter_frames(data))) == 15
+    assert mp3_duration_ms(data) == 15 * FRAME_MS
+    assert [(span['start_ms'], span['end_ms']) for span in spans] == [
+        (0, 3 * FRAME_MS), (3 * FRAME_MS, 8 * FRAME_MS), (8 * FRAME_MS, 15 * FRAME_MS)]
+    for span, frames in zip(spans, (3, 5, 7)):
+        assert read_range(str(path), span['offset'], span['size']) == SILENT_FRAME * frames
+    assert not (tmp_path / "out.mp3.part").exists()
+
+
+def test_info_frame_carries_frame_count_and_toc(tmp_path):
+    path = tmp_path / "out.mp3"
+    writer = Mp3FrameWriter(str(path))
+    frames = TOC_STEP * 4
+    writer.write(SILENT_FRAME * frames)
+    writer.close()
+    data = path.read_bytes()
+
+    header = parse_header(data, 0)
+    tag = 4 + header.side_info_length
+    assert data[tag:tag + 4] == b'Info'  # Um só bitrate: CBR
+    assert int.from_bytes(data[tag + 8:tag + 12], 'big') == frames
+    assert int.from_bytes(data[tag + 12:tag + 16], 'big') == len(data)
+    toc = data[tag + 16:tag + 116]
+    assert list(toc) == sorted(toc)
+    assert toc[0] * len(data) // 256 <= header.length
+
+
+def test_input_tags_and_info_frames_are_dropped(tmp_path):
+    path = tmp_path / "first.mp3"
+    writer = Mp3FrameWriter(str(path))
+    writer.write(SILENT_FRAME * 2)
+    writer.close()
+    tagged = b'ID3\x04\x00\x00\x00\x00\x00\x05' + bytes(5) + path.read_bytes()
+
+    out = tmp_path / "out.mp3"
+    writer = Mp3FrameWriter(str(out))
+    span = writer.write(tagged)
+    writer.close()
+    assert span['size'] == 2 * len(SILENT_FRAME)
+    assert len(list(iter_frames(out.read_bytes()))) == 2
+
+
+def test_abort_removes_the_partial_file(tmp_path):
+    writer = Mp3FrameWriter(str(tmp_path / "out.mp3"))
+    writer.write(SILENT_FRAME)
+    writer.abort()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,123 @@
+import zipfile
+
+import pytest
+
+import readers
+from readers import iter_docx_paragraphs, docx_to_text, pdf_to_text
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'content-types"><Default Extension="rels" ContentType="application/vnd.openxmlformats-package.'
+    'relationships+xml"/><Default Extension="xml" ContentType="application/xml"/><Override PartName='
+    '"/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.'
+    'document.main+xml"/></Types>')
+RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.openxmlformats.org/package/'
+    '2006/relationships"><Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'relationships/officeDocument" Target="word/document.xml"/></Relationships>')
+
+
+def paragraph(text):
+    return f'<w:p><w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+
+
+BODY = (
+    paragraph('Título')
+    + '<w:sdt><w:sdtPr/><w:sdtContent>' + paragraph('Sumario') + '</w:sdtContent></w:sdt>'
+    + '<w:tbl><w:tr><w:tc>' + paragraph('célula') + '</w:tc></w:tr></w:tbl>'
+    + '<w:p><w:r><w:t>Antes</w:t></w:r><w:r><w:pict><w:txbxContent>' + paragraph('caixa')
+    + '</w:txbxContent></w:pict></w:r><w:r><w:tab/><w:t>depois</w:t><w:br/><w:t>fim</w:t></w:r></w:p>'
+    + '<w:p><w:hyperlink><w:r><w:t>link</w:t></w:r></w:hyperlink></w:p>'
+    + paragraph('Último')
+    + '<w:sectPr/>')
+
+
+@pytest.fixture
+def docx_path(tmp_path):
+    path = tmp_path / "doc.docx"
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+        archive.writestr('_rels/.rels', RELS)
+        archive.writestr('word/document.xml',
+                         '<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="http://schemas.'
+                         'openxmlformats.org/wordprocessingml/2006/main"><w:body>' + BODY + '</w:body></w:document>')
+    return str(path)
+
+
+def test_only_body_paragraphs_are_read(docx_path):
+    assert list(iter_docx_paragraphs(docx_path)) == ['Título', 'Antes\tdepois\nfim', 'link', 'Último']
+
+
+def test_matches_python_docx(docx_path):
+    docx = pytest.importorskip('docx')
+    expected = '\n'.join(p.text for p in docx.Document(docx_path).paragraphs)
+    assert docx_to_text(docx_path) == expected
+
+
+def write_pdf(path, texts):
+    """Grava um PDF mínimo com uma página de texto para cada item de texts"""
+    count = len(texts)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(count))
+               + b"] /Count %d >>" % count,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    for i, text in enumerate(texts):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode('latin-1') + b") Tj ET"
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >>"
+                       b" /Contents %d 0 R >>" % (5 + 2 * i))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    pytest.importorskip('PyPDF2')
+    return write_pdf(tmp_path / "doc.pdf", [f"Pagina {i}" for i in range(1, 8)])
+
+
+def test_pdf_page_range(pdf):
+    assert pdf_to_text(pdf, workers=1).splitlines() == [f"Pagina {i}" for i in range(1, 8)]
+    assert pdf_to_text(pdf, first_page=3, last_page=5, workers=1).splitlines() == ["Pagina 3", "Pagina 4", "Pagina 5"]
+    assert pdf_to_text(pdf, first_page=6, last_page=100, workers=1).splitlines() == ["Pagina 6", "Pagina 7"]
+    assert pdf_to_text(pdf, first_page=0, last_page=1, workers=1) == "Pagina 1"
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_pdf_progress_by_batch(pdf, monkeypatch, workers):
+    monkeypatch.setattr(readers, 'PDF_BATCH_PAGES', 2)
+    calls = []
+    text = pdf_to_text(pdf, workers=workers, progress=lambda done, total: calls.append((done, total)))
+    assert text.splitlines() == [f"Pagina {i}" for i in range(1, 8)]
+    assert calls[0] == (0, 7) and calls[-1] == (7, 7)
+    assert len(calls) == 1 + 4  # Lotes de 2, 2, 2 e 1 páginas
+    assert [done for done, _ in calls] == sorted(done for done, _ in calls)
+
+
+def test_pdf_cache_reuses_pages_and_page_count(pdf, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    assert pdf_to_text(pdf, last_page=3, workers=1, cache_dir=cache_dir).splitlines()[-1] == "Pagina 3"
+
+    extracted = []
+    original = readers._extract_pdf_pages
+    monkeypatch.setattr(readers, '_extract_pdf_pages',
+                        lambda path, pages: extracted.extend(pages) or original(path, pages))
+    monkeypatch.setattr(readers, 'pdf_page_count', lambda path: pytest.fail("o PDF foi analisado de novo"))
+    calls = []
+    text = pdf_to_text(pdf, workers=1, cache_dir=cache_dir, progress=lambda done, total: calls.append(done))
+    assert text.splitlines() == [f"Pagina {i}" for i in range(1, 8)]
+    assert extracted == [3, 4, 5, 6]  # Só as páginas que faltavam
+    assert calls[0] == 3
+
+    extracted.clear()
+    assert pdf_to_text(pdf, workers=1, cache_dir=cache_dir) == text
+    assert extracted == []
@@ -0,0 +1,88 @@
+import time
+import random
+import threading
+
+import pytest
+
+from synthesis import synthesize_chunks, synthesize_with_retry, SynthesisCancelled
+from tts_engines import StubEngine
+
+
+class JitterEngine:
+    """Motor que responde com latências aleatórias, para embaralhar a ordem de conclusão"""
+
+    name = 'jitter'
+
+    def __init__(self, seed=1):
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def __call__(self, text, lang='pt'):
+        with self.lock:
+            delay = self.random.uniform(0, 0.01)
+        time.sleep(delay)
+        return text.encode('utf-8')
+
+
+class FlakyEngine:
+    """Motor que falha nas primeiras `failures` chamadas de cada trecho"""
+
+    name = 'flaky'
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, text, lang='pt'):
+        with self.lock:
+            self.calls[text] = self.calls.get(text, 0) + 1
+            calls = self.calls[text]
+        if calls <= self.failures:
+            raise ConnectionError("falha simulada")
+        return text.encode('utf-8')
+
+
+def test_results_keep_the_original_order():
+    parts = [f"trecho {i}" for i in range(60)]
+    results = list(synthesize_chunks(parts, JitterEngine(), workers=8))
+    assert [index for index, _ in results] == list(range(60))
+    assert [data.decode('utf-8') for _, data in results] == parts
+
+
+def test_parts_are_consumed_lazily():
+    consumed = []
+
+    def parts():
+        for i in range(100):
+            consumed.append(i)
+            yield f"trecho {i}"
+
+    results = synthesize_chunks(parts(), StubEngine(latency=0), workers=2)
+    next(results)
+    assert len(consumed) <= 2 * 2 + 1
+    results.close()
+
+
+def test_retry_recovers_from_transient_errors():
+    engine = FlakyEngine(failures=2)
+    results = list(synthesize_chunks(["a", "b"], engine, workers=2, retries=2, backoff=0))
+    assert [data for _, data in results] == [b"a", b"b"]
+    assert engine.calls == {"a": 3, "b": 3}
+
+
+def test_retry_gives_up_after_the_last_attempt():
+    engine = FlakyEngine(failures=5)
+    with pytest.raises(ConnectionError):
+        synthesize_with_retry(engine, "a", retries=2, backoff=0)
+    assert engine.calls == {"a": 3}
+
+
+def test_cancel_interrupts_the_wait():
+    cancel = threading.Event()
+    results = synthesize_chunks([f"t{i}" for i in range(20)], StubEngine(latency=0.5), workers=2, cancel=cancel)
+    threading.Timer(0.05, cancel.set).start()
+    start = time.perf_counter()
+    with pytest.raises(SynthesisCancelled):
+        list(results)
+    assert time.perf_counter() - start < 0.4
@@ -0,0 +1,48 @@
+import random
+
+import text_view
+from text_view import TextStore
+
+
+def check(store, model):
+    assert len(store) == len(model)
+    assert store.text() == model
+    expected_lines = [0] + [i + 1 for i, char in enumerate(model) if char == '\n']
+    assert list(store.line_starts) == expected_lines
+    assert all(len(block) <= text_view.BLOCK_CHARS for block in store.blocks)
+
+
+def test_slice_and_lines_across_blocks(monkeypatch):
+    monkeypatch.setattr(text_view, 'BLOCK_CHARS', 7)
+    model = "primeira linha\nsegunda\n\nquarta com acentuação\n"
+    store = TextStore(model)
+    check(store, model)
+    for start in range(len(model) + 1):
+        for end in range(start, len(model) + 2):
+            assert store.slice(start, end) == model[start:end]
+    assert store.line_of(0) == 0
+    assert store.line_of(model.index('segunda')) == 1
+    assert store.line_start(3) == model.index('quarta')
+
+
+def test_random_replacements_match_a_plain_string(monkeypatch):
+    monkeypatch.setattr(text_view, 'BLOCK_CHARS', 16)
+    rng = random.Random(7)
+    alphabet = "abc \nçã€"
+    model = ''.join(rng.choice(alphabet) for _ in range(200))
+    store = TextStore(model)
+    for _ in range(300):
+        start = rng.randint(0, len(model))
+        end = rng.randint(start, min(len(model), start + 40))
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        store.replace(start, end, text)
+        model = model[:start] + text + model[end:]
+        check(store, model)
+
+
+def test_empty_store():
+    store = TextStore()
+    assert len(store) == 0
+    assert store.slice(0, 10) == ''
+    store.replace(0, 0, "a\nb")
+    check(store, "a\nb")
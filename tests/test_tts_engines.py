@@ -0,0 +1,33 @@
+import pytest
+
+from tts_engines import StubEngine, SILENT_FRAME, create_engine
+
+
+def test_stub_returns_silence_proportional_to_the_text():
+    engine = StubEngine(latency=0, frames_per_char=2)
+    assert engine("abc") == SILENT_FRAME * 6
+    assert engine.latency_stats()['chunks'] == 1
+
+
+def test_latency_stats_use_bounded_memory():
+    engine = StubEngine(latency=0)
+    for i in range(20000):
+        engine.record_latency(0.1 + (i % 100) / 1000)  # De 100 a 199 ms
+    stats = engine.latency_stats()
+    assert len(engine.latencies.counts) == len(engine.latencies.buckets) + 1
+    assert stats['chunks'] == 20000
+    assert stats['mean'] == pytest.approx(0.1495, abs=1e-4)
+    assert stats['max'] == pytest.approx(0.199)
+    assert 0.149 <= stats['p50'] <= 0.149 * 1.25
+    assert 0.189 <= stats['p95'] <= stats['max']
+
+
+def test_errors_are_counted():
+    engine = StubEngine(latency=0)
+    engine.record_error()
+    assert engine.latency_stats() == {'engine': 'stub', 'chunks': 0, 'errors': 1}
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        create_engine('nenhum')
@@ -0,0 +1,65 @@
+import os
+import json
+import socket
+import threading
+import http.client
+
+import pytest
+
+import web_service
+from tts_engines import StubEngine
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = web_service.create_server(port=0, data_dir=str(tmp_path), workers=1,
+                                       synthesize=StubEngine(latency=0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.workers.stop()
+    server.server_close()
+
+
+def request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.request(method, path, body, headers or {})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b'null')
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize('limit', ['abc', '-1', '1.5'])
+def test_list_rejects_invalid_limit(server, limit):
+    status, payload = request(server, 'GET', f'/jobs?limit={limit}')
+    assert status == 400
+    assert 'limit' in payload['error']
+
+
+def test_list_caps_limit(server, monkeypatch):
+    limits = []
+    monkeypatch.setattr(server.queue, 'list', lambda limit: limits.append(limit) or [])
+    assert request(server, 'GET', '/jobs?limit=999999999')[0] == 200
+    assert request(server, 'GET', '/jobs?limit=5')[0] == 200
+    assert request(server, 'GET', '/jobs')[0] == 200
+    assert limits == [web_service.MAX_LIST_LIMIT, 5, web_service.DEFAULT_LIST_LIMIT]
+
+
+def test_truncated_upload_is_discarded(server):
+    with socket.create_connection(server.server_address, timeout=10) as sock:
+        sock.sendall(b"POST /jobs?filename=doc.txt HTTP/1.1\r\nHost: x\r\nContent-Length: 1000\r\n\r\n"
+                     b"apenas parte do texto")
+        sock.shutdown(socket.SHUT_WR)
+        response = sock.makefile('rb').read()
+    assert response.startswith(b"HTTP/1.0 400") or response.startswith(b"HTTP/1.1 400")
+    assert server.queue.list() == []
+    assert os.listdir(os.path.join(server.data_dir, 'uploads')) == []
+
+
+def test_complete_upload_is_queued(server):
+    status, job = request(server, 'POST', '/jobs?filename=doc.txt', "Um documento curto.".encode())
+    assert status == 202
+    assert [listed['id'] for listed in server.queue.list()] == [job['id']]
@@ -0,0 +1,253 @@
+import re
+from array import array
+from bisect import bisect_right
+
+BLOCK_CHARS = 64 * 1024  # Tamanho dos blocos do texto guardado
+WINDOW_CHARS = 120_000  # Caracteres colocados no widget de cada vez
+EDGE_FRACTION = 0.15  # Fração da janela perto das bordas que faz a janela ser recentrada
+LINE_SNAP_CHARS = WINDOW_CHARS // 4  # Maior recuo aceito para começar a janela no início de uma linha
+
+
+class TextStore:
+    """Texto completo em blocos de até BLOCK_CHARS caracteres, com a tabela de inícios de linha
+
+    Cada bloco é uma str independente, então um caractere fora do Latin-1
+    só alarga a representação do próprio bloco, e substituir um trecho
+    reconstrói apenas os blocos afetados. Os inícios de bloco e de linha
+    ficam em arrays ordenados, consultados por busca binária.
+    """
+
+    def __init__(self, text=''):
+        self.blocks = []
+        self.block_starts = array('Q')
+        self.line_starts = array('Q', [0])
+        self.length = 0
+        self.replace(0, 0, text)
+
+    def __len__(self):
+        return self.length
+
+    def _block_at(self, offset):
+        return max(0, bisect_right(self.block_starts, offset) - 1)
+
+    def slice(self, start, end):
+        """Retorna o texto entre as posições start e end"""
+        start, end = max(0, start), min(end, self.length)
+        if start >= end:
+            return ''
+        first, last = self._block_at(start), self._block_at(end - 1)
+        text = ''.join(self.blocks[first:last + 1])
+        base = self.block_starts[first]
+        return text[start - base:end - base]
+
+    def text(self):
+        return ''.join(self.blocks)
+
+    def replace(self, start, end, text):
+        """Substitui o texto entre start e end, atualizando os blocos e as linhas afetados"""
+        start, end = max(0, start), min(end, self.length)
+        if self.blocks:
+            first, last = self._block_at(start), self._block_at(max(start, end - 1))
+            base = self.block_starts[first]
+            old = ''.join(self.blocks[first:last + 1])
+            merged = old[:start - base] + text + old[end - base:]
+        else:
+            first, last, base, merged = 0, -1, 0, text
+        new_blocks = [merged[i:i + BLOCK_CHARS] for i in range(0, len(merged), BLOCK_CHARS)]
+        delta = len(text) - (end - start)
+        self.blocks[first:last + 1] = new_blocks
+        starts = array('Q', range(base, base + len(merged), BLOCK_CHARS))
+        starts.extend(s + delta for s in self.block_starts[last + 1:])
+        self.block_starts[first:] = starts
+        self.length += delta
+
+        # Linhas: as anteriores a start não mudam; as posteriores a end só se deslocam
+        line = bisect_right(self.line_starts, start)
+        tail = bisect_right(self.line_starts, end)
+        new_lines = array('Q', (start + match.end() for match in re.finditer('\n', text)))
+        new_lines.extend(s + delta for s in self.line_starts[tail:])
+        self.line_starts[line:] = new_lines
+
+    def line_of(self, offset):
+        """Número (a partir de 0) da linha que contém a posição"""
+        return bisect_right(self.line_starts, offset) - 1
+
+    def line_start(self, line):
+        return self.line_starts[min(max(0, line), len(self.line_starts) - 1)]
+
+
+class VirtualTextView:
+    """Mostra num Text do Tk só a janela do texto em torno da região visível
+
+    O texto completo fica num TextStore; o widget recebe cerca de
+    WINDOW_CHARS caracteres, começando num início de linha, e a janela é
+    recentrada quando a rolagem chega perto das bordas. A barra de rolagem
+    representa o documento inteiro. Todas as operações externas (destaque,
+    clique, substituição) usam posições em caracteres do documento, convertidas
+    para índices do widget só dentro da janela. As edições feitas no widget
+    são devolvidas ao TextStore quando a janela muda ou o texto é lido.
+    """
+
+    def __init__(self, widget, scrollbar=None):
+        self.widget = widget
+        self.scrollbar = scrollbar
+        self.store = TextStore()
+        self.window_start = 0
+        self.window_end = 0
+        self._highlights = {}
+        self._recenter_id = None
+        widget.config(yscrollcommand=self._on_widget_scroll)
+        if scrollbar is not None:
+            scrollbar.config(command=self._on_scrollbar)
+
+    # Texto
+
+    def set_text(self, text):
+        """Troca o documento inteiro e mostra o início"""
+        self.store = TextStore(text)
+        self._highlights.clear()
+        self.window_start = self.window_end = 0
+        self.widget.delete("1.0", "end")
+        self._render(0)
+        self.widget.yview("1.0")
+
+    def get_text(self):
+        """Retorna o documento inteiro, incluindo as edições feitas no widget"""
+        self._flush()
+        return self.store.text()
+
+    def replace(self, start, end, text):
+        """Substitui um trecho do documento, esteja ele na janela ou não"""
+        self._flush()
+        top = self._top_offset()
+        self.store.replace(start, end, text)
+        if start < self.window_end:
+            # A janela mudou ou se deslocou; o topo da tela acompanha o texto em volta da edição
+            if top >= end:
+                top += len(text) - (end - start)
+            elif top > start:
+                top = start
+            self._render(top, top)
+
+    def __len__(self):
+        return len(self.store)
+
+    # Conversão de posições
+
+    def to_tk(self, offset):
+        """Índice do widget para uma posição do documento, que precisa estar na janela"""
+        return f"1.0 + {offset - self.window_start} chars"
+
+    def offset_at(self, tk_index):
+        """Posição no documento de um índice do widget (ex.: "@x,y" do ponto clicado)"""
+        count = self.widget.count("1.0", tk_index, "chars")
+        return self.window_start + (count[0] if count else 0)
+
+    def see_offset(self, offset):
+        """Rola até a posição, recentrando a janela se ela estiver fora"""
+        if not self.window_start <= offset < max(self.window_end, self.window_start + 1):
+            self._render(offset)
+        self.widget.see(self.to_tk(offset))
+
+    # Interface usada pelo HighlightPlayer
+
+    def after(self, delay_ms, callback):
+        return self.widget.after(delay_ms, callback)
+
+    def after_cancel(self, after_id):
+        self.widget.after_cancel(after_id)
+
+    def tag_config(self, tag, **options):
+        self.widget.tag_config(tag, **options)
+
+    def highlight(self, tag, char_start, char_end):
+        """Destaca o intervalo do documento, trazendo-o para a janela se preciso"""
+        self.clear_highlight(tag)
+        self._highlights[tag] = (char_start, char_end)
+        self.see_offset(char_start)
+        self._apply_highlight(tag)
+
+    def clear_highlight(self, tag):
+        if self._highlights.pop(tag, None) is not None:
+            self.widget.tag_remove(tag, "1.0", "end")
+
+    def _apply_highlight(self, tag):
+        char_start, char_end = self._highlights[tag]
+        start, end = max(char_start, self.window_start), min(char_end, self.window_end)
+        if start < end:
+            self.widget.tag_add(tag, self.to_tk(start), self.to_tk(end))
+
+    # Janela
+
+    def _flush(self):
+        """Devolve ao TextStore as edições feitas na janela"""
+        if self.widget.edit_modified():
+            text = self.widget.get("1.0", "end-1c")
+            self.store.replace(self.window_start, self.window_end, text)
+            self.window_end = self.window_start + len(text)
+            self.widget.edit_modified(False)
+
+    def _window_bounds(self, center):
+        """Janela de WINDOW_CHARS caracteres em torno da posição, alinhada a inícios de linha"""
+        length = len(self.store)
+        start = max(0, min(center - WINDOW_CHARS // 2, length - WINDOW_CHARS))
+        line_start = self.store.line_start(self.store.line_of(start))
+        if start - line_start <= LINE_SNAP_CHARS:
+            start = line_start
+        end = min(length, start + WINDOW_CHARS)
+        if end < length:
+            next_line = self.store.line_start(self.store.line_of(end) + 1)
+            if end < next_line <= end + LINE_SNAP_CHARS:
+                end = next_line
+        return start, end
+
+    def _top_offset(self):
+        return self.offset_at("@0,0") if self.window_end > self.window_start else self.window_start
+
+    def _render(self, center, top=None):
+        """Coloca no widget a janela em torno de center e mantém top (ou o topo atual) no alto da tela"""
+        self._flush()
+        top = self._top_offset() if top is None else top
+        insert = self.offset_at("insert") if self.window_end > self.window_start else None
+        start, end = self._window_bounds(center)
+        self.widget.delete("1.0", "end")
+        self.widget.insert("1.0", self.store.slice(start, end))
+        self.widget.edit_modified(False)
+        self.widget.edit_reset()
+        self.window_start, self.window_end = start, end
+        for tag in self._highlights:
+            self._apply_highlight(tag)
+        if insert is not None and start <= insert <= end:
+            self.widget.mark_set("insert", self.to_tk(insert))
+        if start <= top <= end:
+            self.widget.yview(self.to_tk(top))
+
+    def _on_widget_scroll(self, first, last):
+        """Converte a rolagem do widget para o documento inteiro e recentra a janela perto das bordas"""
+        first, last = float(first), float(last)
+        length = max(1, len(self.store))
+        size = self.window_end - self.window_start
+        if self.scrollbar is not None:
+            self.scrollbar.set((self.window_start + first * size) / length,
+                               (self.window_start + last * size) / length)
+        near_start = first < EDGE_FRACTION and self.window_start > 0
+        near_end = last > 1 - EDGE_FRACTION and self.window_end < length
+        if (near_start or near_end) and self._recenter_id is None:
+            self._recenter_id = self.widget.after_idle(self._recenter)
+
+    def _recenter(self):
+        self._recenter_id = None
+        top = self._top_offset()
+        self._render(top, top)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        """Rolagem pela barra: 'moveto' vai para a fração do documento; 'scroll' rola o widget"""
+        if action == 'moveto':
+            length = len(self.store)
+            offset = min(length, max(0, int(float(amount) * length)))
+            offset = self.store.line_start(self.store.line_of(offset))
+            if not self.window_start <= offset < self.window_end:
+                self._render(offset, offset)
+            self.widget.yview(self.to_tk(offset))
+        else:
+            self.widget.yview_scroll(int(amount), unit)
@@ -0,0 +1,196 @@
+import time
+import shutil
+import threading
+import subprocess
+from io import BytesIO
+from metrics import Histogram
+
+# Quadro MP3 silencioso (MPEG-2 Layer III, 32 kbps, 24 kHz, mono): cabeçalho
+# seguido de side info zerada, que decodifica como 576 amostras de silêncio
+SILENT_FRAME = bytes([0xFF, 0xF3, 0x44, 0xC0]) + bytes(92)
+
+# Faixas do histograma de latência por motor: de 1 ms a ~2 min, cada uma 25% maior que a anterior
+LATENCY_BUCKETS = tuple(0.001 * 1.25 ** i for i in range(53))
+
+
+class TTSEngine:
+    """Motor de síntese: converte um trecho de texto nos bytes de um MP3
+
+    Cada chamada tem sua latência registrada, para comparar a vazão entre
+    motores. As subclasses implementam _synthesize() e, se tiverem opções de
+    voz, as expõem em settings (que fazem parte da chave do cache).
+    """
+
+    name = 'base'
+
+    def __init__(self):
+        self.latencies = Histogram(LATENCY_BUCKETS)
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @property
+    def settings(self):
+        return {}
+
+    def _synthesize(self, text, lang):
+        raise NotImplementedError
+
+    def record_latency(self, seconds):
+        with self._lock:
+            self.latencies.observe(seconds)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def __call__(self, text, lang='pt'):
+        start = time.perf_counter()
+        try:
+            data = self._synthesize(text, lang)
+        except Exception:
+            self.record_error()
+            raise
+        self.record_latency(time.perf_counter() - start)
+        return data
+
+    def latency_stats(self):
+        """Resumo das latências por trecho, em segundos
+
+        As latências ficam num histograma de tamanho fixo (o motor padrão vive
+        o processo inteiro), então p50 e p95 são o limite superior da faixa
+        em que caem, com erro de até 25%.
+        """
+        with self._lock:
+            count, total, errors = self.latencies.count, self.latencies.sum, self.errors
+            p50, p95 = self.latencies.quantile(0.5), self.latencies.quantile(0.95)
+            max_latency = self.latencies.max
+        if not count:
+            return {'engine': self.name, 'chunks': 0, 'errors': errors}
+        return {
+            'engine': self.name,
+            'chunks': count,
+            'errors': errors,
+            'mean': round(total / count, 4),
+            'p50': round(p50, 4),
+            'p95': round(p95, 4),
+            'max': round(max_latency, 4),
+        }
+
+
+class GTTSEngine(TTSEngine):
+    """Google Translate TTS pela biblioteca gTTS (requer rede)"""
+
+    name = 'gtts'
+
+    def __init__(self, tld='com', slow=False):
+        super().__init__()
+        self.tld = tld
+        self.slow = slow
+
+    @property
+    def settings(self):
+        return {'tld': self.tld, 'slow': self.slow}
+
+    def _synthesize(self, text, lang):
+        from gtts import gTTS
+        buffer = BytesIO()
+        gTTS(text, lang=lang, tld=self.tld, slow=self.slow).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class AsyncGTTSEngine(GTTSEngine):
+    """gTTS por asyncio: conexões persistentes compartilhadas e no máximo `rate` requisições por segundo
+
+    synthesize_chunks usa o pipeline assíncrono de async_synthesis quando o
+    motor tem client(). base_url permite apontar para um servidor substituto
+    local (benchmarks/tts_standin.py).
+    """
+
+    name = 'gtts-async'
+
+    def __init__(self, tld='com', slow=False, rate=None, base_url=None):
+        from async_synthesis import DEFAULT_RATE, GTTS_PATH
+        super().__init__(tld, slow)
+        self.rate = DEFAULT_RATE if rate is None else rate
+        self.base_url = base_url or f"https://translate.google.{tld}"
+        self.path = GTTS_PATH
+        self.client_stats = {}
+
+    def client(self, connections=1, retries=None, backoff=None):
+        from async_synthesis import GTTSClient, DEFAULT_RETRIES, DEFAULT_BACKOFF
+        return GTTSClient(self, connections, DEFAULT_RETRIES if retries is None else retries,
+                          DEFAULT_BACKOFF if backoff is None else backoff)
+
+    def record_client_stats(self, stats):
+        with self._lock:
+            for name, value in stats.items():
+                self.client_stats[name] = self.client_stats.get(name, 0) + value
+
+    def latency_stats(self):
+        with self._lock:
+            client_stats = dict(self.client_stats)
+        return dict(super().latency_stats(), **client_stats)
+
+    def _synthesize(self, text, lang):
+        # Chamada avulsa, fora do pipeline: abre um pool só para este trecho
+        import asyncio
+
+        async def run():
+            async with self.client() as client:
+                return await client.synthesize(text, lang)
+        return asyncio.run(run())
+
+
+class EspeakEngine(TTSEngine):
+    """Síntese local com o espeak-ng, codificada em MP3 pelo ffmpeg no mesmo formato do gTTS"""
+
+    name = 'espeak-ng'
+
+    def __init__(self, voice=None, speed=160, executable='espeak-ng'):
+        super().__init__()
+        self.voice = voice
+        self.speed = speed
+        self.executable = shutil.which(executable) or shutil.which('espeak') or executable
+
+    @property
+    def settings(self):
+        return {'voice': self.voice, 'speed': self.speed}
+
+    def _synthesize(self, text, lang):
+        from pydub import AudioSegment
+        speech = subprocess.run([self.executable, '--stdout', '-v', self.voice or lang, '-s', str(self.speed)],
+                                input=text.encode('utf-8'), capture_output=True, check=True)
+        encoded = subprocess.run([AudioSegment.converter, '-loglevel', 'error', '-f', 'wav', '-i', 'pipe:0',
+                                  '-ar', '24000', '-ac', '1', '-b:a', '32k', '-f', 'mp3', 'pipe:1'],
+                                 input=speech.stdout, capture_output=True, check=True)
+        return encoded.stdout
+
+
+class StubEngine(TTSEngine):
+    """Motor local para testes offline: devolve silêncio proporcional ao texto após uma latência artificial"""
+
+    name = 'stub'
+
+    def __init__(self, latency=0.2, frames_per_char=3):
+        super().__init__()
+        self.latency = latency
+        self.frames_per_char = frames_per_char
+
+    @property
+    def settings(self):
+        return {'frames_per_char': self.frames_per_char}
+
+    def _synthesize(self, text, lang):
+        time.sleep(self.latency)
+        return SILENT_FRAME * max(1, len(text) * self.frames_per_char)
+
+
+ENGINES = {engine.name: engine for engine in (GTTSEngine, AsyncGTTSEngine, EspeakEngine, StubEngine)}
+
+
+def create_engine(name, **options):
+    """Cria um motor de síntese pelo nome ('gtts', 'gtts-async', 'espeak-ng' ou 'stub')"""
+    try:
+        return ENGINES[name](**options)
+    except KeyError:
+        raise ValueError(f"Motor de síntese desconhecido: {name}") from None
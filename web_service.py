@@ -0,0 +1,399 @@
+"""Serviço HTTP de conversão de documentos em áudio, com fila de jobs persistente
+
+Uso: python web_service.py [--host 127.0.0.1] [--port 8000] [--workers 2] [--tts-workers 4] [--engine gtts]
+     [--worker-id NOME]
+
+Rotas:
+  POST   /jobs?filename=doc.docx   corpo = conteúdo do documento; cria um job e retorna seu id
+  GET    /jobs                     últimos jobs
+  GET    /jobs/<id>                estado, progresso e métricas do job
+  GET    /jobs/<id>/events         progresso em fluxo (text/event-stream) até o job terminar
+  GET    /jobs/<id>/audio          MP3 gerado (aceita Range, para tocar e pular sem baixar tudo)
+  GET    /jobs/<id>/index          índice de destaque
+  GET    /jobs/<id>/timeline       linha do tempo em colunas (ms, caracteres e bytes do texto)
+  GET    /jobs/<id>/text           texto preparado, em UTF-8 (aceita Range)
+  GET    /jobs/<id>/player         reprodutor web com destaque sincronizado
+  DELETE /jobs/<id>                cancela o job
+  GET    /stats                    jobs por estado, workers e motor de síntese
+  GET    /metrics                  métricas do pipeline no formato de texto do Prometheus
+
+Exemplo: curl --data-binary @doc.docx "http://127.0.0.1:8000/jobs?filename=doc.docx"
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from converter import PROJECT_DIR, TTS_ENGINE, TTS_WORKERS, SUPPORTED_EXTENSIONS, convert_document, get_chunk_cache
+from job_queue import JobQueue, FINISHED_STATES, QUEUED, RUNNING, DONE
+from highlight_index import HighlightIndex, timeline_path
+from http_files import send_file, COPY_BLOCK
+from synthesis import SynthesisCancelled
+from tts_engines import ENGINES, create_engine
+from metrics import METRICS
+
+SERVICE_DIR = os.path.join(PROJECT_DIR, "service")
+DEFAULT_WORKERS = 2  # Jobs convertidos ao mesmo tempo
+MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+DEFAULT_LIST_LIMIT = 100
+MAX_LIST_LIMIT = 1000  # Jobs devolvidos por GET /jobs, no máximo
+EVENTS_POLL_SECONDS = 0.5
+PLAYER_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "player.html")
+
+
+class ConversionWorkers:
+    """Pool de threads que retira jobs da fila e os converte com convert_document"""
+
+    def __init__(self, queue, workers=DEFAULT_WORKERS, synthesize=None, tts_workers=TTS_WORKERS):
+        self.queue = queue
+        self.workers = max(1, workers)
+        self.synthesize = synthesize
+        self.tts_workers = tts_workers
+        self._cancel_events = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self.queue.requeue_interrupted()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"conversion-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Para de retirar jobs e cancela os que estão em execução"""
+        self._stopping.set()
+        with self._lock:
+            for event in self._cancel_events.values():
+                event.set()
+        for thread in self._threads:
+            thread.join()
+
+    def cancel(self, job_id):
+        """Cancela um job na fila ou em execução; retorna False se ele já tinha terminado"""
+        cancelled = self.queue.cancel(job_id)
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        return cancelled
+
+    @property
+    def running(self):
+        with self._lock:
+            return len(self._cancel_events)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            job = self.queue.claim(timeout=1.0)
+            if job is not None:
+                self._process(job)
+
+    def _process(self, job):
+        job_id = job['id']
+        cancel = threading.Event()
+        with self._lock:
+            self._cancel_events[job_id] = cancel
+
+        def progress(done, total):
+            self.queue.update_progress(job_id, done, total)
+
+        base_filename = os.path.splitext(job['filename'])[0]
+        text_filename = os.path.join(job['output_dir'], f"{base_filename}.txt")
+        try:
+            os.makedirs(job['output_dir'], exist_ok=True)
+            result = convert_document(job['source_path'], job['output_dir'], self.synthesize, self.tts_workers,
+                                      progress=progress, cancel=cancel, text_filename=text_filename)
+            result['text'] = text_filename
+            result['timeline'] = timeline_path(job['output_dir'], f"{base_filename}.mp3")
+            HighlightIndex.load(result['index']).save_timeline(result['timeline'], text_filename)
+        except SynthesisCancelled:
+            pass  # O estado já foi gravado por cancel()
+        except Exception as e:
+            self.queue.fail(job_id, f"{type(e).__name__}: {e}")
+        else:
+            result['queued_seconds'] = job['queued_seconds']
+            self.queue.finish(job_id, result)
+        finally:
+            with self._lock:
+                del self._cancel_events[job_id]
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'newReader'
+
+    ROUTES = [
+        ('GET', r'/jobs', 'list_jobs'),
+        ('POST', r'/jobs', 'create_job'),
+        ('GET', r'/jobs/(\w+)', 'job_status'),
+        ('DELETE', r'/jobs/(\w+)', 'cancel_job'),
+        ('GET', r'/jobs/(\w+)/events', 'job_events'),
+        ('GET', r'/jobs/(\w+)/audio', 'job_audio'),
+        ('GET', r'/jobs/(\w+)/index', 'job_index'),
+        ('GET', r'/jobs/(\w+)/timeline', 'job_timeline'),
+        ('GET', r'/jobs/(\w+)/text', 'job_text'),
+        ('GET', r'/jobs/(\w+)/player', 'job_player'),
+        ('GET', r'/stats', 'stats'),
+        ('GET', r'/metrics', 'metrics'),
+    ]
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _dispatch(self, method):
+        self.head = method == 'HEAD'
+        method = 'GET' if self.head else method
+        url = urlsplit(self.path)
+        self.query = parse_qs(url.query)
+        for route_method, pattern, name in self.ROUTES:
+            match = re.fullmatch(pattern, url.path.rstrip('/') or '/')
+            if match and route_method == method:
+                return getattr(self, name)(*match.groups())
+        self.send_json(404, {'error': 'rota não encontrada'})
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_HEAD(self):
+        self._dispatch('HEAD')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    # Respostas
+
+    def send_json(self, status, payload, headers=()):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if not self.head:
+            self.wfile.write(body)
+
+    def send_job_file(self, job_id, name, content_type):
+        """Envia um arquivo de um job concluído, com Range e cabeçalhos de cache"""
+        job = self._finished_job(job_id)
+        if job is not None:
+            send_file(self, job['result'][name], content_type, head=self.head)
+
+    def _finished_job(self, job_id):
+        """Retorna o job concluído, ou responde com o erro adequado e retorna None"""
+        job = self.server.queue.get(job_id)
+        if job is None:
+            self.send_json(404, {'error': 'job não encontrado'})
+        elif job['status'] != DONE:
+            self.send_json(409, {'error': f"job em estado {job['status']}", 'status': job['status']})
+        else:
+            return job
+        return None
+
+    # Rotas
+
+    def list_jobs(self):
+        try:
+            limit = int(self.query.get('limit', [DEFAULT_LIST_LIMIT])[0])
+        except ValueError:
+            limit = -1
+        if limit < 0:
+            self.send_json(400, {'error': 'limit deve ser um inteiro não negativo'})
+            return
+        limit = min(limit, MAX_LIST_LIMIT)
+        self.send_json(200, {'jobs': self.server.queue.list(limit)})
+
+    def create_job(self):
+        filename = os.path.basename(self.query.get('filename', [''])[0] or self.headers.get('X-Filename', ''))
+        filename = re.sub(r'[^\w.\- ]', '_', filename)
+        if os.path.splitext(filename)[1].lower() not in SUPPORTED_EXTENSIONS:
+            self.close_connection = True  # O corpo não lido impede reaproveitar a conexão
+            self.send_json(400, {'error': f"informe filename com extensão {', '.join(SUPPORTED_EXTENSIONS)}"})
+            return
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self.close_connection = True
+            self.send_json(411, {'error': 'Content-Length obrigatório'})
+            return
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self.send_json(400, {'error': 'Content-Length inválido'})
+            return
+        if length > MAX_UPLOAD_BYTES:
+            self.close_connection = True
+            self.send_json(413, {'error': f"documento maior que {MAX_UPLOAD_BYTES} bytes"})
+            return
+
+        job_id = os.urandom(16).hex()
+        upload_dir = os.path.join(self.server.data_dir, 'uploads', job_id)
+        os.makedirs(upload_dir, exist_ok=True)
+        source_path = os.path.join(upload_dir, filename)
+        with open(source_path, 'wb') as file:
+            remaining = length
+            while remaining:
+                block = self.rfile.read(min(COPY_BLOCK, remaining))
+                if not block:
+                    break
+                file.write(block)
+                remaining -= len(block)
+        if remaining:
+            # O cliente desconectou antes de enviar o corpo todo; o documento truncado não vai para a fila
+            shutil.rmtree(upload_dir, ignore_errors=True)
+            self.close_connection = True
+            self.send_json(400, {'error': f"corpo incompleto: faltaram {remaining} de {length} bytes"})
+            return
+        output_dir = os.path.join(self.server.data_dir, 'outputs', job_id)
+        self.server.queue.submit(filename, source_path, output_dir, job_id)
+        self.send_json(202, self.server.queue.get(job_id), [('Location', f"/jobs/{job_id}")])
+
+    def job_status(self, job_id):
+        job = self.server.queue.get(job_id)
+        if job is None:
+            self.send_json(404, {'error': 'job não encontrado'})
+        else:
+            self.send_json(200, job)
+
+    def cancel_job(self, job_id):
+        if self.server.queue.get(job_id) is None:
+            self.send_json(404, {'error': 'job não encontrado'})
+        elif self.server.workers.cancel(job_id):
+            self.send_json(200, self.server.queue.get(job_id))
+        else:
+            self.send_json(409, {'error': 'job já terminado'})
+
+    def job_events(self, job_id):
+        """Envia o estado do job a cada mudança, no formato Server-Sent Events"""
+        job = self.server.queue.get(job_id)
+        if job is None:
+            self.send_json(404, {'error': 'job não encontrado'})
+            return
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        last = None
+        try:
+            while True:
+                state = (job['status'], job['done_chunks'])
+                if state != last:
+                    self.wfile.write(f"data: {json.dumps(job, ensure_ascii=False)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                    last = state
+                if job['status'] in FINISHED_STATES:
+                    return
+                time.sleep(EVENTS_POLL_SECONDS)
+                job = self.server.queue.get(job_id)
+        except ConnectionError:
+            pass  # O cliente parou de acompanhar
+
+    def job_audio(self, job_id):
+        self.send_job_file(job_id, 'output', 'audio/mpeg')
+
+    def job_index(self, job_id):
+        self.send_job_file(job_id, 'index', 'application/json')
+
+    def job_timeline(self, job_id):
+        self.send_job_file(job_id, 'timeline', 'application/json')
+
+    def job_text(self, job_id):
+        self.send_job_file(job_id, 'text', 'text/plain; charset=utf-8')
+
+    def job_player(self, job_id):
+        if self._finished_job(job_id) is not None:
+            send_file(self, PLAYER_PAGE, 'text/html; charset=utf-8', max_age=0, head=self.head)
+
+    def stats(self):
+        synthesize = self.server.workers.synthesize
+        self.send_json(200, {
+            'jobs': self.server.queue.counts(),
+            'workers': self.server.workers.workers,
+            'running': self.server.workers.running,
+            'engine': synthesize.latency_stats() if hasattr(synthesize, 'latency_stats') else None,
+        })
+
+    def metrics(self):
+        # O estado da fila e do cache é lido no momento da coleta
+        counts = self.server.queue.counts()
+        for status in (QUEUED, RUNNING) + FINISHED_STATES:
+            METRICS.set_gauge('jobs', counts.get(status, 0), status=status)
+        METRICS.set_gauge('workers_running', self.server.workers.running)
+        cache = get_chunk_cache().stats()
+        METRICS.set_gauge('cache_hit_ratio', round(cache['hit_rate'], 4))
+        METRICS.set_gauge('cache_bytes', cache['bytes'])
+        body = METRICS.prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not self.head:
+            self.wfile.write(body)
+
+
+class ConversionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, queue, workers, data_dir, verbose=False):
+        super().__init__(address, ServiceHandler)
+        self.queue = queue
+        self.workers = workers
+        self.data_dir = data_dir
+        self.verbose = verbose
+
+
+def create_server(host='127.0.0.1', port=8000, data_dir=SERVICE_DIR, workers=DEFAULT_WORKERS, synthesize=None,
+                  tts_workers=TTS_WORKERS, verbose=False, worker_id=None):
+    """Cria a fila, inicia os workers e retorna o servidor pronto para serve_forever()"""
+    queue = JobQueue(os.path.join(data_dir, 'jobs.db'), worker_id)
+    conversion_workers = ConversionWorkers(queue, workers, synthesize, tts_workers).start()
+    return ConversionServer((host, port), queue, conversion_workers, data_dir, verbose)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--data-dir', default=SERVICE_DIR, help="diretório da fila, dos envios e dos áudios")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="jobs convertidos em paralelo")
+    parser.add_argument('--tts-workers', type=int, default=TTS_WORKERS,
+                        help="trechos sintetizados em paralelo por job")
+    parser.add_argument('--engine', choices=sorted(ENGINES), default=TTS_ENGINE)
+    parser.add_argument('--verbose', action='store_true', help="registra cada requisição")
+    parser.add_argument('--worker-id', help="identifica este processo na fila (padrão: nome da máquina); "
+                                            "cada processo que compartilha o --data-dir precisa de um diferente")
+    args = parser.parse_args(argv)
+
+    server = create_server(args.host, args.port, args.data_dir, args.workers, create_engine(args.engine),
+                           args.tts_workers, args.verbose, args.worker_id)
+    print(f"Servindo em http://{args.host}:{server.server_address[1]} com {args.workers} workers",
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.workers.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())